@@ -0,0 +1,46 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Time taken by `import mcmlpy` in a fresh interpreter.
+
+Plotting modules are imported only when a plot is made, so worker processes
+that just read files should not load matplotlib.  The script exits with an
+error if `import mcmlpy` imports it::
+
+    python benchmarks/bench_import.py
+"""
+import sys
+import subprocess
+
+code = """
+import sys, time
+start = time.perf_counter()
+import mcmlpy
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in ('matplotlib', 'mpl_toolkits') if m in sys.modules)
+print(elapsed, ' '.join(heavy))
+"""
+
+
+def time_import(repeat=5):
+    """Return the best import time in seconds and the plotting modules loaded."""
+    best = float('inf')
+    heavy = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], check=True,
+                             capture_output=True, text=True).stdout.split()
+        best = min(best, float(out[0]))
+        heavy = out[1:]
+    return best, heavy
+
+
+def main():
+    """Print the import time and fail if matplotlib was imported."""
+    elapsed, heavy = time_import()
+    print('import mcmlpy  %8.1f ms' % (elapsed * 1000))
+    if heavy:
+        sys.exit('import mcmlpy also imported %s' % ', '.join(heavy))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Spectra fitted per second by the batched inversion.
+
+Profiles of 50 radii with 2% noise are made from diffusion theory for
+random optical properties and fitted in batches of increasing size::
+
+    python benchmarks/bench_invert.py
+"""
+import numpy as np
+from mcmlpy import invert, farrell_rdr
+
+
+def main(sizes=(100, 1000, 10000)):
+    """Print time, spectra per second and median errors for each batch size."""
+    rng = np.random.default_rng(0)
+    r = np.linspace(0.05, 5, 50)
+    for N in sizes:
+        mu_a = 10**rng.uniform(-3, -0.5, N)
+        mu_s_prime = rng.uniform(0.5, 3, N)
+        Rdr = farrell_rdr(r, mu_a[:, None], mu_s_prime[:, None])
+        Rdr *= 1 + 0.02 * rng.standard_normal(Rdr.shape)
+        fit = invert(Rdr, r=r)
+        error_a = np.median(np.abs(fit.params[:, 0] / mu_a - 1))
+        error_s = np.median(np.abs(fit.params[:, 1] / mu_s_prime - 1))
+        print('%6d spectra %7.3f s %9.0f spectra/s %3d iterations  rms %.4f  '
+              'median error mu_a %.4f mu_s\' %.4f' %
+              (N, fit.seconds, N / fit.seconds, fit.iterations, np.mean(fit.rms), error_a, error_s))
+
+
+if __name__ == "__main__":
+    main()
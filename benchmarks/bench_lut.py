@@ -0,0 +1,36 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Cost per point of interpolating in a lookup table.
+
+A 20 x 16 x 5 x 3 table (with 100 Rdr values per point) is filled with a
+smooth function and queried at a million random points::
+
+    python benchmarks/bench_lut.py
+"""
+import time
+import numpy as np
+from mcmlpy import LUT
+
+
+def main(points=1000000):
+    """Print microseconds per point for the scalar and Rdr queries."""
+    axes = {'mu_a': np.geomspace(1e-3, 1, 20), 'mu_s': np.linspace(5, 20, 16),
+            'g': np.linspace(0.7, 0.95, 5), 'n': np.linspace(1.33, 1.45, 3)}
+    grid = np.meshgrid(*axes.values(), indexing='ij')
+    Rd = np.exp(-np.sqrt(3 * grid[0] * (grid[0] + grid[1] * (1 - grid[2])))) / grid[3]
+    r = np.linspace(0.05, 5, 100)
+    lut = LUT(axes, {'Rd': Rd, 'Tt': 1 - Rd, 'absorbed': Rd * 0,
+                     'Rdr': Rd[..., None] * np.exp(-r)}, r=r)
+
+    rng = np.random.default_rng(0)
+    x = [rng.uniform(a[0], a[-1], points) for a in axes.values()]
+    for quantity, n in (('Rd', points), ('Tt', points), ('Rdr', points // 100)):
+        start = time.perf_counter()
+        lut(*(a[:n] for a in x), quantity=quantity)
+        elapsed = time.perf_counter() - start
+        print('%-4s %9d points %8.3f µs/point' % (quantity, n, elapsed / n * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Throughput of the numeric block readers.
+
+Compares the original character-at-a-time reader (`read_float` called once per
+number) with `read_N_floats` for blocks shaped like the A_rz, Rd_ra and Td_ra
+sections of large .mco files::
+
+    python benchmarks/bench_read.py
+"""
+import io
+import time
+import numpy as np
+from mcmlpy.mcml import read_float, read_N_floats
+
+blocks = {'A_rz': (500, 1000),
+          'Rd_ra': (30, 1000),
+          'Td_ra': (30, 1000)}
+
+
+def make_block(tag, rows, cols, seed=0):
+    """Return text for one section written like MCML does (5 per line, %12.4E)."""
+    rng = np.random.default_rng(seed)
+    values = rng.random(rows * cols) * 10.0 ** rng.integers(-6, 4, rows * cols)
+    lines = ['%s\n' % tag]
+    for i in range(0, len(values), 5):
+        lines.append(''.join('%12.4E ' % v for v in values[i:i + 5]) + '\n')
+    lines.append('\n')
+    return ''.join(lines), values
+
+
+def legacy_read_N_floats(file, N):
+    """Read N values one character at a time (the original implementation)."""
+    arr = np.zeros(N)
+    for i in range(N):
+        arr[i] = read_float(file)
+    return arr
+
+
+def time_reader(reader, text, N):
+    """Time one pass of reader over text after the section tag."""
+    fp = io.StringIO(text)
+    fp.readline()
+    start = time.perf_counter()
+    values = reader(fp, N)
+    return time.perf_counter() - start, values
+
+
+def main():
+    """Print the time and speedup for each block."""
+    print('%-6s %10s %10s %10s %8s' % ('block', 'values', 'legacy s', 'bulk s', 'speedup'))
+    for tag, (rows, cols) in blocks.items():
+        text, expected = make_block(tag, rows, cols)
+        N = rows * cols
+        t_old, old = time_reader(legacy_read_N_floats, text, N)
+        t_new, new = time_reader(read_N_floats, text, N)
+        assert np.array_equal(old, new)
+        assert np.allclose(new, expected, rtol=1e-4)
+        print('%-6s %10d %10.3f %10.4f %7.0fx' % (tag, N, t_old, t_new, t_old / t_new))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Strong scaling of parallel Monte Carlo runs.
+
+The same number of photons is simulated with 1, 2, 4, ... worker processes
+(up to the number of CPUs) and the speedup and parallel efficiency relative
+to one worker are printed::
+
+    python benchmarks/bench_scaling.py [photons]
+"""
+import os
+import sys
+import time
+from mcmlpy import Simulation
+
+
+def main(photons=400000):
+    """Print time, speedup and efficiency for each number of workers."""
+    sim = Simulation(n=[1.4], mu_a=[0.01], mu_s=[1], g=[0.9], d=[10],
+                     dz=0.1, dr=0.1, ndz=100, ndr=100, nda=30)
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+
+    print('%8s %10s %12s %8s %10s' % ('workers', 'seconds', 'photons/s', 'speedup', 'efficiency'))
+    base = None
+    for workers in counts:
+        start = time.perf_counter()
+        sim.run(photons, seed=1, workers=workers)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print('%8d %10.2f %12.0f %8.2f %9.0f%%' % (workers, elapsed, photons / elapsed,
+                                                  base / elapsed, 100 * base / elapsed / workers))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400000)
@@ -0,0 +1,38 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Speed and accuracy of the Monte Carlo simulator.
+
+Each reference V1 .mco file in tests/ is simulated with the same layers and
+grid, and the photons per second and the totals are compared with those in
+the file::
+
+    python benchmarks/bench_simulate.py [photons]
+"""
+import os
+import sys
+import time
+from mcmlpy import MCMLV1, Simulation
+
+references = ['mc-lost-v1-0.mco', 'mc-lost-v1-1.mco', 'mc-lost-v1-2.mco', 'mc-lost-v1-3.mco']
+tests = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests')
+
+
+def main(photons=100000):
+    """Print photons/s and the simulated and reference totals."""
+    print('%-18s %10s %17s %17s %17s' % ('file', 'photons/s', 'Rd (ref)', 'A (ref)', 'Tt (ref)'))
+    for name in references:
+        ref = MCMLV1()
+        ref.read_file(os.path.join(tests, name))
+        sim = Simulation.from_mcml(ref)
+        start = time.perf_counter()
+        mcml = sim.run(photons, seed=1)
+        elapsed = time.perf_counter() - start
+        print('%-18s %10.0f' % (name, photons / elapsed), end='')
+        for attr in ('Rd', 'absorbed', 'Tt'):
+            print('  %7.4f (%6.4f)' % (getattr(mcml, attr), getattr(ref, attr)), end='')
+        print()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,223 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+# pylint: disable=import-outside-toplevel
+"""
+Time, peak memory and throughput of every parser on synthetic files.
+
+V1, V2 and MCSub files of the chosen size are written by `synthetic.py` and
+each of `init_from_file()`, every section reader and `plot_fluence()` is
+measured in a fresh process so that its peak resident memory is its own.
+The results are saved as JSON (by default in benchmarks/results/ named after
+the version and commit) and can be compared with an earlier run::
+
+    python benchmarks/bench_suite.py --size medium
+    python benchmarks/bench_suite.py --size medium --compare benchmarks/results/old.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import synthetic
+
+SIZES = {'small': {'ndz': 50, 'ndr': 100, 'nda': 10, 'ndt': 5},
+         'medium': {'ndz': 200, 'ndr': 500, 'nda': 30, 'ndt': 10},
+         'large': {'ndz': 500, 'ndr': 2000, 'nda': 30, 'ndt': 20}}
+
+FORMATS = ('v1', 'v2', 'mcsub')
+
+
+def _peak_rss():
+    """Return the peak resident memory of this process in bytes (None if unknown)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _new_object(fmt):
+    import mcmlpy
+    return {'v1': mcmlpy.MCMLV1, 'v2': mcmlpy.MCMLV2, 'mcsub': mcmlpy.MCSub}[fmt]()
+
+
+def _measure(job):
+    """Run one measurement in a worker process and return its results."""
+    fmt, operation, path, repeat = job
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from mcmlpy.mcml import index_sections
+
+    obj = _new_object(fmt)
+    if operation == 'init_from_file':
+        nbytes = os.path.getsize(path)
+
+        def run():
+            _new_object(fmt).init_from_file(path)
+
+    elif operation == 'plot_fluence':
+        obj.read_file(path)
+        nbytes = obj.Arz.nbytes
+
+        def run():
+            _, ax = plt.subplots(figsize=(8, 4.5))
+            obj.plot_fluence(ax=ax)
+            plt.gcf().savefig(io.BytesIO(), format='png')
+            plt.close('all')
+
+    else:
+        tag = operation.split(':')[1]
+        with open(path, 'r', encoding='utf-8') as file:
+            obj.read_header(file)
+        with open(path, 'rb') as file:
+            buffer = file.read()
+        section = index_sections(buffer)[tag]
+        text = buffer[section.start:section.stop]
+        nbytes = len(text)
+
+        def run():
+            obj.read_section(tag, text)
+
+    before = _peak_rss()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    after = _peak_rss()
+
+    seconds = min(times)
+    return {'format': fmt,
+            'operation': operation,
+            'seconds': seconds,
+            'bytes': nbytes,
+            'bytes_per_s': nbytes / seconds if seconds > 0 else None,
+            'peak_mb': None if after is None else after / 1e6,
+            'delta_mb': None if after is None else (after - before) / 1e6}
+
+
+def _operations(fmt, path):
+    """Return the operations measured for one file."""
+    from mcmlpy.mcml import index_sections
+    operations = ['init_from_file', 'plot_fluence']
+    if fmt != 'mcsub':
+        with open(path, 'rb') as file:
+            operations += ['section:' + tag for tag in index_sections(file.read())]
+    return operations
+
+
+def _git_commit():
+    """Return the short hash of HEAD or None outside a git checkout."""
+    try:
+        here = os.path.dirname(os.path.abspath(__file__))
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=here, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(size, repeat=3, directory=None):
+    """
+    Measure every operation on synthetic files of one size.
+
+    Args:
+        size (dict): Values of ndz, ndr, nda and ndt.
+        repeat (int): The fastest of this many repetitions is kept.
+        directory (str, optional): Where the synthetic files are written.
+
+    Returns:
+        dict with the environment and a list of results.
+    """
+    import mcmlpy
+    context = multiprocessing.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        paths = {'v1': os.path.join(tmp, 'synthetic-v1.mco'),
+                 'v2': os.path.join(tmp, 'synthetic-v2.mco'),
+                 'mcsub': os.path.join(tmp, 'synthetic-mcOUT.dat')}
+        synthetic.write_v1(paths['v1'], size['ndz'], size['ndr'], size['nda'])
+        synthetic.write_v2(paths['v2'], size['ndz'], size['ndr'], size['nda'], size['ndt'])
+        synthetic.write_mcsub(paths['mcsub'], size['ndz'], size['ndr'])
+
+        for fmt in FORMATS:
+            for operation in _operations(fmt, paths[fmt]):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(_measure, (fmt, operation, paths[fmt], repeat)).result()
+                results.append(result)
+                _print_result(result)
+
+    return {'mcmlpy': mcmlpy.__version__,
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'size': size,
+            'repeat': repeat,
+            'results': results}
+
+
+def _print_result(result, previous=None):
+    s = '%-6s %-18s %10.4f s %10.1f MB/s' % (result['format'], result['operation'],
+                                             result['seconds'], (result['bytes_per_s'] or 0) / 1e6)
+    if result['peak_mb'] is not None:
+        s += ' %8.1f MB peak %8.1f MB added' % (result['peak_mb'], result['delta_mb'])
+    if previous is not None:
+        s += '   %5.2fx time of previous' % (result['seconds'] / previous['seconds'])
+    print(s)
+
+
+def compare(report, baseline):
+    """Print each result next to the ratio of its time to the same one in baseline."""
+    old = {(r['format'], r['operation']): r for r in baseline['results']}
+    print('compared with mcmlpy %s (%s) from %s' % (baseline['mcmlpy'], baseline['commit'],
+                                                    baseline['date']))
+    for result in report['results']:
+        _print_result(result, old.get((result['format'], result['operation'])))
+
+
+def main():
+    """Run the suite described by the command line and save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--size', choices=list(SIZES), default='small')
+    for name in ('ndz', 'ndr', 'nda', 'ndt'):
+        parser.add_argument('--' + name, type=int, help='override the %s of --size' % name)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='JSON file for the results')
+    parser.add_argument('--compare', help='JSON file from an earlier run')
+    args = parser.parse_args()
+
+    size = dict(SIZES[args.size])
+    for name in size:
+        if getattr(args, name) is not None:
+            size[name] = getattr(args, name)
+
+    report = run_suite(size, args.repeat)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare(report, json.load(file))
+
+    output = args.output
+    if output is None:
+        directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+        os.makedirs(directory, exist_ok=True)
+        output = os.path.join(directory, '%s-%s-%s.json' % (report['mcmlpy'], report['commit'] or
+                                                            'unknown', args.size))
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=1)
+    print('results saved in %s' % output)
+
+
+if __name__ == "__main__":
+    main()
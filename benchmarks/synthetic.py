@@ -0,0 +1,251 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Write valid V1, V2 and MCSub output files of any size for benchmarking.
+
+The headers copy the layout written by the C programs and every section is
+filled with random positive values, written five per line as `%12.4E` in the
+same way as MCML.  Grids are formatted in bulk with `np.savetxt`::
+
+    python benchmarks/synthetic.py big.mco --version 2 --ndz 500 --ndr 2000
+"""
+import io
+import argparse
+import numpy as np
+
+__all__ = ['write_v1', 'write_v2', 'write_mcsub']
+
+V1_HEADER = """A1 \t# Version number of the file format.
+
+####
+# Data categories include:
+# InParm, RAT,
+# A_l, A_z, Rd_r, Rd_a, Tt_r, Tt_a,
+# A_rz, Rd_ra, Tt_ra
+####
+
+# User time:        0 sec =     0.00 hr.   Simulation time of this run.
+
+InParm \t\t\t# Input parameters. cm is used.
+%(name)s \tA\t\t# output file name, ASCII.
+%(photons)d \t\t\t# No. of photons
+%(dz)g\t%(dr)g\t\t# dz, dr [cm]
+%(ndz)d\t%(ndr)d\t%(nda)d\t# No. of dz, dr, da.
+
+%(num_layers)d\t\t\t\t\t# Number of layers
+#n\tmua\tmus\tg\td\t# One line for each layer
+1\t\t\t\t\t# n for medium above
+%(layers)s1\t\t\t\t\t# n for medium below
+
+"""
+
+V2_HEADER = """mcmloA2.0 \t# Version number of the file format.
+
+####
+# Data categories include:
+# InParam, RAT,
+# Rd_r\tRd_a\tRd_ra\tRd_t\tRd_rt\tRd_at\tRd_rat
+# Td_r\tTd_a\tTd_ra\tTd_t\tTd_rt\tTd_at\tTd_rat
+# A_z\tA_rz\tA_t\tA_zt\tA_rzt
+####
+
+mcmli2.0 \t\t\t# file version
+
+# Specify media
+#\tname\t\tn\tmua\tmus\tg
+\tair \t\t1\t0\t0\t0
+%(media)send #of media
+
+# Specify data for run 1
+%(name)s \tA\t\t\t# output file name, format.
+
+# \tmedium \t\tthickness
+\tair
+%(layers)s\tair
+end #of layers
+
+pencil \t\t\t\t\t# src type: pencil/isotropic.
+0\t\t\t\t\t# starting position of source.
+
+%(dz)g\t%(dr)g\t%(dt)g\t\t\t# dz, dr, dt.
+%(ndz)d\t%(ndr)d\t%(ndt)d\t%(nda)d\t\t# nz, nr, nt, na.
+
+# This simulation will score the following categories:
+%(scored)s
+
+%(photons)d  \t0:00\t\t\t\t# no. of photons | time
+0.0001\t\t\t\t\t# threshold weight.
+1\t\t\t\t\t# random number seed.
+end #of runs
+
+"""
+
+
+def _layers(num_layers):
+    """Return (n, mu_a, mu_s, g, d) in cm units for each synthetic layer."""
+    return [(1.4, 0.1 * (i + 1), 100 / (i + 1), 0.9, 0.1) for i in range(num_layers)]
+
+
+def _section(out, tag, values, comment=''):
+    """Write a tagged section five values per line like MCML."""
+    out.write('%s%s\n' % (tag, comment))
+    values = np.ravel(values)
+    full = len(values) // 5 * 5
+    np.savetxt(out, values[:full].reshape(-1, 5), fmt='%12.4E ', delimiter='')
+    if full < len(values):
+        out.write(''.join('%12.4E ' % v for v in values[full:]) + '\n')
+    out.write('\n')
+
+
+def _values(rng, shape):
+    """Return random positive values spanning several decades."""
+    return rng.random(shape) * 10.0 ** rng.integers(-6, 3, shape)
+
+
+def write_v1(path, ndz=100, ndr=100, nda=10, num_layers=3, dz=0.01, dr=0.01, seed=0):
+    """
+    Write a V1 .mco file with every section.
+
+    Args:
+        path (str): Name of the file to create.
+        ndz, ndr, nda (int): Number of depth, radial and angular bins.
+        num_layers (int): Number of layers.
+        dz, dr (float): Bin sizes in cm.
+        seed (int): Seed for the random values.
+
+    Returns:
+        Size of the file in bytes.
+    """
+    rng = np.random.default_rng(seed)
+    layers = ''.join('%g\t%g\t%g\t%g\t%g\t# layer %d\n' % (p + (i + 1,))
+                     for i, p in enumerate(_layers(num_layers)))
+    out = io.StringIO()
+    out.write(V1_HEADER % {'name': path, 'photons': 1000000, 'dz': dz, 'dr': dr, 'ndz': ndz,
+                           'ndr': ndr, 'nda': nda, 'num_layers': num_layers, 'layers': layers})
+    out.write('RAT #Reflectance, absorption, transmission. \n')
+    for value, comment in ((0.0272, 'Specular reflectance'), (0.4, 'Diffuse reflectance'),
+                           (0.5, 'Absorbed fraction'), (0.0728, 'Transmittance')):
+        out.write('%-15g\t#%s [-]\n' % (value, comment))
+    out.write('\n')
+    _section(out, 'A_l', _values(rng, num_layers), ' #Absorption as a function of layer. [-]')
+    _section(out, 'A_z', _values(rng, ndz), ' #A[0], [1],..A[nz-1]. [1/cm]')
+    _section(out, 'Rd_r', _values(rng, ndr), ' #Rd[0], [1],..Rd[nr-1]. [1/cm2]')
+    _section(out, 'Rd_a', _values(rng, nda), ' #Rd[0], [1],..Rd[na-1]. [sr-1]')
+    _section(out, 'Tt_r', _values(rng, ndr), ' #Tt[0], [1],..Tt[nr-1]. [1/cm2]')
+    _section(out, 'Tt_a', _values(rng, nda), ' #Tt[0], [1],..Tt[na-1]. [sr-1]')
+    out.write('# A[r][z]. [1/cm3]\n')
+    _section(out, 'A_rz', _values(rng, ndr * ndz))
+    out.write('# Rd[r][angle]. [1/(cm2sr)].\n')
+    _section(out, 'Rd_ra', _values(rng, ndr * nda))
+    out.write('# Tt[r][angle]. [1/(cm2sr)].\n')
+    _section(out, 'Tt_ra', _values(rng, ndr * nda))
+    return _save(path, out)
+
+
+def write_v2(path, ndz=100, ndr=100, nda=10, ndt=10, num_layers=3, dz=0.01, dr=0.01, dt=0.1,
+             seed=0):
+    """
+    Write a V2 .mco file with every section, including the time-resolved ones.
+
+    Args:
+        path (str): Name of the file to create.
+        ndz, ndr, nda, ndt (int): Number of depth, radial, angular and time bins.
+        num_layers (int): Number of layers between two layers of air.
+        dz, dr (float): Bin sizes in cm.
+        dt (float): Time bin in ps.
+        seed (int): Seed for the random values.
+
+    Returns:
+        Size of the file in bytes.
+    """
+    rng = np.random.default_rng(seed)
+    media = ''
+    layers = ''
+    for i, (n, mu_a, mu_s, g, d) in enumerate(_layers(num_layers)):
+        media += '\ttissue_%d \t%g\t%g\t%g\t%g\n' % (i + 1, n, mu_a, mu_s, g)
+        layers += '\ttissue_%d \t%g\n' % (i + 1, d)
+    sizes = {'z': ndz, 'r': ndr, 'a': nda, 't': ndt}
+    tags = ['Rd_r', 'Rd_a', 'Rd_ra', 'Rd_t', 'Rd_rt', 'Rd_at', 'Rd_rat',
+            'Td_r', 'Td_a', 'Td_ra', 'Td_t', 'Td_rt', 'Td_at', 'Td_rat',
+            'A_z', 'A_rz', 'A_t', 'A_zt', 'A_rzt']
+
+    out = io.StringIO()
+    out.write(V2_HEADER % {'name': path, 'photons': 1000000, 'dz': dz, 'dr': dr, 'dt': dt,
+                           'ndz': ndz, 'ndr': ndr, 'ndt': ndt, 'nda': nda, 'media': media,
+                           'layers': layers, 'scored': ' \t'.join(tags) + ' \t'})
+    out.write('RAT #Reflectance, absorption, transmittance.\n')
+    out.write('# Average \tStandard Err \tRel Err\n')
+    out.write('0.0272         \t\t\t\t#Rsp: Specular reflectance.\n')
+    for value, comment in ((0, 'Rb: Ballistic reflectance.'), (0.4, 'Rd: Diffuse reflectance.'),
+                           (0.5, 'A:  Absorbed fraction.'), (0, 'Tb: Ballistic transmittance.'),
+                           (0.0728, 'Td: Diffuse transmittance.')):
+        out.write('%-15g\t%-15g  %.2f%%\t#%s\n' % (value, value / 1000, 0.1, comment))
+    out.write('\n')
+    for tag in tags:
+        axes = tag.split('_')[1]
+        _section(out, tag, _values(rng, int(np.prod([sizes[a] for a in axes]))),
+                 ' #%s[0], [1],..' % tag.split('_')[0])
+    return _save(path, out)
+
+
+def write_mcsub(path, ndz=100, ndr=100, dz=0.005, dr=0.025, seed=0):
+    """
+    Write an MCSub output file (mcOUT).
+
+    Args:
+        path (str): Name of the file to create.
+        ndz, ndr (int): Number of depth and radial bins.
+        dz, dr (float): Bin sizes in cm.
+        seed (int): Seed for the random values.
+
+    Returns:
+        Size of the file in bytes.
+    """
+    rng = np.random.default_rng(seed)
+    header = ((1, 'mua, absorption coefficient [1/cm]'), (100, 'mus, scattering coefficient [1/cm]'),
+              (0.9, 'g, anisotropy [-]'), (1.4, 'n1, refractive index of tissue'),
+              (1.0, 'n2, refractive index of outside medium'), (0, 'mcflag'),
+              (0.2, 'radius, radius of flat beam or 1/e radius of Gaussian beam [cm]'),
+              (0.001, 'waist, 1/e waist of focus [cm]'),
+              (0, 'xs, x position of isotropic source [cm]'), (0, 'ys, y'), (0, 'zs, z'),
+              (ndr, 'NR'), (ndz, 'NZ'), (dr, 'dr'), (dz, 'dz'), (1e6, 'Nphotons'),
+              (0.0278, 'Specular reflectance'), (0.5, 'Absorbed fraction'),
+              (0.4722, 'Escaping fraction'))
+    out = io.StringIO()
+    for value, comment in header:
+        out.write('%g\t%s\n' % (value, comment))
+    r = (np.arange(ndr) + 0.5) * dr
+    np.savetxt(out, np.concatenate(([0], r))[None, :], fmt='%.5f', delimiter='\t')
+    np.savetxt(out, np.concatenate(([0], _values(rng, ndr)))[None, :], fmt='%.12e', delimiter='\t')
+    z = (np.arange(ndz) + 0.5) * dz
+    np.savetxt(out, np.column_stack((z, _values(rng, (ndz, ndr)))), fmt='%.6e', delimiter='\t ')
+    return _save(path, out)
+
+
+def _save(path, out):
+    """Write the buffer to path and return the number of bytes."""
+    data = out.getvalue().encode('utf-8')
+    with open(path, 'wb') as file:
+        file.write(data)
+    return len(data)
+
+
+def main():
+    """Write one synthetic file described by the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('path')
+    parser.add_argument('--version', choices=('1', '2', 'mcsub'), default='1')
+    for name, default in (('ndz', 100), ('ndr', 100), ('nda', 10), ('ndt', 10), ('layers', 3)):
+        parser.add_argument('--' + name, type=int, default=default)
+    args = parser.parse_args()
+    if args.version == '1':
+        size = write_v1(args.path, args.ndz, args.ndr, args.nda, args.layers)
+    elif args.version == '2':
+        size = write_v2(args.path, args.ndz, args.ndr, args.nda, args.ndt, args.layers)
+    else:
+        size = write_mcsub(args.path, args.ndz, args.ndr)
+    print('wrote %s (%.1f MB)' % (args.path, size / 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,3 +12,16 @@ from .mcml import *
 from .mcmlv1 import *
 from .mcmlv2 import *
 from .mcsub import *
+from .cache import *
+from .batch import *
+from .simulate import *
+from .lut import *
+from .invert import *
+from .archive import *
+from .loader import *
+from .derived import *
+from .resample import *
+from .convolve import *
+from .hankel import *
+from .pyramid import *
+from .render import *
@@ -0,0 +1,357 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-locals
+# pylint: disable=consider-using-f-string
+"""
+Store many MCML runs in one append-only file.
+
+The arrays of each run are written one after another, every array starting
+on a 64 byte boundary, so that any run is read by memory mapping just its own
+arrays.  At the end of the file a table holds one column per parameter or
+summary value (`mu_a`, `mu_s`, `g`, `d`, `Rd`, `Tt`, `absorbed`, `photons`,
+...) with a row per run, followed by a small JSON index and a fixed size
+footer.  Appending writes the new runs and a new table after the old ones,
+so data already in the file is never modified.  If a write is interrupted
+the file is read from the last complete footer, so every run committed
+before it can still be read, and the next append overwrites the remains.
+
+Example::
+
+    with mcmlpy.Archive('sweep.mcar', 'a') as archive:
+        archive.append_files(glob.glob('sweep/*.mco'))
+
+    archive = mcmlpy.Archive('sweep.mcar')
+    thin = np.flatnonzero(archive.table['d'][:, 0] < 1)
+    mcml = archive[thin[0]]          # an MCMLV2 whose arrays are memory mapped
+    i = archive.find(mu_a=0.1, mu_s=10)
+"""
+
+import os
+import json
+import mmap
+import struct
+import numpy as np
+
+from mcmlpy.mcmlv2 import MCMLV2
+from mcmlpy.batch import reader_for
+from mcmlpy.cache import get_cache
+
+__all__ = ['Archive']
+
+MAGIC = b'MCMLARC1'
+FOOTER = struct.Struct('<8sQQ')
+ALIGN = 64
+
+SCALARS = ('photons', 'dz', 'dr', 'ndz', 'ndr', 'nda', 'dt', 'ndt', 'num_layers',
+           'n_above', 'n_below', 'Rsp', 'Ru', 'Rd', 'Tu', 'Td', 'Tt', 'absorbed')
+LAYERS = ('n', 'mu_a', 'mu_s', 'g', 'd')
+INTEGERS = ('photons', 'ndz', 'ndr', 'nda', 'ndt', 'num_layers')
+
+
+def _sample_layers(mcml):
+    """Return n_above, n_below and the properties of the layers between them."""
+    layers = [np.atleast_1d(np.array(getattr(mcml, a), dtype=float)) for a in LAYERS]
+    n_above, n_below = float(mcml.n_above), float(mcml.n_below)
+    d = layers[-1]
+    if len(d) > 2 and np.isinf(d[0]) and np.isinf(d[-1]):
+        n_above, n_below = float(layers[0][0]), float(layers[0][-1])
+        layers = [a[1:-1] for a in layers]
+    return n_above, n_below, layers
+
+
+def _aligned(position):
+    return -position % ALIGN
+
+
+class Archive:
+    """
+    Many MCML runs in one file with a table of their parameters.
+
+    Attributes:
+        path (str): The archive file.
+        mode (str): 'r' to read, 'a' to append (creating the file if needed)
+            or 'w' to start a new file.
+        table (dict): One array per column with a row for each run written
+            by `flush()`; layer properties have shape (runs, layers) padded with nan.
+    """
+    def __init__(self, path, mode='r'):
+        if mode not in ('r', 'a', 'w'):
+            raise ValueError("mode must be 'r', 'a' or 'w'")
+        self.path = os.fspath(path)
+        self.mode = mode
+        self.table = {}
+        self._layouts = []
+        self._map = None
+        self._new = []
+        self._file = None
+        self._end = 0
+
+        if mode == 'w' or (mode == 'a' and not os.path.exists(self.path)):
+            with open(self.path, 'wb') as file:
+                file.write(MAGIC + bytes(ALIGN - len(MAGIC)))
+            self._write_index()
+        self._read_index()
+        if mode != 'r':
+            self._file = open(self.path, 'r+b')   # pylint: disable=consider-using-with
+            self._file.truncate(self._end)   # drop what an interrupted append left
+            self._file.seek(0, os.SEEK_END)
+
+    def _find_footer(self, file, size):
+        """
+        Return (start, length, end) of the last complete index in the file.
+
+        A footer is only written after the runs and the index it describes,
+        so when a write was interrupted the end of the file holds part of a
+        run or an index.  The file is then searched backwards for the last
+        footer that follows its own index; everything after it is ignored.
+        """
+        file.seek(size - FOOTER.size)
+        magic, start, length = FOOTER.unpack(file.read(FOOTER.size))
+        if magic == MAGIC and start + length == size - FOOTER.size:
+            return start, length, size
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            position = data.rfind(MAGIC, len(MAGIC), size - FOOTER.size)
+            while position > 0:
+                _, start, length = FOOTER.unpack(data[position:position + FOOTER.size])
+                if start + length == position:
+                    try:
+                        json.loads(data[start:position].decode('utf-8'))
+                        return start, length, position + FOOTER.size
+                    except ValueError:
+                        pass
+                position = data.rfind(MAGIC, len(MAGIC), position)
+        raise ValueError('%s has no index (incomplete write?)' % self.path)
+
+    def _read_index(self):
+        """Read the footer, index and columns at the end of the file."""
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError('%s is not an MCML archive' % self.path)
+            start, length, self._end = self._find_footer(file, size)
+            file.seek(start)
+            index = json.loads(file.read(length).decode('utf-8'))
+
+        self._map = np.memmap(self.path, dtype=np.uint8, mode='r') if size else None
+        self._layouts = [[tuple(entry) for entry in layout] for layout in index['layouts']]
+        self.table = {}
+        for name, (offset, dtype, shape) in index['columns'].items():
+            count = int(np.prod(shape))
+            self.table[name] = np.frombuffer(self._map, dtype=dtype, count=count,
+                                             offset=offset).reshape(shape)
+
+    def __len__(self):
+        return len(self.table.get('photons', ())) + len(self._new)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, mcml):
+        """
+        Add one run to the end of the archive.
+
+        Args:
+            mcml (MCML): Results read from a V1 or V2 file or simulated.
+
+        Returns:
+            Index of the run in the archive.
+        """
+        if self._file is None:
+            raise ValueError('the archive was opened for reading')
+
+        layout = []
+        position = self._file.tell()
+        position += _aligned(position)
+        self._file.seek(position)
+        start = position
+        for name in MCMLV2.tallies:
+            value = getattr(mcml, name, None)
+            if value is None or np.ndim(value) == 0 or np.size(value) == 0:
+                continue
+            value = np.ascontiguousarray(value, dtype=float)
+            pad = _aligned(position)
+            self._file.write(bytes(pad))
+            position += pad
+            layout.append((name, position - start, list(value.shape)))
+            self._file.write(value.tobytes())
+            position += value.nbytes
+
+        try:
+            layout_index = self._layouts.index(layout)
+        except ValueError:
+            layout_index = len(self._layouts)
+            self._layouts.append(layout)
+
+        n_above, n_below, layers = _sample_layers(mcml)
+        dt = getattr(mcml, 'dt', 0)
+        row = {'_offset': start, '_layout': layout_index,
+               'n_above': n_above, 'n_below': n_below, 'num_layers': len(layers[0]),
+               'dt': float(dt) if np.size(dt) == 1 else 0.0, 'ndt': getattr(mcml, 'ndt', 1),
+               'Ru': float(mcml.ballistic_reflectance())}
+        for name in SCALARS:
+            if name not in row:
+                row[name] = float(getattr(mcml, name))
+        row.update(zip(LAYERS, layers))
+        self._new.append(row)
+        return len(self) - 1
+
+    def append_files(self, paths, cache=None):
+        """
+        Read .mco files one at a time and add them to the archive.
+
+        Args:
+            paths (iterable): Names of V1 or V2 .mco files.
+            cache (Cache or bool): On-disk cache used when reading the files.
+
+        Returns:
+            List of the indices of the new runs.
+        """
+        indices = []
+        for path in paths:
+            mcml = reader_for(path)
+            if cache:
+                get_cache(cache).load(mcml, path)
+            else:
+                mcml.read_file(path)
+            indices.append(self.append(mcml))
+        return indices
+
+    def _columns(self):
+        """Return the table including the runs appended since it was written."""
+        old = len(self.table.get('photons', ()))
+        N = old + len(self._new)
+        width = max([self.table['d'].shape[1] if old else 0] +
+                    [len(row['d']) for row in self._new] + [1])
+        columns = {}
+        for name in SCALARS + ('_offset', '_layout'):
+            dtype = np.int64 if name in INTEGERS + ('_offset', '_layout') else float
+            column = np.empty(N, dtype=dtype)
+            if old:
+                column[:old] = self.table[name]
+            column[old:] = [row[name] for row in self._new]
+            columns[name] = column
+        for name in LAYERS:
+            column = np.full((N, width), np.nan)
+            if old:
+                column[:old, :self.table[name].shape[1]] = self.table[name]
+            for i, row in enumerate(self._new):
+                column[old + i, :len(row[name])] = row[name]
+            columns[name] = column
+        return columns
+
+    def _write_index(self, columns=None):
+        """Write the columns, index and footer at the end of the file."""
+        columns = columns or {}
+        with open(self.path, 'r+b') as file:
+            file.seek(0, os.SEEK_END)
+            position = file.tell()
+            meta = {'version': 1, 'columns': {}, 'layouts': self._layouts}
+            for name, column in columns.items():
+                pad = _aligned(position)
+                file.write(bytes(pad))
+                position += pad
+                meta['columns'][name] = [position, column.dtype.str, list(column.shape)]
+                file.write(column.tobytes())
+                position += column.nbytes
+            text = json.dumps(meta).encode('utf-8')
+            file.write(text)
+            file.write(FOOTER.pack(MAGIC, position, len(text)))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def flush(self):
+        """Write the table and index so that the runs appended so far can be read."""
+        if self._file is None or not self._new:
+            return
+        self._file.flush()
+        columns = self._columns()
+        self._write_index(columns)
+        self._new = []
+        self._file.seek(0, os.SEEK_END)
+        self._read_index()
+
+    def close(self):
+        """Write the index of any new runs and close the file."""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __getitem__(self, i):
+        """
+        Return run i as an MCMLV2 object whose arrays are memory mapped.
+
+        Runs appended since the last `flush()` are read using the index held
+        in memory, so reading them does not rewrite the table.
+
+        Args:
+            i (int): Index of the run.
+        """
+        old = len(self.table.get('photons', ()))
+        N = len(self)
+        if i < 0:
+            i += N
+        if not 0 <= i < N:
+            raise IndexError('run %d is not in the archive (%d runs)' % (i, N))
+        if i < old:
+            row = {name: column[i] for name, column in self.table.items()}
+        else:
+            row = self._new[i - old]
+            self._file.flush()
+            if self._map is None or len(self._map) < self._file.tell():
+                self._map = np.memmap(self.path, dtype=np.uint8, mode='r')
+
+        mcml = MCMLV2()
+        for name in SCALARS:
+            value = row[name]
+            setattr(mcml, name, int(value) if name in INTEGERS else float(value))
+        layers = int(row['num_layers'])
+        names = ['above'] + ['layer_%d' % (j + 1) for j in range(layers)] + ['below']
+        mcml.layer_name = names
+        mcml.num_layers = layers + 2
+        ambient = {'n': (mcml.n_above, mcml.n_below), 'd': (np.inf, np.inf)}
+        for name in LAYERS:
+            above, below = ambient.get(name, (0, 0))
+            setattr(mcml, name, np.concatenate(([above], row[name][:layers], [below])))
+        mcml.Rt = mcml.Ru + mcml.Rd
+
+        mcml.r = np.linspace(0, mcml.ndr - 2, int(mcml.ndr - 1)) * mcml.dr
+        mcml.z = np.linspace(0, mcml.ndz - 1, int(mcml.ndz)) * mcml.dz
+        mcml.t = np.linspace(0, mcml.ndt - 2, int(max(mcml.ndt - 1, 0))) * mcml.dt
+
+        start = int(row['_offset'])
+        for name, offset, shape in self._layouts[int(row['_layout'])]:
+            count = int(np.prod(shape))
+            value = np.frombuffer(self._map, dtype=float, count=count, offset=start + offset)
+            setattr(mcml, name, value.reshape(shape))
+        return mcml
+
+    def find(self, layer=0, rtol=1e-9, **values):
+        """
+        Return the indices of the runs whose parameters match.
+
+        Args:
+            layer (int): Layer compared for n, mu_a, mu_s, g and d (0 is the
+                first layer of the sample, not the medium above it).
+            rtol (float): Relative tolerance of the comparison.
+            **values: Column names and values, e.g., mu_a=0.1, Rd=0.3.
+
+        Returns:
+            numpy.ndarray of indices.
+        """
+        mask = np.ones(len(self.table.get('photons', ())), dtype=bool)
+        for name, value in values.items():
+            if name not in self.table:
+                raise KeyError('no column %s' % name)
+            column = self.table[name]
+            if column.ndim == 2:
+                column = column[:, layer]
+            mask &= np.isclose(column, value, rtol=rtol, atol=0)
+        return np.flatnonzero(mask)
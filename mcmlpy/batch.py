@@ -0,0 +1,258 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+# pylint: disable=broad-exception-caught
+"""
+Load many MCML output files in parallel and stack the results.
+
+Example::
+
+    batch = mcmlpy.load_many(glob.glob('sweep/*.mco'), workers=8)
+    print(batch['Rd'].shape, batch['Rdr'].shape)
+    print(batch.params['mu_a'])
+    for failure in batch.failures:
+        print(failure.path, failure.error)
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from mcmlpy.mcml import merge
+from mcmlpy.mcmlv1 import MCMLV1
+from mcmlpy.mcmlv2 import MCMLV2
+from mcmlpy.cache import get_cache
+from mcmlpy.derived import (Derived, DerivedCache, sample_layers, mu_a_z, fluence,
+                            layer_absorption, ring_areas, solid_angles)
+
+__all__ = ['load_many',
+           'merge_files',
+           'reader_for',
+           'Batch',
+           'LoadFailure'
+          ]
+
+SCALARS = ('photons', 'Rsp', 'Ru', 'Rd', 'Rt', 'absorbed', 'Tu', 'Td', 'Tt')
+ARRAYS = ('Az', 'Rdr', 'Rda', 'Ttr', 'Tta', 'Tdr', 'Tda', 'Arz', 'Rdra', 'Ttra', 'Tdra')
+PARAMETERS = ('n', 'mu_a', 'mu_s', 'g', 'd')
+
+LoadFailure = namedtuple('LoadFailure', ['path', 'error', 'message'])
+LoadFailure.__doc__ = """
+A file that could not be loaded or did not match the rest of the batch.
+
+Attributes:
+    path (str): The file name.
+    error (str): Name of the exception, e.g., 'FileNotFoundError'.
+    message (str): The exception message.
+"""
+
+
+def reader_for(path):
+    """
+    Return an empty object of the class that reads a V1 or V2 .mco file.
+
+    Only the start of the file is read.  Use this to read the file with
+    options such as `read_file(path, lazy=True)` or through a `Cache`.
+
+    Args:
+        path (str): Name of the file.
+
+    Returns:
+        A new MCMLV1 or MCMLV2 object.
+
+    Raises:
+        ValueError: The file is not a V1 or V2 .mco file.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        for cls in (MCMLV2, MCMLV1):
+            obj = cls()
+            if obj.verify_magic(file):
+                return obj
+    raise ValueError('unknown file format')
+
+
+def _load_one(args):
+    """Read one file in a worker and return only the requested fields."""
+    path, fields, cache = args
+    try:
+        obj = reader_for(path)
+        if cache:
+            get_cache(cache).load(obj, path, lazy=True)
+        else:
+            obj.read_file(path, lazy=True)
+        values = {}
+        for name in fields:
+            value = getattr(obj, name, None)
+            if value is not None and np.size(value) > 0:
+                values[name] = np.asarray(value, dtype=float)
+        params = {name: np.asarray(getattr(obj, name), dtype=float) for name in PARAMETERS}
+        geometry = (int(obj.ndz), int(obj.ndr), int(obj.nda), float(obj.dz), float(obj.dr))
+        return path, values, params, geometry, None
+    except Exception as e:
+        return path, None, None, None, LoadFailure(path, type(e).__name__, str(e))
+
+
+class Batch(DerivedCache):
+    """
+    Stacked results of many MCML runs with the same geometry.
+
+    Attributes:
+        paths (list): Files that were loaded, in the order of the first axis.
+        data (dict): Stacked arrays, e.g., data['Rd'][N] or data['Arz'][N, ndz, ndr].
+        params (numpy.ndarray): Structured array with fields n, mu_a, mu_s, g and d,
+            each of shape (N, num_layers).
+        failures (list): A `LoadFailure` for every file not included.
+        geometry (tuple): (ndz, ndr, nda, dz, dr) shared by every run.
+
+    The derived quantities `mu_a_z`, `fluence`, `layer_absorption`,
+    `ring_areas` and `solid_angles` are computed for every run at once on
+    first use (see `mcmlpy.derived`).
+    """
+    def __init__(self):
+        self.paths = []
+        self.data = {}
+        self.params = np.zeros(0)
+        self.failures = []
+        self.geometry = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+    def __str__(self):
+        s = '%d runs loaded, %d failed\n' % (len(self.paths), len(self.failures))
+        for name, value in self.data.items():
+            s += '    %-8s %s\n' % (name, value.shape)
+        return s
+
+    def _mu_a_z(self):
+        """Absorption coefficient at the centre of each depth bin, shape (N, ndz)."""
+        mu_a, d = sample_layers(self.params['mu_a'], self.params['d'])
+        return mu_a_z(mu_a, d, self.geometry[3], self.geometry[0])
+
+    def _fluence(self):
+        """Fluence rate Arz / mu_a(z) of every run, shape (N, ndz, ndr)."""
+        return fluence(self.data['Arz'], self.mu_a_z)
+
+    def _layer_absorption(self):
+        """Fraction absorbed in each layer of the sample (from Az or Arz), shape (N, layers)."""
+        Az = self.data.get('Az')
+        if Az is None:
+            Az = self.data['Arz'][..., :len(self.ring_areas)] @ self.ring_areas
+        _, d = sample_layers(self.params['mu_a'], self.params['d'])
+        return layer_absorption(Az, d, self.geometry[3])
+
+    def _ring_areas(self):
+        """Area of each radial bin of Rdr and Ttr."""
+        return ring_areas(self.geometry[4], self.geometry[1] - 1)
+
+    def _solid_angles(self):
+        """Solid angle of each exit angle bin of Rda and Tta."""
+        return solid_angles(self.geometry[2])
+
+    mu_a_z = Derived(_mu_a_z, ('params', 'geometry'))
+    fluence = Derived(_fluence, ('data', 'mu_a_z'))
+    layer_absorption = Derived(_layer_absorption, ('data', 'params', 'geometry', 'ring_areas'))
+    ring_areas = Derived(_ring_areas, ('geometry',))
+    solid_angles = Derived(_solid_angles, ('geometry',))
+
+
+def load_many(paths, workers=None, fields=SCALARS + ARRAYS, cache=None, chunksize=8):
+    """
+    Load many .mco files with a pool of processes and stack the results.
+
+    Files are read lazily so that only the sections holding the requested
+    fields are parsed.  The first file loaded sets the geometry and the shape
+    of every field; files that differ are reported in `failures` instead of
+    being stacked.
+
+    Args:
+        paths (list): Names of V1 or V2 .mco files.
+        workers (int): Number of processes (1 loads in this process).
+        fields (tuple): Names of the attributes to stack.
+        cache (Cache or bool): On-disk cache used by the workers.
+        chunksize (int): Number of files sent to a worker at a time.
+
+    Returns:
+        `Batch` with the stacked arrays, parameter table and failures.
+    """
+    paths = [os.fspath(p) for p in paths]
+    jobs = [(path, tuple(fields), cache) for path in paths]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    batch = Batch()
+    if workers == 1 or len(paths) < 2:
+        _stack(map(_load_one, jobs), len(paths), batch)
+        return batch
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        _stack(pool.map(_load_one, jobs, chunksize=chunksize), len(paths), batch)
+    return batch
+
+
+def _stack(results, N, batch):
+    """Copy each result into preallocated arrays as it arrives."""
+    count = 0
+    shapes = {}
+    layer_shape = None
+    for path, values, params, geometry, failure in results:
+        if failure is None and batch.geometry is None:
+            batch.geometry = geometry
+            shapes = {name: np.shape(v) for name, v in values.items()}
+            batch.data = {name: np.empty((N,) + s) for name, s in shapes.items()}
+            dtype = [(name, float, np.shape(v)) for name, v in params.items()]
+            batch.params = np.zeros(N, dtype=dtype)
+            layer_shape = np.shape(params['mu_a'])
+
+        if failure is None and geometry != batch.geometry:
+            failure = LoadFailure(path, 'ValueError', 'geometry %s does not match %s' %
+                                  (geometry, batch.geometry))
+        if failure is None and np.shape(params['mu_a']) != layer_shape:
+            failure = LoadFailure(path, 'ValueError', 'number of layers does not match')
+        if failure is None:
+            different = [name for name in shapes if np.shape(values.get(name)) != shapes[name]]
+            if different:
+                failure = LoadFailure(path, 'ValueError', '%s missing or of different shape' %
+                                      ', '.join(different))
+        if failure is not None:
+            batch.failures.append(failure)
+            continue
+
+        for name in shapes:
+            batch.data[name][count] = values[name]
+        for name, value in params.items():
+            batch.params[name][count] = value
+        batch.paths.append(path)
+        count += 1
+
+    batch.data = {name: value[:count] for name, value in batch.data.items()}
+    batch.params = batch.params[:count]
+
+
+def merge_files(paths, cache=None):
+    """
+    Combine .mco files of the same geometry weighted by their number of photons.
+
+    The files are read lazily one at a time and only the running sums are
+    kept in memory.
+
+    Args:
+        paths (iterable): Names of V1 or V2 .mco files from runs of the same job.
+        cache (Cache or bool): On-disk cache used when reading the files.
+
+    Returns:
+        MCMLV1 or MCMLV2 object with the combined results.
+    """
+    def runs():
+        for path in paths:
+            obj = reader_for(path)
+            if cache:
+                get_cache(cache).load(obj, path, lazy=True)
+            else:
+                obj.read_file(path, lazy=True)
+            yield obj
+
+    return merge(runs())
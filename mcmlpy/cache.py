@@ -0,0 +1,235 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Persistent on-disk cache of parsed MCML output files.
+
+Each cached file is a directory holding one `.npy` file for every array and
+a `meta.json` file with the scalars and the size, modification time (and
+optionally the SHA-1 hash) of the source file.  Arrays are memory mapped when
+an entry is restored, so a warm load does not parse or even read the arrays.
+An entry is written to a temporary directory and renamed into place, and an
+entry with a missing or damaged file is treated as absent.
+
+Example::
+
+    cache = mcmlpy.Cache(max_bytes=2**30)
+    mcml = mcmlpy.MCMLV2()
+    mcml.init_from_file('sample.mco', cache=cache)
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+from mcmlpy.mcml import Section
+
+__all__ = ['Cache',
+           'default_cache_dir'
+          ]
+
+CACHE_VERSION = 2
+
+
+def default_cache_dir():
+    """Return $MCMLPY_CACHE or ~/.cache/mcmlpy."""
+    default = os.path.join(os.path.expanduser('~'), '.cache', 'mcmlpy')
+    return os.environ.get('MCMLPY_CACHE', default)
+
+
+def _file_hash(fname):
+    """Return the SHA-1 hash of the contents of a file."""
+    sha = hashlib.sha1()
+    with open(fname, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _to_json(value):
+    """Convert numpy scalars (and arrays inside lists or dicts) for json."""
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+
+class Cache:
+    """
+    A size-bounded cache of parsed MCML objects.
+
+    Attributes:
+        directory (str): Where the cache entries are stored.
+        max_bytes (int): Least recently used entries are removed above this size.
+        check (str): 'stat' compares size and mtime of the source; 'hash' also
+            compares the SHA-1 hash of its contents.
+    """
+    def __init__(self, directory=None, max_bytes=1 << 30, check='stat'):
+        if check not in ('stat', 'hash'):
+            raise ValueError("check must be 'stat' or 'hash'")
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.check = check
+
+    def entry(self, obj, fname):
+        """Return the directory used for fname read by an object of this class."""
+        key = '%s:%s' % (type(obj).__name__, os.path.abspath(fname))
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def source_info(self, fname):
+        """Return the properties of fname that must match for an entry to be valid."""
+        info = os.stat(fname)
+        source = {'path': os.path.abspath(fname),
+                  'size': info.st_size,
+                  'mtime_ns': info.st_mtime_ns}
+        if self.check == 'hash':
+            source['sha1'] = _file_hash(fname)
+        return source
+
+    def restore(self, obj, fname):
+        """
+        Set the attributes of obj from the cache entry for fname.
+
+        Args:
+            obj (MCML): Object to fill, e.g., MCMLV2().
+            fname (str): The name of the output file.
+
+        Returns:
+            True if a valid entry was found.
+        """
+        entry = self.entry(obj, fname)
+        try:
+            with open(os.path.join(entry, 'meta.json'), encoding='utf-8') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        if meta.get('version') != CACHE_VERSION or meta.get('source') != self.source_info(fname):
+            return False
+
+        # an entry evicted or replaced by another process is a miss
+        try:
+            arrays = {name: np.load(os.path.join(entry, name + '.npy'), mmap_mode='c')
+                      for name in meta['arrays']}
+            os.utime(os.path.join(entry, 'meta.json'))   # mark as recently used
+        except (OSError, ValueError):
+            return False
+
+        for name, value in meta['scalars'].items():
+            setattr(obj, name, value)
+        obj.sections = {tag: Section(*s) for tag, s in meta['sections'].items()}
+        for name, value in arrays.items():
+            setattr(obj, name, value)
+        return True
+
+    def store(self, obj, fname):
+        """
+        Save the parsed contents of obj as the cache entry for fname.
+
+        Sections that have not yet been loaded lazily are read first.
+
+        Args:
+            obj (MCML): Object that was initialized from fname.
+            fname (str): The name of the output file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        entry = self.entry(obj, fname)
+        meta = {'version': CACHE_VERSION,
+                'source': self.source_info(fname),
+                'class': type(obj).__name__,
+                'scalars': {},
+                'sections': {tag: list(s) for tag, s in obj.sections.items()},
+                'arrays': []}
+
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+        old = tmp + '-old'
+        try:
+            for name in list(vars(obj)):
+                if name.startswith('_') or name == 'sections':
+                    continue
+                value = getattr(obj, name)
+                if isinstance(value, np.ndarray) and value.ndim > 0 and value.dtype != object:
+                    np.save(os.path.join(tmp, name + '.npy'), value)
+                    meta['arrays'].append(name)
+                else:
+                    meta['scalars'][name] = _to_json(value)
+            with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as file:
+                json.dump(meta, file)
+            # renaming a directory is atomic and fails if the entry exists, so
+            # a stale entry is moved aside first; if another process stores
+            # the same entry in between, its copy is kept and this one dropped
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                try:
+                    os.rename(entry, old)
+                    os.rename(tmp, entry)
+                except OSError:
+                    pass
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+            shutil.rmtree(old, ignore_errors=True)
+
+        self.evict(keep=entry)
+
+    def load(self, obj, fname, lazy=False):
+        """
+        Restore obj from the cache or read fname and add it to the cache.
+
+        Args:
+            obj (MCML): Object to fill, e.g., MCMLV2().
+            fname (str): The name of the output file.
+            lazy (bool): Passed to `read_file()` when the file must be parsed.
+        """
+        if not self.restore(obj, fname):
+            obj.read_file(fname, lazy=lazy)
+            self.store(obj, fname)
+
+    def entries(self):
+        """Return a list of (last used time, size in bytes, directory) for every entry."""
+        result = []
+        if not os.path.isdir(self.directory):
+            return result
+        for name in os.listdir(self.directory):
+            if name.startswith('.'):
+                continue            # being written or replaced
+            entry = os.path.join(self.directory, name)
+            meta = os.path.join(entry, 'meta.json')
+            if not os.path.isfile(meta):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry) if f.is_file())
+            result.append((os.stat(meta).st_mtime, size, entry))
+        return result
+
+    def size(self):
+        """Return the total size of the cache in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Remove every entry in the cache."""
+        for _, _, entry in self.entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def get_cache(cache):
+    """Return a Cache for the `cache` argument of init_from_file()."""
+    if cache is True:
+        return Cache()
+    return cache
@@ -0,0 +1,229 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Quantities derived from MCML results.
+
+The functions work on a single run or on stacked runs: any leading axes of
+the arguments are treated as batch axes, so the fluence of a whole `Batch`
+is found in one call.  `MCML` and `Batch` expose them as cached attributes
+that are computed on first use and forgotten when an attribute they
+depend on is assigned::
+
+    mcml = mcmlpy.load('sample.mco')
+    F = mcml.fluence                   # Arz / mu_a(z), W/mm²
+    A = mcml.layer_absorption          # fraction absorbed in each layer
+    Rd = np.sum(mcml.Rdr * mcml.ring_areas)
+
+    batch = mcmlpy.load_many(paths)
+    F = batch.fluence                  # shape (runs, ndz, ndr)
+"""
+
+import numpy as np
+
+__all__ = ['sample_layers',
+           'layer_index',
+           'mu_a_z',
+           'fluence',
+           'layer_absorption',
+           'ring_areas',
+           'solid_angles',
+           'Derived',
+           'DerivedCache'
+          ]
+
+
+def sample_layers(mu_a, d):
+    """
+    Return the absorption and thickness of the layers of the sample only.
+
+    V2 files include the media above and below as layers of infinite
+    thickness; these are removed.  When fewer thicknesses than layers are
+    given (mcsub describes a semi-infinite medium) the missing ones are
+    infinite.
+
+    Args:
+        mu_a (array_like): Absorption coefficients, shape (..., layers).
+        d (array_like): Thicknesses, shape (..., layers) or fewer layers.
+
+    Returns:
+        mu_a, d as arrays of shape (..., sample layers).
+    """
+    mu_a = np.atleast_1d(np.asarray(mu_a, dtype=float))
+    d = np.atleast_1d(np.asarray(d, dtype=float))
+    if d.shape[-1] < mu_a.shape[-1]:
+        missing = np.full(mu_a.shape[:-1] + (mu_a.shape[-1] - d.shape[-1],), np.inf)
+        d = np.concatenate((np.broadcast_to(d, mu_a.shape[:-1] + d.shape[-1:]), missing), axis=-1)
+    if d.shape[-1] > 2 and np.all(np.isinf(d[..., 0])) and np.all(np.isinf(d[..., -1])):
+        mu_a, d = mu_a[..., 1:-1], d[..., 1:-1]
+    return mu_a, d
+
+
+def layer_index(d, dz, nz):
+    """
+    Return the layer holding the centre of each depth bin.
+
+    Args:
+        d (array_like): Thickness of each layer of the sample, shape (..., layers).
+        dz (float): Size of the depth bins.
+        nz (int): Number of depth bins.
+
+    Returns:
+        numpy.ndarray of integer layer indices, shape (..., nz).
+    """
+    d = np.asarray(d, dtype=float)
+    edges = np.cumsum(d, axis=-1)
+    centres = (np.arange(nz) + 0.5) * dz
+    index = np.sum(edges[..., None, :] <= centres[:, None], axis=-1)
+    return np.minimum(index, d.shape[-1] - 1)
+
+
+def mu_a_z(mu_a, d, dz, nz):
+    """
+    Return the absorption coefficient at the centre of each depth bin.
+
+    Args:
+        mu_a (array_like): Absorption of the sample layers, shape (..., layers).
+        d (array_like): Thickness of the sample layers, shape (..., layers).
+        dz (float): Size of the depth bins.
+        nz (int): Number of depth bins.
+
+    Returns:
+        numpy.ndarray of shape (..., nz).
+    """
+    mu_a = np.asarray(mu_a, dtype=float)
+    index = layer_index(d, dz, nz)
+    shape = np.broadcast_shapes(mu_a.shape[:-1], index.shape[:-1])
+    mu_a = np.broadcast_to(mu_a, shape + mu_a.shape[-1:])
+    return np.take_along_axis(mu_a, np.broadcast_to(index, shape + index.shape[-1:]), axis=-1)
+
+
+def fluence(Arz, mu_a_of_z):
+    """
+    Return the fluence rate Arz / mu_a(z).
+
+    Bins in layers that do not absorb have no defined fluence and are nan.
+
+    Args:
+        Arz (array_like): Absorbed power density, shape (..., nz, nr).
+        mu_a_of_z (array_like): Absorption of each depth bin, shape (..., nz).
+
+    Returns:
+        numpy.ndarray of shape (..., nz, nr).
+    """
+    Arz = np.asarray(Arz, dtype=float)
+    mu = np.asarray(mu_a_of_z, dtype=float)[..., :Arz.shape[-2], None]
+    out = np.full(np.broadcast_shapes(Arz.shape, mu.shape), np.nan)
+    return np.divide(Arz, mu, out=out, where=mu > 0)
+
+
+def layer_absorption(Az, d, dz):
+    """
+    Return the fraction of the light absorbed in each layer.
+
+    Args:
+        Az (array_like): Absorption per unit depth, shape (..., nz).
+        d (array_like): Thickness of the sample layers, shape (..., layers).
+        dz (float): Size of the depth bins.
+
+    Returns:
+        numpy.ndarray of shape (..., layers).
+    """
+    Az = np.asarray(Az, dtype=float)
+    index = layer_index(d, dz, Az.shape[-1])
+    layers = np.shape(d)[-1]
+    one_hot = index[..., None] == np.arange(layers)
+    return np.einsum('...z,...zl->...l', Az, one_hot) * dz
+
+
+def ring_areas(dr, nr):
+    """
+    Return the area of each radial bin, 2π (r + dr/2) dr.
+
+    Multiplying Rdr or Ttr by these and summing over the last axis gives the
+    total diffuse reflection or transmission.
+
+    Args:
+        dr (float): Size of the radial bins.
+        nr (int): Number of radial bins.
+
+    Returns:
+        numpy.ndarray of shape (nr,).
+    """
+    return 2 * np.pi * (np.arange(nr) + 0.5) * dr**2
+
+
+def solid_angles(nda):
+    """
+    Return the solid angle of each exit angle bin, 2π (cos θ_i - cos θ_i+1).
+
+    The nda bins divide 0 to π/2.  Multiplying Rda or Tta by these and
+    summing over the last axis gives the total reflection or transmission.
+
+    Args:
+        nda (int): Number of angle bins.
+
+    Returns:
+        numpy.ndarray of shape (nda,).
+    """
+    theta = np.linspace(0, np.pi / 2, nda + 1)
+    return 2 * np.pi * (np.cos(theta[:-1]) - np.cos(theta[1:]))
+
+
+class Derived:
+    """
+    Descriptor for a quantity computed from other attributes on first use.
+
+    The value is kept in the instance's `_derived` dictionary until one of
+    the attributes it depends on is assigned (including augmented assignment
+    such as `mcml.Arz /= 2`).  Changing an array in place does not clear it;
+    call `clear_derived()` after doing so.
+    """
+    def __init__(self, function, depends):
+        self.function = function
+        self.depends = tuple(depends)
+        self.name = None
+        self.__doc__ = function.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        dependents = dict(getattr(owner, '_dependents', {}))
+        for attribute in self.depends:
+            if name not in dependents.get(attribute, ()):
+                dependents[attribute] = dependents.get(attribute, ()) + (name,)
+        owner._dependents = dependents
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        cache = obj.__dict__.setdefault('_derived', {})
+        if self.name not in cache:
+            cache[self.name] = self.function(obj)
+        return cache[self.name]
+
+
+class DerivedCache:
+    """
+    Mixin that forgets derived values when the attributes they use are assigned.
+    """
+    _dependents = {}
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        cache = self.__dict__.get('_derived')
+        if cache:
+            stale = list(self._dependents.get(name, ()))
+            while stale:
+                key = stale.pop()
+                cache.pop(key, None)
+                stale.extend(self._dependents.get(key, ()))
+
+    def __copy__(self):
+        """Return a shallow copy that starts with no derived values of its own."""
+        other = type(self).__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        other.__dict__.pop('_derived', None)
+        return other
+
+    def clear_derived(self):
+        """Forget every cached derived value."""
+        self.__dict__.pop('_derived', None)
@@ -0,0 +1,151 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Spatial frequency domain reflectance and transmission.
+
+For a radially symmetric response the two dimensional Fourier transform is
+a Hankel transform, so the reflectance of a pattern of spatial frequency fx
+(as used in SFDI) is::
+
+    Rd(fx) = ∫ Rdr(r) J0(2π fx r) 2π r dr
+
+Rdr is constant over each radial bin, so the integral over a bin is exact::
+
+    ∫ J0(k r) 2π r dr = 2π r² J1(k r) / (k r)   between the bin edges
+
+The weights depend only on the grid and the frequencies; they are computed
+once and cached, and the transform of any number of stacked profiles is a
+single matrix product::
+
+    mcml = mcmlpy.load('sample.mco')
+    sfd = mcml.spatial_frequency(np.linspace(0, 0.5, 51))   # 1/mm
+    print(sfd.Rd[0], sfd.Td[-1])
+
+    batch = mcmlpy.load_many(paths)
+    Rd = mcmlpy.spatial_frequency(batch['Rdr'], dr, fx)     # (runs, len(fx))
+"""
+
+import functools
+from collections import namedtuple
+import numpy as np
+
+__all__ = ['spatial_frequency',
+           'hankel_matrix',
+           'j0',
+           'j1',
+           'SpatialFrequency'
+          ]
+
+SpatialFrequency = namedtuple('SpatialFrequency', ['fx', 'Rd', 'Td'])
+SpatialFrequency.__doc__ = """
+Diffuse reflection and transmission for sinusoidal illumination.
+
+Attributes:
+    fx (numpy.ndarray): Spatial frequencies (1/mm).
+    Rd (numpy.ndarray): Diffuse reflectance at each frequency.
+    Td (numpy.ndarray): Diffuse transmission at each frequency (empty when
+        the file has no radial transmission).
+"""
+
+# Abramowitz and Stegun 9.4.1-9.4.6, absolute error below 1e-7
+_J0_SMALL = (1.0, -2.2499997, 1.2656208, -0.3163866, 0.0444479, -0.0039444, 0.0002100)
+_F0 = (0.79788456, -0.00000077, -0.00552740, -0.00009512, 0.00137237, -0.00072805, 0.00014476)
+_THETA0 = (-0.78539816, -0.04166397, -0.00003954, 0.00262573, -0.00054125, -0.00029333,
+           0.00013558)
+_J1_SMALL = (0.5, -0.56249985, 0.21093573, -0.03954289, 0.00443319, -0.00031761, 0.00001109)
+_F1 = (0.79788456, 0.00000156, 0.01659667, 0.00017105, -0.00249511, 0.00113653, -0.00020033)
+_THETA1 = (-2.35619449, 0.12499612, 0.00005650, -0.00637879, 0.00074348, 0.00079824,
+           -0.00029166)
+
+
+def _polynomial(coefficients, x):
+    """Evaluate the polynomial with the given coefficients (lowest power first)."""
+    result = np.full_like(x, coefficients[-1])
+    for c in coefficients[-2::-1]:
+        result = result * x + c
+    return result
+
+
+def _bessel(x, small, f, theta):
+    """Return the series for |x| <= 3, the asymptotic form, the mask of |x| <= 3 and |x|."""
+    x = np.abs(np.asarray(x, dtype=float))
+    near = x <= 3
+    t = (np.where(near, x, 0) / 3)**2
+    u = 3 / np.where(near, 3, x)
+    far = _polynomial(f, u) * np.cos(x + _polynomial(theta, u)) / np.sqrt(np.where(near, 1, x))
+    return _polynomial(small, t), far, near, x
+
+
+def j0(x):
+    """
+    Bessel function of the first kind of order zero.
+
+    Args:
+        x (array_like): Arguments.
+
+    Returns:
+        numpy.ndarray of J0(x), accurate to about 1e-7.
+    """
+    near_value, far_value, near, _ = _bessel(x, _J0_SMALL, _F0, _THETA0)
+    return np.where(near, near_value, far_value)
+
+
+def _j1_over_x(x):
+    """Return J1(x)/x, which is 1/2 at x = 0."""
+    near_value, far_value, near, x = _bessel(x, _J1_SMALL, _F1, _THETA1)
+    return np.where(near, near_value, far_value / np.where(near, 1, x))
+
+
+def j1(x):
+    """
+    Bessel function of the first kind of order one.
+
+    Args:
+        x (array_like): Arguments.
+
+    Returns:
+        numpy.ndarray of J1(x), accurate to about 1e-7.
+    """
+    x = np.asarray(x, dtype=float)
+    return x * _j1_over_x(x)
+
+
+@functools.lru_cache(maxsize=32)
+def hankel_matrix(dr, nr, fx):
+    """
+    Return the cached matrix that maps radial profiles to spatial frequencies.
+
+    Args:
+        dr (float): Size of the radial bins (mm).
+        nr (int): Number of radial bins.
+        fx (tuple): Spatial frequencies (1/mm).
+
+    Returns:
+        Read-only numpy.ndarray H of shape (len(fx), nr) so that the transform
+        of a profile constant over each bin is H @ profile.
+    """
+    k = 2 * np.pi * np.asarray(fx, dtype=float)[:, None]
+    edges = np.arange(nr + 1) * dr
+    disk = 2 * np.pi * edges**2 * _j1_over_x(k * edges)
+    matrix = np.diff(disk, axis=1)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def spatial_frequency(values, dr, fx):
+    """
+    Hankel transform radial profiles such as Rdr, Ttr or Tdr.
+
+    Args:
+        values (array_like): Profiles for each radial bin, shape (..., nr);
+            any leading axes (e.g., stacked runs) are kept.
+        dr (float): Size of the radial bins (mm).
+        fx (array_like): Spatial frequencies (1/mm).
+
+    Returns:
+        numpy.ndarray of shape (..., len(fx)).  The value at fx = 0 is the
+        total, e.g., sum(Rdr * ring_areas).
+    """
+    values = np.asarray(values, dtype=float)
+    fx = tuple(float(f) for f in np.atleast_1d(fx))
+    return values @ hankel_matrix(float(dr), values.shape[-1], fx).T
@@ -0,0 +1,247 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-locals
+# pylint: disable=too-many-arguments
+# pylint: disable=consider-using-f-string
+"""
+Fit optical properties to measured radial reflectance.
+
+Many spectra are fitted at once: a Levenberg-Marquardt iteration is carried
+out on every spectrum simultaneously using array operations, with the
+forward model evaluated for the whole batch in each step.  The forward model
+can be the diffusion theory of Farrell, Patterson and Wilson (1992), a `LUT`
+or any function of a batch of parameters (e.g., for several layers).
+
+Example::
+
+    mcml = mcmlpy.MCMLV2()
+    mcml.init_from_file('sample.mco')
+    fit = mcmlpy.invert(mcml.Rdr, r=mcml.r + mcml.dr / 2, n=1.4)
+    print(fit.params, fit.rms, fit.seconds)
+"""
+
+import time
+from collections import namedtuple
+import numpy as np
+
+from mcmlpy.lut import LUT
+
+__all__ = ['invert',
+           'farrell_rdr',
+           'farrell_rd',
+           'Fit'
+          ]
+
+Fit = namedtuple('Fit', ['params', 'names', 'residual', 'rms', 'converged', 'iterations', 'seconds'])
+Fit.__doc__ = """
+Result of fitting a batch of measurements.
+
+Attributes:
+    params (numpy.ndarray): Fitted parameters, shape (spectra, parameters).
+    names (tuple): Name of each parameter, e.g., ('mu_a', 'mu_s_prime').
+    residual (numpy.ndarray): Residual of every measured value at the solution
+        (difference of logarithms when fitting in log space).
+    rms (numpy.ndarray): Root mean square residual of each spectrum.
+    converged (numpy.ndarray): False for spectra that reached max_iter.
+    iterations (int): Number of iterations carried out for the batch.
+    seconds (float): Time taken for the whole batch.
+"""
+
+
+def _boundary_factor(n, n_above):
+    """Return A = (1 + r_id) / (1 - r_id) for the relative index n / n_above."""
+    m = n / n_above
+    r_id = -1.440 / m**2 + 0.710 / m + 0.668 + 0.0636 * m
+    return (1 + r_id) / (1 - r_id)
+
+
+def farrell_rdr(r, mu_a, mu_s_prime, n=1.4, n_above=1):
+    """
+    Radial diffuse reflectance of a semi-infinite medium from diffusion theory.
+
+    Uses the dipole model of Farrell, Patterson and Wilson, Med. Phys. 19,
+    879 (1992).  The arguments broadcast; with column vectors for mu_a and
+    mu_s_prime and a row of radii the result has one row per medium.
+
+    Args:
+        r (array_like): Distance from the beam (mm).
+        mu_a (array_like): Absorption coefficient (mm⁻¹).
+        mu_s_prime (array_like): Reduced scattering coefficient (mm⁻¹).
+        n (float): Refractive index of the medium.
+        n_above (float): Refractive index above the medium.
+
+    Returns:
+        numpy.ndarray of reflectance per unit area (mm⁻²).
+    """
+    mu_t = mu_a + mu_s_prime
+    albedo = mu_s_prime / mu_t
+    D = 1 / (3 * mu_t)
+    mu_eff = np.sqrt(mu_a / D)
+    z0 = 1 / mu_t
+    zb = 2 * _boundary_factor(n, n_above) * D
+    r1 = np.sqrt(z0**2 + r**2)
+    r2 = np.sqrt((z0 + 2 * zb)**2 + r**2)
+    return albedo / (4 * np.pi) * (z0 * (mu_eff + 1 / r1) * np.exp(-mu_eff * r1) / r1**2 +
+                                   (z0 + 2 * zb) * (mu_eff + 1 / r2) * np.exp(-mu_eff * r2) / r2**2)
+
+
+def farrell_rd(mu_a, mu_s_prime, n=1.4, n_above=1):
+    """
+    Total diffuse reflectance of a semi-infinite medium from diffusion theory.
+
+    Args:
+        mu_a (array_like): Absorption coefficient (mm⁻¹).
+        mu_s_prime (array_like): Reduced scattering coefficient (mm⁻¹).
+        n (float): Refractive index of the medium.
+        n_above (float): Refractive index above the medium.
+
+    Returns:
+        numpy.ndarray of diffuse reflectance.
+    """
+    albedo = mu_s_prime / (mu_a + mu_s_prime)
+    root = np.sqrt(3 * (1 - albedo))
+    A = _boundary_factor(n, n_above)
+    return albedo / 2 * (1 + np.exp(-4 / 3 * A * root)) * np.exp(-root)
+
+
+def _model(model, r, n, n_above, g, wanted, nr):
+    """Return (forward function, parameter names, default guess) for the model argument."""
+    if isinstance(model, str) and model == 'farrell':
+        if r is None:
+            raise ValueError('the radii r are needed for the diffusion model')
+        r = np.asarray(r, dtype=float)
+
+        if 'Tt' in wanted:
+            raise ValueError('the diffusion model is for a semi-infinite medium without Tt')
+
+        def forward(p):
+            mu_a, mu_s_prime = p[:, :1], p[:, 1:2]
+            return {'Rdr': farrell_rdr(r, mu_a, mu_s_prime, n, n_above),
+                    'Rd': farrell_rd(mu_a[:, 0], mu_s_prime[:, 0], n, n_above)}
+        return forward, ('mu_a', 'mu_s_prime'), (0.01, 1.0)
+
+    if isinstance(model, LUT):
+        if model.r.size and nr != len(model.r):
+            raise ValueError('the profiles have %d radii but the LUT has %d' % (nr, len(model.r)))
+        if r is not None and (np.shape(r) != model.r.shape or not np.allclose(r, model.r)):
+            raise ValueError('r does not match the radial grid of the LUT (lut.r)')
+
+        def forward(p):
+            return {name: model(p[:, 0], p[:, 1], g, n, quantity=name) for name in wanted}
+        guess = tuple(np.sqrt(model.axes[name][0] * model.axes[name][-1]) for name in ('mu_a', 'mu_s'))
+        return forward, ('mu_a', 'mu_s'), guess
+
+    if callable(model):
+        return model, None, None
+    raise ValueError("model must be 'farrell', a LUT or a function")
+
+
+def invert(Rdr, r=None, model='farrell', guess=None, Rd=None, Tt=None, n=1.4, n_above=1,
+           g=0.9, names=None, log=True, max_iter=100, tol=1e-8):
+    """
+    Fit optical properties to a batch of radial reflectance profiles.
+
+    All spectra are fitted together by a Levenberg-Marquardt iteration on the
+    logarithms of the (positive) parameters.  Each iteration evaluates the
+    forward model for the whole batch once plus once per parameter for the
+    finite difference Jacobian; spectra that have converged drop out.
+
+    Args:
+        Rdr (array_like): Measured profiles, shape (spectra, radii) or (radii,).
+        r (array_like): Radii of the profile (mm); needed for 'farrell' and,
+            if given with a LUT, must equal `lut.r`.
+        model: 'farrell' (fits mu_a and mu_s'), a `LUT` (fits mu_a and mu_s at
+            fixed g and n) or a function mapping parameters of shape
+            (spectra, parameters) to a dict with 'Rdr' and optionally 'Rd'
+            and 'Tt' (e.g., for layered media).
+        guess (array_like): Starting parameters, one row or one per spectrum.
+        Rd (array_like, optional): Measured total diffuse reflectance to fit too.
+        Tt (array_like, optional): Measured total transmission to fit too.
+        n, n_above (float): Refractive indices used by 'farrell' and a LUT.
+        g (float): Anisotropy used with a LUT.
+        names (tuple, optional): Parameter names for a function model.
+        log (bool): Fit logarithms of the measurements (values <= 0 are ignored).
+        max_iter (int): Maximum number of iterations.
+        tol (float): Stop when the relative change in cost is below this.
+
+    Returns:
+        `Fit` with the parameters, residuals and timing of the batch.
+    """
+    start = time.perf_counter()
+    Rdr = np.atleast_2d(np.asarray(Rdr, dtype=float))
+    N = len(Rdr)
+    columns = [Rdr]
+    keys = [('Rdr', Rdr.shape[1])]
+    for name, value in (('Rd', Rd), ('Tt', Tt)):
+        if value is not None:
+            columns.append(np.broadcast_to(np.asarray(value, dtype=float), (N,))[:, None])
+            keys.append((name, 1))
+    data = np.hstack(columns)
+
+    forward, default_names, default_guess = _model(model, r, n, n_above, g, [k for k, _ in keys],
+                                                   Rdr.shape[1])
+    names = tuple(names or default_names or ())
+    if guess is None:
+        guess = default_guess
+    if guess is None:
+        raise ValueError('a starting guess is needed for a function model')
+    guess = np.asarray(guess, dtype=float)
+    q = np.log(np.array(np.broadcast_to(guess, (N, guess.shape[-1]))))
+    P = q.shape[1]
+
+    valid = np.isfinite(data) & ((data > 0) if log else True)
+    target = np.log(np.where(valid, data, 1)) if log else np.where(valid, data, 0)
+
+    def residual(q, rows):
+        values = forward(np.exp(np.clip(q, -30, 30)))
+        model_values = np.hstack([np.reshape(values[name], (len(q), size)) for name, size in keys])
+        if log:
+            model_values = np.log(np.maximum(model_values, 1e-300))
+        return np.where(valid[rows], model_values - target[rows], 0)
+
+    rows = np.arange(N)
+    res = residual(q, rows)
+    cost = np.sum(res**2, axis=1)
+    lam = np.full(N, 1e-3)
+    converged = np.zeros(N, dtype=bool)
+    h = 1e-6
+    iterations = 0
+
+    for iterations in range(1, max_iter + 1):
+        active = np.flatnonzero(~converged)
+        if len(active) == 0:
+            iterations -= 1
+            break
+        qa, ra = q[active], res[active]
+        J = np.empty(ra.shape + (P,))
+        for j in range(P):
+            qj = qa.copy()
+            qj[:, j] += h
+            J[:, :, j] = (residual(qj, active) - ra) / h
+
+        JTJ = np.einsum('nkp,nkq->npq', J, J)
+        gradient = np.einsum('nkp,nk->np', J, ra)
+        diagonal = np.einsum('npp->np', JTJ)
+        A = JTJ + (lam[active, None] * (diagonal + 1e-12))[:, :, None] * np.eye(P)
+        step = -np.linalg.solve(A, gradient[:, :, None])[:, :, 0]
+
+        q_new = qa + step
+        res_new = residual(q_new, active)
+        cost_new = np.sum(res_new**2, axis=1)
+        better = cost_new < cost[active]
+
+        accept = active[better]
+        change = cost[accept] - cost_new[better]
+        q[accept] = q_new[better]
+        res[accept] = res_new[better]
+        cost[accept] = cost_new[better]
+        lam[accept] /= 10
+        lam[active[~better]] *= 10
+
+        done = change <= tol * np.maximum(cost[accept], 1e-300)
+        converged[accept[done]] = True
+        converged[active[~better][lam[active[~better]] > 1e10]] = True
+        converged[active[np.max(np.abs(step), axis=1) < tol]] = True
+
+    counts = np.maximum(np.count_nonzero(valid, axis=1), 1)
+    return Fit(params=np.exp(q), names=names, residual=res, rms=np.sqrt(cost / counts),
+               converged=converged, iterations=iterations, seconds=time.perf_counter() - start)
@@ -0,0 +1,183 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Read any supported output file without knowing its format.
+
+The file is read into memory once.  Its first bytes are compared with the
+registered formats (V2 `mcmloA2.0`, V1 `A1` and the header of MCSub) and the
+same buffer is handed to the parser of the first format that matches, so the
+file is never opened again.  Other formats can be added with
+`register_format()`.
+
+Example::
+
+    mcml = mcmlpy.load('sample.mco')
+    sub = mcmlpy.load(open('mcOUT1.dat', 'rb').read())
+
+    try:
+        mcml = mcmlpy.load(fname)
+    except mcmlpy.UnknownFormatError:
+        ...
+"""
+
+import os
+from collections import namedtuple
+
+from mcmlpy.mcmlv1 import MCMLV1
+from mcmlpy.mcmlv2 import MCMLV2
+from mcmlpy.mcsub import MCSub
+
+__all__ = ['load',
+           'detect_format',
+           'register_format',
+           'FileFormat',
+           'FORMATS',
+           'MCMLFileError',
+           'UnknownFormatError',
+           'ParseError'
+          ]
+
+FileFormat = namedtuple('FileFormat', ['name', 'sniff', 'parse'])
+FileFormat.__doc__ = """
+A registered file format.
+
+Attributes:
+    name (str): Short name, e.g., 'v1'.
+    sniff (callable): Given the first bytes of a file, returns True if the
+        file is in this format.
+    parse (callable): Given the contents of a file (bytes), returns the
+        object holding the results.
+"""
+
+# number of bytes passed to the sniff functions
+SNIFF_SIZE = 4096
+
+
+class MCMLFileError(ValueError):
+    """Base class of the errors raised by `load()`."""
+
+
+class UnknownFormatError(MCMLFileError):
+    """The contents do not match any registered format."""
+
+
+class ParseError(MCMLFileError):
+    """
+    A file in a known format could not be read.
+
+    Attributes:
+        source (str): The file name or '<buffer>'.
+        format (str): Name of the format that was detected.
+    """
+    def __init__(self, source, fmt, message):
+        super().__init__('%s (%s): %s' % (source, fmt, message))
+        self.source = source
+        self.format = fmt
+
+
+def _parser(cls):
+    """Return a function that reads a buffer into a new instance of cls."""
+    def parse(buffer):
+        obj = cls()
+        obj.read_buffer(buffer)
+        return obj
+    return parse
+
+
+def _is_mcsub(head):
+    """Return True if head starts with the 19 numbered lines of an mcsub file."""
+    lines = head.split(b'\n', 19)[:19]
+    if len(lines) < 19:
+        return False
+    for line in lines:
+        tokens = line.split(b'\t', 1)
+        if len(tokens) != 2:
+            return False
+        try:
+            float(tokens[0])
+        except ValueError:
+            return False
+    return lines[11].split()[1:2] == [b'NR'] and lines[12].split()[1:2] == [b'NZ']
+
+
+FORMATS = [FileFormat('v2', lambda head: head.startswith(b'mcmloA2.0'), _parser(MCMLV2)),
+           FileFormat('v1', lambda head: head.startswith(b'A1'), _parser(MCMLV1)),
+           FileFormat('mcsub', _is_mcsub, _parser(MCSub))]
+
+
+def register_format(name, sniff, parse, first=False):
+    """
+    Add a file format to those recognized by `load()`.
+
+    A format already registered with the same name is replaced.
+
+    Args:
+        name (str): Short name of the format.
+        sniff (callable): Given the first `SNIFF_SIZE` bytes of a file,
+            returns True if the file is in this format.
+        parse (callable): Given the contents of a file (bytes), returns the
+            object holding the results.
+        first (bool): Try this format before the others.
+    """
+    FORMATS[:] = [fmt for fmt in FORMATS if fmt.name != name]
+    fmt = FileFormat(name, sniff, parse)
+    if first:
+        FORMATS.insert(0, fmt)
+    else:
+        FORMATS.append(fmt)
+
+
+def detect_format(head):
+    """
+    Return the `FileFormat` that matches the start of a file.
+
+    Args:
+        head (bytes): The first bytes of the file.
+
+    Returns:
+        The first matching `FileFormat` in `FORMATS`.
+    """
+    head = bytes(head[:SNIFF_SIZE])
+    for fmt in FORMATS:
+        if fmt.sniff(head):
+            return fmt
+    raise UnknownFormatError('unknown file format starting with %r' % head[:20])
+
+
+def load(path_or_buffer):
+    """
+    Read an output file in any registered format.
+
+    A file name (or an open binary file) is read with a single `read()`;
+    bytes are used as they are.
+
+    Args:
+        path_or_buffer (str, os.PathLike, bytes or file object): The file or
+            its contents.
+
+    Returns:
+        MCMLV1, MCMLV2 or MCSub object (or that of a registered format).
+
+    Raises:
+        UnknownFormatError: The contents do not match any format.
+        ParseError: The contents could not be read in the detected format.
+        OSError: The file could not be read.
+    """
+    if isinstance(path_or_buffer, (str, os.PathLike)):
+        source = os.fspath(path_or_buffer)
+        with open(source, 'rb') as file:
+            buffer = file.read()
+    elif hasattr(path_or_buffer, 'read'):
+        source = getattr(path_or_buffer, 'name', '<buffer>')
+        buffer = path_or_buffer.read()
+        if isinstance(buffer, str):
+            buffer = buffer.encode('utf-8')
+    else:
+        source = '<buffer>'
+        buffer = path_or_buffer
+
+    fmt = detect_format(buffer)
+    try:
+        return fmt.parse(buffer)
+    except (ValueError, IndexError, KeyError, TypeError) as e:
+        raise ParseError(source, fmt.name, str(e) or type(e).__name__) from e
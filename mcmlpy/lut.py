@@ -0,0 +1,284 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-locals
+# pylint: disable=too-many-arguments
+# pylint: disable=consider-using-f-string
+"""
+Lookup tables of MCML results on a grid of optical properties.
+
+A table holds Rd, Tt, absorbed and Rdr at every point of a grid over the
+absorption and scattering coefficients, anisotropy and refractive index of
+one layer.  It can be filled by simulation or from a corpus of .mco files,
+saved as a directory of `.npy` files that are memory mapped when loaded,
+and queried at many points at once by multilinear interpolation.
+
+Example::
+
+    sim = mcmlpy.Simulation(n=[1.4], mu_a=[0], mu_s=[1], g=[0.9], d=[10],
+                            dr=0.05, ndr=100, nda=1)
+    lut = mcmlpy.LUT.simulate(sim, mu_a=np.geomspace(1e-3, 1, 20),
+                              mu_s=np.linspace(5, 20, 16), g=[0.9], n=[1.4])
+    lut.save('table')
+    lut = mcmlpy.LUT.load('table')
+    Rd = lut(mu_a=x[:, 0], mu_s=x[:, 1], g=0.9, n=1.4)
+"""
+
+import os
+import json
+import copy
+import numpy as np
+
+from mcmlpy.batch import reader_for
+
+__all__ = ['LUT']
+
+AXES = ('mu_a', 'mu_s', 'g', 'n')
+QUANTITIES = ('Rd', 'Tt', 'absorbed', 'Rdr')
+
+
+class LUT:
+    """
+    Results of MCML runs on a grid over (mu_a, mu_s, g, n).
+
+    Attributes:
+        axes (dict): Increasing grid values for each of mu_a, mu_s, g and n.
+        values (dict): Arrays of shape (len(mu_a), len(mu_s), len(g), len(n))
+            for Rd, Tt and absorbed, with an extra last axis for Rdr.
+        layer (int): Index of the layer whose properties vary.
+        r (numpy.ndarray): Radial positions of the Rdr values (in mm).
+    """
+    def __init__(self, axes, values, layer=0, r=None):
+        self.axes = {name: np.asarray(axes[name], dtype=float) for name in AXES}
+        for name, axis in self.axes.items():
+            if axis.ndim != 1 or len(axis) == 0 or np.any(np.diff(axis) <= 0):
+                raise ValueError('the %s axis must be increasing' % name)
+        self.shape = tuple(len(self.axes[name]) for name in AXES)
+        self.values = dict(values)
+        for name, value in self.values.items():
+            if value.shape[:4] != self.shape:
+                raise ValueError('%s has shape %s but the grid is %s' % (name, value.shape, self.shape))
+        self.layer = layer
+        self.r = np.array([]) if r is None else np.asarray(r)
+
+    @classmethod
+    def simulate(cls, simulation, mu_a, mu_s, g, n, photons=10000, layer=0, seed=None,
+                 max_path=None):
+        """
+        Fill a table using white Monte Carlo runs.
+
+        One run without absorption is made for every (mu_s, g, n) and rescaled
+        to every value of mu_a.
+
+        Args:
+            simulation (Simulation): Layers and grid; the properties of `layer` vary.
+            mu_a, mu_s, g, n (array_like): Increasing grid values.
+            photons (int): Packets launched for each (mu_s, g, n).
+            layer (int): Index of the layer whose properties vary.
+            seed (int, optional): Seed for the first run; later runs use the following seeds.
+            max_path (float, optional): Passed to `Simulation.run_white()`.
+
+        Returns:
+            `LUT`
+        """
+        axes = dict(zip(AXES, (np.atleast_1d(np.asarray(a, dtype=float)) for a in (mu_a, mu_s, g, n))))
+        shape = tuple(len(axes[name]) for name in AXES)
+        values = {name: np.zeros(shape) for name in QUANTITIES[:3]}
+        values['Rdr'] = np.zeros(shape + (simulation.ndr - 1,))
+
+        sim = copy.deepcopy(simulation)
+        mu = np.tile(sim.mu_a, (shape[0], 1))
+        mu[:, layer] = axes['mu_a']
+        for run, (j, k, m) in enumerate(np.ndindex(shape[1:])):
+            sim.mu_s[layer] = axes['mu_s'][j]
+            sim.g[layer] = axes['g'][k]
+            sim.n[layer] = axes['n'][m]
+            white = sim.run_white(photons, None if seed is None else seed + run, max_path)
+            for i, mcml in enumerate(white.rescale(mu)):
+                for name in QUANTITIES:
+                    values[name][i, j, k, m] = getattr(mcml, name)
+        return cls(axes, values, layer, np.linspace(0, sim.ndr - 2, sim.ndr - 1) * sim.dr)
+
+    @classmethod
+    def from_runs(cls, runs, layer=None):
+        """
+        Fill a table from MCML objects whose properties form a complete grid.
+
+        Args:
+            runs (iterable): MCML objects (e.g., read from .mco files).
+            layer (int, optional): Index of the layer whose properties vary;
+                by default the first layer of finite thickness.
+
+        Returns:
+            `LUT`
+        """
+        points = []
+        results = []
+        r = None
+        for mcml in runs:
+            if layer is None:
+                layer = int(np.flatnonzero(np.isfinite(mcml.d))[0])
+            points.append([float(getattr(mcml, name)[layer]) for name in AXES])
+            results.append([np.asarray(getattr(mcml, name), dtype=float) for name in QUANTITIES])
+            r = mcml.r
+        if not points:
+            raise ValueError('no runs given')
+
+        points = np.array(points)
+        axes = {name: np.unique(points[:, i]) for i, name in enumerate(AXES)}
+        shape = tuple(len(axes[name]) for name in AXES)
+        index = tuple(np.searchsorted(axes[name], points[:, i]) for i, name in enumerate(AXES))
+        flat = np.ravel_multi_index(index, shape)
+        if len(np.unique(flat)) != len(flat) or len(flat) != np.prod(shape):
+            raise ValueError('the runs do not form a complete grid without duplicates')
+
+        values = {}
+        for q, name in enumerate(QUANTITIES):
+            stacked = np.array([result[q] for result in results])
+            values[name] = np.empty(shape + stacked.shape[1:])
+            values[name].reshape((-1,) + stacked.shape[1:])[flat] = stacked
+        return cls(axes, values, layer, r)
+
+    @classmethod
+    def from_files(cls, paths, layer=None):
+        """
+        Fill a table from .mco files whose properties form a complete grid.
+
+        Only the sections holding the tabulated quantities are parsed.
+
+        Args:
+            paths (iterable): Names of V1 or V2 .mco files.
+            layer (int, optional): Index of the layer whose properties vary.
+
+        Returns:
+            `LUT`
+        """
+        def runs():
+            for path in paths:
+                mcml = reader_for(path)
+                mcml.read_file(path, lazy=True)
+                yield mcml
+        return cls.from_runs(runs(), layer)
+
+    def save(self, directory):
+        """
+        Save the table as a directory of .npy files and an index in axes.json.
+
+        Args:
+            directory (str): Created if needed.
+        """
+        os.makedirs(directory, exist_ok=True)
+        meta = {'axes': {name: axis.tolist() for name, axis in self.axes.items()},
+                'layer': self.layer,
+                'r': self.r.tolist(),
+                'values': list(self.values)}
+        for name, value in self.values.items():
+            np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(value))
+        with open(os.path.join(directory, 'axes.json'), 'w', encoding='utf-8') as file:
+            json.dump(meta, file)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Load a table written by `save()`.
+
+        Args:
+            directory (str): Directory written by `save()`.
+            mmap_mode (str): Passed to `numpy.load` (None reads the arrays into memory).
+
+        Returns:
+            `LUT`
+        """
+        with open(os.path.join(directory, 'axes.json'), encoding='utf-8') as file:
+            meta = json.load(file)
+        values = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode)
+                  for name in meta['values']}
+        return cls(meta['axes'], values, meta['layer'], meta['r'])
+
+    def _weights(self, points):
+        """Return lower grid indices and fractional offsets for each point."""
+        indices = []
+        fractions = []
+        for name, x in zip(AXES, points):
+            axis = self.axes[name]
+            if len(axis) == 1:
+                indices.append(np.zeros(len(x), dtype=np.intp))
+                fractions.append(None)
+                continue
+            i = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, len(axis) - 2)
+            fractions.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+            indices.append(i)
+        return indices, fractions
+
+    def __call__(self, mu_a, mu_s, g, n, quantity='Rd'):
+        """
+        Interpolate one quantity at many points.
+
+        Points outside the grid are extrapolated linearly from the nearest cell.
+
+        Args:
+            mu_a, mu_s, g, n (array_like): Coordinates of the points (broadcast together).
+            quantity (str): 'Rd', 'Tt', 'absorbed' or 'Rdr'.
+
+        Returns:
+            numpy.ndarray with the shape of the broadcast inputs (with an extra
+            last axis for Rdr).
+        """
+        coordinates = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (mu_a, mu_s, g, n)))
+        shape = coordinates[0].shape
+        points = [c.ravel() for c in coordinates]
+        indices, fractions = self._weights(points)
+
+        table = self.values[quantity]
+        strides = np.array([int(np.prod(self.shape[i + 1:])) for i in range(4)])
+        flat_table = table.reshape((-1,) + table.shape[4:])
+        base = sum(i * stride for i, stride in zip(indices, strides))
+
+        varying = [d for d in range(4) if fractions[d] is not None]
+        result = 0
+        for corner in range(1 << len(varying)):
+            offset = 0
+            weight = 1
+            for bit, d in enumerate(varying):
+                if corner >> bit & 1:
+                    offset += strides[d]
+                    weight = weight * fractions[d]
+                else:
+                    weight = weight * (1 - fractions[d])
+            value = flat_table[base + offset]
+            if np.ndim(weight) and value.ndim > 1:
+                weight = weight[:, None]
+            result = result + weight * value
+        result = np.asarray(result, dtype=float)
+        return result.reshape(shape + table.shape[4:])
+
+    def validate(self, runs, quantities=('Rd', 'Tt')):
+        """
+        Compare the table with runs that were not used to build it.
+
+        Args:
+            runs (iterable): MCML objects with properties inside the grid.
+            quantities (tuple): Quantities to compare.
+
+        Returns:
+            dict mapping each quantity to a dict with the 'rms' and 'max'
+            absolute error and the 'max_relative' error.
+        """
+        points = []
+        actual = {name: [] for name in quantities}
+        for mcml in runs:
+            points.append([float(getattr(mcml, name)[self.layer]) for name in AXES])
+            for name in quantities:
+                actual[name].append(np.asarray(getattr(mcml, name), dtype=float))
+        points = np.array(points).T
+
+        report = {}
+        for name in quantities:
+            expected = np.array(actual[name])
+            error = self(*points, quantity=name) - expected
+            with np.errstate(divide='ignore', invalid='ignore'):
+                relative = np.abs(error) / np.abs(expected)
+            finite = np.isfinite(relative)
+            report[name] = {'rms': float(np.sqrt(np.mean(error**2))),
+                            'max': float(np.max(np.abs(error))),
+                            'max_relative': float(np.max(relative[finite]))
+                            if np.any(finite) else float('nan')}
+        return report
@@ -2,21 +2,68 @@
 # pylint: disable=too-many-locals
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=consider-using-f-string
+# pylint: disable=import-outside-toplevel
 
+import io
+import os
 import re
+import copy
+import mmap
+import tempfile
+from collections import namedtuple
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.axes_grid1 import make_axes_locatable
-from matplotlib.ticker import FuncFormatter
-from matplotlib import colors
-import matplotlib.cm as cm
+
+from mcmlpy.writer import write_mco_file
+from mcmlpy.resample import to_cartesian
+from mcmlpy.convolve import convolve
+from mcmlpy.hankel import spatial_frequency, SpatialFrequency
+from mcmlpy.pyramid import Pyramid
+from mcmlpy.derived import (Derived, DerivedCache, sample_layers, layer_index, fluence,
+                            layer_absorption, ring_areas, solid_angles)
 
 __all__ = ['read_N_floats',
            'skip_to_line_after',
            'read_next_line',
-           'MCML'
+           'parse_floats',
+           'parse_first_column',
+           'read_floats_into',
+           'index_sections',
+           'Section',
+           'SECTION_TAGS',
+           'CHUNK_SIZE',
+           'LazySection',
+           'MCML',
+           'merge'
           ]
 
+SECTION_TAGS = ('InParm', 'RAT', 'A_l',
+                'A_z', 'Ab_z', 'A_rz', 'A_t', 'A_zt', 'A_rzt',
+                'Rd_r', 'Rd_a', 'Rd_ra', 'Rd_t', 'Rd_rt', 'Rd_at', 'Rd_rat',
+                'Td_r', 'Td_a', 'Td_ra', 'Td_t', 'Td_rt', 'Td_at', 'Td_rat',
+                'Tt_r', 'Tt_a', 'Tt_ra')
+
+Section = namedtuple('Section', ['start', 'stop', 'line', 'lines'])
+Section.__doc__ = """
+Location of one section of an output file.
+
+Attributes:
+    start (int): Offset of the first line after the section tag.
+    stop (int): Offset just past the last line of data in the section.
+    line (int): Line number (starting at 1) of the section tag.
+    lines (int): Number of lines from start to stop.
+"""
+
+# bytes of text parsed at a time by the chunked readers
+CHUNK_SIZE = 1 << 20
+
+_COMMENT = re.compile(r'#[^\n]*')
+_COMMENT_BYTES = re.compile(rb'#[^\n]*')
+_NUMBER_START = re.compile(r'[\s\d.+\-]')
+_TEXT_LINE = re.compile(r'\n[^\s\d.+\-]')
+_TAG_PATTERN = r'\n(%s)[ \t]*(?:#[^\n]*)?(?=\r?\n|\Z)' % '|'.join(sorted(SECTION_TAGS, key=len, reverse=True))
+_SECTION_TAG = re.compile(_TAG_PATTERN)
+_SECTION_TAG_BYTES = re.compile(_TAG_PATTERN.encode('ascii'))
+
 def read_float(file):
     buffer = ''
     while True:
@@ -35,11 +82,154 @@ def read_float(file):
         return None
 
 
+def parse_floats(text, N=None):
+    """
+    Convert a block of whitespace separated numbers to an array.
+
+    The block is split once and converted by a single NumPy call instead of
+    number by number.  Anything after '#' on a line is considered a comment
+    and ignored.
+
+    Args:
+        text (str or bytes): Text containing the numbers.
+        N (int, optional): The number of values to return.
+
+    Returns:
+        numpy.ndarray with the (first N) values in the text.
+    """
+    if isinstance(text, str):
+        if '#' in text:
+            text = _COMMENT.sub('', text)
+    else:
+        text = bytes(text)
+        if b'#' in text:
+            text = _COMMENT_BYTES.sub(b'', text)
+    values = np.array(text.split(), dtype=float)
+
+    if N is None:
+        return values
+    if len(values) < N:
+        raise ValueError('expected %d numbers but found only %d' % (N, len(values)))
+    return values[:N]
+
+
+def parse_first_column(text, N=None):
+    """
+    Convert the first number on each line of text to an array.
+
+    Used for sections like RAT in which each line holds a value followed
+    by other information.  Blank lines and comments are skipped.
+
+    Args:
+        text (str or bytes): Text containing the numbers.
+        N (int, optional): The number of values to return.
+
+    Returns:
+        numpy.ndarray with the (first N) values in the text.
+    """
+    if not isinstance(text, str):
+        text = bytes(text).decode('utf-8', 'replace')
+    first = []
+    for line in text.splitlines():
+        tokens = line.split('#', 1)[0].split()
+        if tokens:
+            first.append(tokens[0])
+    return parse_floats(' '.join(first), N)
+
+
 def read_N_floats(file, N):
-    arr = np.zeros(N)
-    for i in range(N):
-        arr[i] = read_float(file)
-    return arr
+    """
+    Read the next N numbers from a file.
+
+    The text following the current position is read in large chunks up to the
+    first line that starts with something other than a number (the next section
+    tag or a comment).  That block is then converted with `parse_floats()`.
+    The file is left positioned somewhere after the block.
+
+    Args:
+        file (file object): The file pointer of an open file.
+        N (int): The number of values to read.
+
+    Returns:
+        numpy.ndarray with N values.
+    """
+    blocks = []
+    count = 0
+    while count < N:
+        chunk = file.read(max(CHUNK_SIZE, 16 * (N - count)))
+        if not chunk:
+            break
+        chunk += file.readline()
+        if not blocks and _NUMBER_START.match(chunk) is None:
+            break
+        match = _TEXT_LINE.search(chunk)
+        if match:
+            chunk = chunk[:match.start() + 1]
+        values = parse_floats(chunk)
+        blocks.append(values)
+        count += len(values)
+        if match:
+            break
+
+    if count < N:
+        raise ValueError('expected %d numbers but found only %d' % (N, count))
+    return np.concatenate(blocks)[:N]
+
+
+def read_floats_into(source, out, start=0, stop=None, scale=1):
+    """
+    Parse the numbers between two offsets in chunks and store them in an array.
+
+    Only about `CHUNK_SIZE` bytes of text are held in memory at a time, so
+    `out` can be a disk-backed `numpy.memmap` larger than the available memory.
+    The array is filled in C order; any numbers beyond its size are ignored.
+
+    Args:
+        source (file object, str, bytes or mmap): A file opened in binary mode
+            or the contents of one.
+        out (numpy.ndarray): Contiguous array to fill.
+        start (int): Offset of the first number.
+        stop (int, optional): Offset just past the last number.
+        scale (float): Every value is divided by this.
+
+    Returns:
+        out
+    """
+    flat = out.reshape(-1)
+    is_file = hasattr(source, 'read')
+    if is_file:
+        source.seek(start)
+    else:
+        newline = '\n' if isinstance(source, str) else b'\n'
+        stop = len(source) if stop is None else stop
+
+    count = 0
+    position = start
+    while count < flat.size and (stop is None or position < stop):
+        if is_file:
+            size = CHUNK_SIZE if stop is None else min(CHUNK_SIZE, stop - position)
+            chunk = source.read(size)
+            if not chunk:
+                break
+            if stop is None or position + len(chunk) < stop:
+                chunk += source.readline()
+            if stop is not None:
+                chunk = chunk[:stop - position]
+        else:
+            end = min(position + CHUNK_SIZE, stop)
+            if end < stop:
+                end = source.find(newline, end, stop) + 1 or stop
+            chunk = source[position:end]
+        position += len(chunk)
+
+        values = parse_floats(chunk)
+        n = min(len(values), flat.size - count)
+        np.divide(values[:n], scale, out=flat[count:count + n])
+        count += n
+
+    if count < flat.size:
+        raise ValueError('expected %d numbers but found only %d' % (flat.size, count))
+    return out
 
 
 def read_next_line(fp):
@@ -84,7 +274,168 @@ def skip_to_line_after(fp, target, occurrence=1):
 
     return count == occurrence
 
-class MCML:
+def _data_end(buffer, start, stop):
+    """Move stop back over any blank or comment lines preceding the next tag."""
+    newline, comment = ('\n', '#') if isinstance(buffer, str) else (b'\n', b'#')
+    while stop > start:
+        begin = max(start, buffer.rfind(newline, start, stop - 1) + 1)
+        line = buffer[begin:stop].strip()
+        if line and not line.startswith(comment):
+            break
+        stop = begin
+    return stop
+
+
+def _count_lines(buffer, start, stop):
+    """Count the newlines between start and stop (works for str, bytes and mmap)."""
+    if isinstance(buffer, str):
+        return buffer.count('\n', start, stop)
+    if isinstance(buffer, bytes):
+        return buffer.count(b'\n', start, stop)
+    return int(np.count_nonzero(np.frombuffer(buffer, np.uint8, stop - start, start) == ord('\n')))
+
+
+def index_sections(buffer):
+    """
+    Find every section tag in the contents of an output file in a single pass.
+
+    A section tag (see `SECTION_TAGS`) must be alone on its line except for an
+    optional comment.  Lines like the list of scored categories in a V2 header
+    therefore are not mistaken for sections.  If a tag appears more than once
+    the last occurrence is used.
+
+    Args:
+        buffer (str, bytes or mmap): The contents of the file.
+
+    Returns:
+        dict mapping each tag found to a `Section` in the order found.
+    """
+    if isinstance(buffer, str):
+        pattern, newline = _SECTION_TAG, '\n'
+    else:
+        pattern, newline = _SECTION_TAG_BYTES, b'\n'
+
+    tags = []
+    for match in pattern.finditer(buffer):
+        start = buffer.find(newline, match.end())
+        start = len(buffer) if start < 0 else start + 1
+        tag = match.group(1)
+        tags.append((tag if isinstance(tag, str) else tag.decode('ascii'), match.start() + 1, start))
+
+    sections = {}
+    line = 1
+    position = 0
+    for i, (tag, begin, start) in enumerate(tags):
+        stop = tags[i + 1][1] if i + 1 < len(tags) else len(buffer)
+        stop = _data_end(buffer, start, stop)
+        line += _count_lines(buffer, position, begin)
+        position = begin
+        sections.pop(tag, None)
+        sections[tag] = Section(start, stop, line, _count_lines(buffer, start, stop))
+    return sections
+
+
+class LazySection:
+    """
+    Descriptor for an array that is parsed from its section on first access.
+
+    When a file is opened with `lazy=True` the tags of the large sections are
+    recorded in the instance's `_pending` dictionary instead of being read.
+    The first time the attribute is used the section is read from the file
+    and the result is kept like any other attribute.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        pending = obj.__dict__.get('_pending', {})
+        tag = pending.get(self.name)
+        if tag is not None:
+            obj.load_section(tag)   # still pending if this raises
+            pending.pop(self.name, None)
+        return obj.__dict__[self.name]
+
+    def __set__(self, obj, value):
+        obj.__dict__.get('_pending', {}).pop(self.name, None)
+        obj.__dict__[self.name] = value
+
+
+def _row_blocks(array):
+    """Yield slices of about `CHUNK_SIZE` bytes along the first axis of an array."""
+    step = max(1, CHUNK_SIZE // max(1, array[:1].nbytes))
+    for i in range(0, len(array), step):
+        yield slice(i, i + step)
+
+
+def merge(runs):
+    """
+    Combine runs of the same geometry weighted by their number of photons.
+
+    The runs are used one at a time and only the running sums are kept, so
+    `runs` can be a generator that reads thousands of files one by one.
+    Disk-backed tallies (e.g., the time-resolved grids) are summed into a
+    `numpy.memmap` in `memmap_dir`, a few rows at a time.
+
+    Args:
+        runs (iterable): MCML objects of the same class and geometry.
+
+    Returns:
+        A new object with the combined tallies and the total number of photons.
+    """
+    result = None
+    sums = {}
+    photons = 0
+    for run in runs:
+        if result is None:
+            result = copy.copy(run)
+            names = [name for name in type(run).tallies if getattr(run, name) is not None]
+        else:
+            result.check_match(run)
+
+        for name in names:
+            value = getattr(run, name)
+            if value is None:
+                raise ValueError('%s is missing' % name)
+            value = value if isinstance(value, np.memmap) else np.asarray(value, dtype=float)
+            if name in sums and np.shape(sums[name]) != np.shape(value):
+                raise ValueError('%s has shape %s instead of %s' %
+                                 (name, np.shape(value), np.shape(sums[name])))
+            if isinstance(value, np.memmap) and value.size > 0:
+                if name not in sums:
+                    with tempfile.TemporaryFile(dir=getattr(run, 'memmap_dir', None)) as file:
+                        sums[name] = np.memmap(file, dtype=float, mode='w+', shape=value.shape)
+                for rows in _row_blocks(value):
+                    sums[name][rows] += run.photons * value[rows]
+            else:
+                sums[name] = sums.get(name, 0) + run.photons * value
+        photons += run.photons
+
+    if result is None:
+        raise ValueError('no runs to merge')
+    if photons == 0:
+        raise ValueError('the number of photons is needed to merge runs')
+
+    result.sections = {}
+    result.filename = None
+    result._pending = {}
+    for name, value in list(vars(result).items()):
+        if name not in result.tallies:
+            setattr(result, name, copy.deepcopy(value))
+    for name, total in sums.items():
+        if isinstance(total, np.memmap):
+            for rows in _row_blocks(total):
+                total[rows] /= photons
+            value = total
+        else:
+            value = total / photons
+        setattr(result, name, float(value) if np.ndim(value) == 0 else value)
+    result.photons = photons
+    return result
+
+
+class MCML(DerivedCache):
     """
     A class to import output from the MCML program.
 
@@ -122,7 +473,69 @@ class MCML:
         Ttra (numpy.ndarray): Transmitted reflectance as a function of radial and angular positions.
         r (numpy.ndarray): Radial positions corresponding to the values in the radial profiles.
         z (numpy.ndarray): Axial positions corresponding to the values in the axial profiles.
+        sections (dict): Location of each section in the file (see `index_sections`).
+        filename (str): Name of the file from which deferred sections are read.
     """
+    Arz = LazySection()
+    Rdra = LazySection()
+    Ttra = LazySection()
+
+    # large sections and the attribute each one sets; read on demand when lazy
+    lazy_sections = {}
+
+    # lazy sections that are always streamed from the file on demand
+    streamed_sections = {}
+
+    # attributes that must be equal for two runs to be merged
+    geometry = ('dz', 'dr', 'ndz', 'ndr', 'nda', 'num_layers',
+                'n_above', 'n', 'mu_a', 'mu_s', 'g', 'd', 'n_below')
+
+    # attributes that are averages over photon packets
+    tallies = ('Rsp', 'Ru', 'Rd', 'Rt', 'Tu', 'Td', 'Tt', 'absorbed',
+               'Az', 'Rdr', 'Rda', 'Ttr', 'Tta', 'Arz', 'Rdra', 'Ttra')
+
+    def _z_layer(self):
+        """Index of the sample layer at the centre of each depth bin in `z`."""
+        _, d = sample_layers(self.mu_a, self.d)
+        return layer_index(d, self.dz, len(self.z))
+
+    def _mu_a_z(self):
+        """Absorption coefficient (mm⁻¹) at the centre of each depth bin in `z`."""
+        mu_a, _ = sample_layers(self.mu_a, self.d)
+        return mu_a[self.z_layer]
+
+    def _fluence(self):
+        """Fluence rate Arz / mu_a(z) (W/mm²), nan where nothing is absorbed."""
+        if np.ndim(self.Arz) != 2:
+            return np.array([])
+        return fluence(self.Arz, self.mu_a_z)
+
+    def _layer_absorption(self):
+        """Fraction of the light absorbed in each layer of the sample (from Az or Arz)."""
+        Az = self.Az
+        if np.size(Az) == 0 and np.ndim(self.Arz) == 2:
+            Az = self.Arz[:, :len(self.r)] @ self.ring_areas
+        if np.size(Az) == 0:
+            return np.array([])
+        _, d = sample_layers(self.mu_a, self.d)
+        return layer_absorption(Az, d, self.dz)
+
+    def _ring_areas(self):
+        """Area (mm²) of each radial bin, so that sum(Rdr * ring_areas) is Rd."""
+        return ring_areas(self.dr, len(self.r))
+
+    def _solid_angles(self):
+        """Solid angle (sr) of each exit angle bin of Rda and Tta."""
+        return solid_angles(self.nda)
+
+    # computed on first use, forgotten when an attribute they use is assigned
+    z_layer = Derived(_z_layer, ('mu_a', 'd', 'dz', 'z'))
+    mu_a_z = Derived(_mu_a_z, ('mu_a', 'd', 'z_layer'))
+    fluence = Derived(_fluence, ('Arz', 'mu_a_z'))
+    layer_absorption = Derived(_layer_absorption, ('mu_a', 'd', 'dz', 'Az', 'Arz', 'ring_areas'))
+    ring_areas = Derived(_ring_areas, ('dr', 'r'))
+    solid_angles = Derived(_solid_angles, ('nda',))
+
     def __init__(self):
         self.magic = ''
         self.photons = 0
@@ -162,6 +575,10 @@ class MCML:
         self.Rdra = np.array([])
         self.Ttra = np.array([])
 
+        self.sections = {}
+        self.filename = None
+        self._pending = {}
+
     def verify_magic(self, fp):
         """
         Verify that the file's initial bytes match the 'magic' attribute of the class.
@@ -171,6 +588,215 @@ class MCML:
         fp.seek(0)
         return chunk==self.magic
 
+    def index_file(self, fname):
+        """
+        Find the sections in a file without parsing them.
+
+        Args:
+            fname (str): The name of the output file.
+
+        Returns:
+            dict mapping each section tag to a `Section`.
+        """
+        with open(fname, 'rb') as file:
+            self.sections = index_sections(file.read())
+        return self.sections
+
+    def read_section(self, tag, text):
+        """
+        Placeholder to be overridden.
+        """
+
+    def read_sections(self, buffer, lazy=False, sections=None):
+        """
+        Index the sections in buffer and read each one.
+
+        Args:
+            buffer (str, bytes or mmap): The contents of the output file.
+            lazy (bool): Defer the sections in `lazy_sections` until first used.
+            sections (dict, optional): The result of `index_sections(buffer)`.
+        """
+        self._pending = {}
+        self.sections = index_sections(buffer) if sections is None else sections
+        for tag, section in self.sections.items():
+            deferred = lazy or (self.filename is not None and tag in self.streamed_sections)
+            if deferred and tag in self.lazy_sections:
+                self._pending[self.lazy_sections[tag]] = tag
+            else:
+                self.read_section(tag, buffer[section.start:section.stop])
+
+    def read_buffer(self, buffer):
+        """
+        Read everything from the contents of an output file.
+
+        The header (the text before the first section of results) is
+        decoded and read from memory and the sections are parsed from the
+        same buffer, so nothing is read from disk.
+
+        Args:
+            buffer (bytes or mmap): The contents of the output file.
+        """
+        sections = index_sections(buffer)
+        end = min((section.start for tag, section in sections.items() if tag != 'InParm'),
+                  default=len(buffer))
+        header = io.StringIO(bytes(buffer[:end]).decode('utf-8'))
+        if not self.verify_magic(header):
+            raise ValueError('unknown file format')
+        self.read_header(header)
+        self.filename = None
+        self.read_sections(buffer, sections=sections)
+
+    def read_sections_from_file(self, fname, lazy=False):
+        """
+        Index the sections of a file and read them (the large ones on first use if lazy).
+
+        The file is memory mapped so that only the index scan and the sections
+        actually parsed are read from disk.  Sections in `streamed_sections` are
+        always left to be read from the file on first use.
+
+        Args:
+            fname (str): The name of the output file.
+            lazy (bool): Defer the sections in `lazy_sections` until first used.
+        """
+        self.filename = fname
+        with open(fname, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                self.read_sections(b'', lazy=lazy)
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                self.read_sections(buffer, lazy=lazy)
+
+    def load_section(self, tag):
+        """
+        Read a single section from `filename` using the stored offsets.
+
+        Args:
+            tag (str): The section tag, e.g., 'A_rz'.
+        """
+        section = self.sections[tag]
+        with open(self.filename, 'rb') as file:
+            file.seek(section.start)
+            text = file.read(section.stop - section.start)
+        self.read_section(tag, text)
+
+    def ballistic_reflectance(self):
+        """Return the unscattered reflectance excluding the specular reflection."""
+        return self.Ru - self.Rsp
+
+    def write_mco(self, fname, version=1, fmt='%12.4E'):
+        """
+        Write the results as a V1 or V2 .mco file.
+
+        Lengths are converted back to cm as used by the C programs.
+
+        Args:
+            fname (str): The name of the output file.
+            version (int): 1 or 2.
+            fmt (str): printf-style format of the array values.
+        """
+        write_mco_file(self, fname, version, fmt)
+
+    def cartesian(self, voxel, half_width=None, depth=None, volume=False, fluence=False):
+        """
+        Resample Arz (or the fluence) onto a Cartesian slice or volume.
+
+        The interpolation indices and weights are cached for each geometry,
+        so other runs with the same grid are resampled without recomputing
+        them (see `to_cartesian()`).
+
+        Args:
+            voxel (float or tuple): Voxel size (mm), or (width, height).
+            half_width (float, optional): Extent from the axis in x and y (mm).
+            depth (float, optional): Depth of the output (mm).
+            volume (bool): Return an x-y-z volume instead of the x-z slice.
+            fluence (bool): Resample `fluence` instead of `Arz`.
+
+        Returns:
+            `Cartesian` with the values and voxel centres.
+        """
+        values = self.fluence if fluence else self.Arz
+        if np.ndim(values) != 2:
+            raise ValueError('there is no Arz to resample')
+        return to_cartesian(values[:, :len(self.r)], self.dr, self.dz, voxel,
+                            half_width, depth, volume)
+
+    def convolve(self, shape, radius):
+        """
+        Return the results for a beam of finite size with a power of 1 W.
+
+        Rdr, Ttr, Tdr and Arz of this pencil beam run are convolved with the
+        irradiance of the beam (see `mcmlpy.convolve()`); the other
+        attributes are shared with this object.
+
+        Args:
+            shape (str): 'gaussian' or 'flat'.
+            radius (float): 1/e² radius of the Gaussian or radius of the flat beam (mm).
+
+        Returns:
+            A new object of the same class.
+        """
+        Arz = self.Arz
+        beam = copy.copy(self)
+        beam._pending = dict(getattr(self, '_pending', {}))   # pylint: disable=protected-access
+        for name in ('Rdr', 'Ttr', 'Tdr'):
+            value = getattr(self, name, None)
+            if value is not None and np.size(value) > 0:
+                setattr(beam, name, convolve(value, self.dr, shape, radius))
+        if np.ndim(Arz) == 2:
+            nr = len(self.r)
+            beam.Arz = np.array(Arz)
+            beam.Arz[:, :nr] = convolve(Arz[:, :nr], self.dr, shape, radius)
+        return beam
+
+    def spatial_frequency(self, fx):
+        """
+        Return the diffuse reflection and transmission for sinusoidal illumination.
+
+        Rdr and the radial transmission (Ttr, or Tdr for V2 files) are Hankel
+        transformed with a matrix cached for this radial grid.
+
+        Args:
+            fx (array_like): Spatial frequencies (1/mm).
+
+        Returns:
+            `SpatialFrequency` with the frequencies, Rd and Td.
+        """
+        fx = np.atleast_1d(np.asarray(fx, dtype=float))
+        Rd = spatial_frequency(self.Rdr, self.dr, fx)
+        Td = np.array([])
+        for name in ('Ttr', 'Tdr'):
+            value = getattr(self, name, None)
+            if value is not None and np.size(value) > 0:
+                Td = spatial_frequency(value, self.dr, fx)
+                break
+        return SpatialFrequency(fx, Rd, Td)
+
+    def check_match(self, other):
+        """
+        Raise an exception unless other is a run of the same kind and geometry.
+
+        Args:
+            other (MCML): Another run, e.g., of the same job on a different node.
+        """
+        if type(other) is not type(self):
+            raise TypeError('cannot combine %s with %s' % (type(self).__name__, type(other).__name__))
+        for name in self.geometry:
+            if not np.array_equal(getattr(self, name), getattr(other, name)):
+                raise ValueError('%s does not match (%s != %s)' %
+                                 (name, getattr(self, name), getattr(other, name)))
+
+    def __add__(self, other):
+        """Combine two runs weighted by their number of photons."""
+        if not isinstance(other, MCML):
+            return NotImplemented
+        return merge([self, other])
+
+    def __radd__(self, other):
+        """Allow sum() of a list of runs."""
+        if isinstance(other, int) and other == 0:
+            return merge([self])
+        return NotImplemented
+
     def __str__(self):
         """
         A string describing the contents of the class.
@@ -193,13 +819,107 @@ class MCML:
         s += 'dz = %.3f mm\n' % self.dz
         return s
 
-    def add_plot_text(self, top=0.98):
+    def add_plot_text(self, top=0.98, ax=None):
         """
         Placeholder to be overridden.
         """
         top = top / 2
 
-    def plot_reflectance(self):
+    def mirrored(self, values):
+        """
+        Return (x, values) reflected about the beam axis for plotting.
+
+        Args:
+            values (numpy.ndarray): Values at the radial positions `r`.
+
+        Returns:
+            x from -r[-1] to r[-1] and the values at those positions.
+        """
+        n = np.shape(values)[-1]
+        index = np.concatenate((np.arange(n - 1, 0, -1), np.arange(n)))
+        x = np.concatenate((-self.r[n - 1:0:-1], self.r[:n]))
+        return x, np.asarray(values)[..., index]
+
+    def pyramid(self, name='Arz', method='max'):
+        """
+        Return the multi-resolution pyramid of log10 of a grid.
+
+        The pyramid is built on first use and its coarser levels when they
+        are asked for.  It is kept until the attribute is assigned a new
+        array or `clear_derived()` is called.  For Arz it covers the bins
+        shown by `plot_fluence`.
+
+        Args:
+            name (str): Attribute, e.g., 'Arz', 'Rdra' or 'Arzt'.
+            method (str): 'max' or 'mean' pooling of the logarithms.
+
+        Returns:
+            `mcmlpy.Pyramid`.
+        """
+        values = getattr(self, name)
+        cache = self.__dict__.setdefault('_derived', {})
+        key = ('pyramid', name, method)
+        if key not in cache or cache[key][0] is not values:
+            grid = values[:-1, :-1] if name == 'Arz' else values
+            cache[key] = (values, Pyramid(grid, method))
+        return cache[key][1]
+
+    def fluence_image(self, min_val=1e-8, pixels=None, window=None, method='max'):
+        """
+        Return the image of log10(Arz) mirrored about the axis shown by `plot_fluence`.
+
+        The image comes from the coarsest level of `pyramid('Arz')` that has
+        at least one bin per pixel, so its size depends on the plot and not
+        on the number of bins.  The logarithm is taken once on the half plane
+        and then mirrored.
+
+        Args:
+            min_val (float): Values below this are masked.
+            pixels (tuple, optional): (height, width) of the plot in pixels;
+                full resolution by default.
+            window (tuple, optional): (left, right, bottom, top) limits of the
+                plot in mm; the whole grid by default.
+            method (str): 'max' or 'mean' pooling of the logarithms.
+
+        Returns:
+            (masked, extent, zmin, zmax) with the masked image, its extent
+            [left, right, bottom, top] in mm and the limits of the colour scale.
+        """
+        pyramid = self.pyramid('Arz', method)
+        nz, nr = pyramid.shape
+        height, width = (nz, 2 * nr) if pixels is None else pixels
+        bins = None
+        if window is None:
+            radial_pixels = width / 2
+        else:
+            left, right, bottom, top = window
+            r_max = max(abs(left), abs(right))
+            radial_pixels = width * r_max / max(abs(right - left), 1e-12)
+            z_lo, z_hi = sorted((bottom, top))
+            bins = ((int(np.floor(z_lo / self.dz)), int(np.ceil(z_hi / self.dz))),
+                    (0, int(np.ceil(r_max / self.dr)) + 1))
+        level = pyramid.view((height, radial_pixels), bins)
+
+        _, logF = self.mirrored(level.values)
+        R = self.r[-2] * level.stop[1] / nr
+        extent = [-R, R, self.z[-1] * level.stop[0] / nz, self.z[-1] * level.start[0] / nz]
+        zmin = np.log10(min_val)
+        zmax = np.max(logF)
+        return np.ma.masked_less(logF, zmin), extent, zmin, zmax
+
+    def _radial_plot(self, values, ylabel, ax):
+        """Plot values mirrored about the axis on ax (or a new figure)."""
+        if ax is None:
+            import matplotlib.pyplot as plt
+            _, ax = plt.subplots(figsize=(8, 4.5))
+        r, values = self.mirrored(values)
+        ax.plot(r, values, 'ob', markersize=2)
+        ax.set_xlabel("Radius (mm)")
+        ax.set_ylabel(ylabel)
+        ax.set_title('1W incident beam')
+        self.add_plot_text(ax=ax)
+
+    def plot_reflectance(self, ax=None):
         """
         Plots the radial distribution of diffuse reflectance.
 
@@ -209,23 +929,16 @@ class MCML:
         radial positions (`r`) are used to create the plot.
 
         After calling, follow with plt.show()
+
+        Args:
+            ax (matplotlib.axes.Axes, optional): Axes to draw on instead of a new figure.
         """
         if self.Rdr is None or len(self.Rdr) == 0:
             print('No valid reflection array')
             return
+        self._radial_plot(self.Rdr, "Reflected Excitance (W/mm²)", ax)
 
-        plt.figure(figsize=(8, 4.5))
-        tmp = -self.r[1:]
-        r = np.concatenate((tmp[::-1], self.r))
-        tmp = self.Rdr[1:]
-        refl = np.concatenate((tmp[::-1], self.Rdr))
-        plt.plot(r, refl, 'ob', markersize=2)
-        plt.xlabel("Radius (mm)")
-        plt.ylabel("Reflected Excitance (W/mm²)")
-        plt.title('1W incident beam')
-        self.add_plot_text()
-
-    def plot_transmittance(self):
+    def plot_transmittance(self, ax=None):
         """
         Plots the radial distribution of total transmission.
 
@@ -235,42 +948,54 @@ class MCML:
         radial positions (`r`) are used to create the plot.
 
         After calling, follow with plt.show()
+
+        Args:
+            ax (matplotlib.axes.Axes, optional): Axes to draw on instead of a new figure.
         """
         if self.Ttr is None or len(self.Ttr) == 0:
             print('No valid transmission array')
             return
-        plt.figure(figsize=(8, 4.5))
-        tmp = -self.r[1:]
-        r = np.concatenate((tmp[::-1], self.r))
-        tmp = self.Ttr[1:]
-        trans = np.concatenate((tmp[::-1], self.Ttr))
-        plt.plot(r, trans, 'ob', markersize=2)
-        plt.xlabel("Radius (mm)")
-        plt.ylabel("Transmitted Excitance (W/mm²)")
-        plt.title('1W incident beam')
-        self.add_plot_text()
-
-    def plot_1D_z_fluence(self):
+        self._radial_plot(self.Ttr, "Transmitted Excitance (W/mm²)", ax)
+
+    def plot_1D_z_fluence(self, ax=None):
         """
         Plots the radial distribution of total transmission.
 
         This method generates a plot of the fluence (W/mm²)
         as a function of the depth.
+
+        Args:
+            ax (matplotlib.axes.Axes, optional): Axes to draw on instead of a new figure.
         """
         if self.Arz is None or len(self.Arz) == 0:
             print('No valid Arz array')
             return
-            
-        plt.figure(figsize=(8, 4.5))
+
+        if ax is None:
+            import matplotlib.pyplot as plt
+            _, ax = plt.subplots(figsize=(8, 4.5))
         z = self.z[:]
         fluence = self.Arz[0,:].flatten()
-        plt.plot(z, fluence, 'ob', markersize=2)
-        plt.xlabel("Depth (mm)")
-        plt.ylabel("Fluence (W/mm²)")
-        plt.title('1W incident beam')
-        self.add_plot_text()
+        ax.plot(z, fluence, 'ob', markersize=2)
+        ax.set_xlabel("Depth (mm)")
+        ax.set_ylabel("Fluence (W/mm²)")
+        ax.set_title('1W incident beam')
+        self.add_plot_text(ax=ax)
+
+    def plot_fluence(self, min_val=1e-8, ax=None):
+        """
+        Plots log10 of the fluence rate in the r-z plane, mirrored about the axis.
+
+        The new figure is shown with plt.show() unless `ax` is given.
+
+        Args:
+            min_val (float): Values below this are shown in black.
+            ax (matplotlib.axes.Axes, optional): Axes to draw on instead of a new figure.
+        """
+        from mpl_toolkits.axes_grid1 import make_axes_locatable
+        from matplotlib.ticker import FuncFormatter
+        from matplotlib import colors, colormaps
 
-    def plot_fluence(self, min_val=1e-8):
         def fmt(x, pos):  # used to label colorbar
             return r'$10^{%g}$' % x
 
@@ -281,40 +1006,46 @@ class MCML:
         rows, cols = self.Arz.shape
         # handle 1D cases
         if cols==1:
-            self.plot_1D_z_fluence()
+            self.plot_1D_z_fluence(ax)
             return
 
         if rows==1:
             print('Fluence only has one row')
             return
 
-        r_reversed = -self.r[1:-1]
-        r = np.concatenate((r_reversed[::-1], self.r[:-1]))
-        extent = [-r[-1], r[-1], self.z[-1], 0]
-
-        F = self.Arz[:-1, :-1]
-        F_reversed = F[:, 1:]
-        F = np.hstack((F_reversed[:, ::-1], F))
-        logF = np.log10(F)
-        zmin = np.log10(min_val)
-        zmax = np.max(logF)
-        masked = np.ma.masked_less(logF, zmin)
+        show = ax is None
+        if show:
+            import matplotlib.pyplot as plt
+            _, ax = plt.subplots(figsize=(8, 4.5))  # Create a figure and an axes
 
-        cmap = plt.get_cmap('gist_ncar')
-        cmap.set_bad(color='black')  # Set the color for masked values
+        def pixels():
+            bbox = ax.get_window_extent()
+            return bbox.height, bbox.width
 
-        _, ax = plt.subplots(figsize=(8, 4.5))  # Create a figure and an axes
+        masked, extent, zmin, zmax = self.fluence_image(min_val, pixels())
+        cmap = colormaps['gist_ncar'].with_extremes(bad='black')
         im = ax.imshow(masked, extent=extent, aspect='auto', cmap=cmap, \
                        interpolation='none', norm=colors.Normalize(vmin=zmin, vmax=zmax))
-        plt.title('Fluence Rate [W/mm²]')
-        plt.xlabel('r (mm)')
-        plt.ylabel('z (mm)')
-        plt.ylim(self.z.max(), -0.1 * self.z.max())
-        self.add_plot_text(0.9)
+        ax.set_title('Fluence Rate [W/mm²]')
+        ax.set_xlabel('r (mm)')
+        ax.set_ylabel('z (mm)')
+        ax.set_ylim(self.z.max(), -0.1 * self.z.max())
+        ax.set_autoscale_on(False)
+
+        def zoom(_):  # show the level of detail that matches the new limits
+            window = ax.get_xlim() + ax.get_ylim()
+            masked, extent, _, _ = self.fluence_image(min_val, pixels(), window)
+            im.set_data(masked)
+            im.set_extent(extent)
+
+        ax.callbacks.connect('xlim_changed', zoom)
+        ax.callbacks.connect('ylim_changed', zoom)
+        self.add_plot_text(0.9, ax=ax)
 
         divider = make_axes_locatable(ax)
         cax = divider.append_axes("right", size="3%", pad=0.05)
-        cbar = plt.colorbar(im, cax=cax)  # Create a colorbar in the specified axes
+        cbar = ax.figure.colorbar(im, cax=cax)  # Create a colorbar in the specified axes
         cbar.formatter = FuncFormatter(fmt)
         cbar.update_ticks()
-        plt.show()
+        if show:
+            plt.show()
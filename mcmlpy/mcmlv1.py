@@ -2,17 +2,20 @@
 # pylint: disable=too-many-locals
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=consider-using-f-string
+# pylint: disable=import-outside-toplevel
 # pylint: disable=too-many-statements
 # pylint: disable=broad-exception-caught
 
 import numpy as np
-import matplotlib.pyplot as plt
 
-from mcmlpy import MCML, skip_to_line_after, read_N_floats
+from mcmlpy.cache import get_cache
+from mcmlpy import MCML, parse_floats, parse_first_column
 
 __all__ = ['MCMLV1']
 
 class MCMLV1(MCML):
+    lazy_sections = {'A_rz': 'Arz', 'Rd_ra': 'Rdra', 'Tt_ra': 'Ttra'}
+
     def __init__(self):
         super().__init__()
         self.magic = 'A1'
@@ -49,6 +52,14 @@ class MCMLV1(MCML):
         self.n_below = np.genfromtxt(file, max_rows=1, dtype=float)
 
     def init_from_v1_file(self, file):
+        """Read everything in an open V1 .mco file."""
+        self.read_header(file)
+        file.seek(0)
+        self.filename = None
+        self.read_sections(file.read())
+
+    def read_header(self, file):
+        """Read the input parameters at the start of an open V1 .mco file."""
         file.seek(0)
         photons = np.genfromtxt(file, skip_header=13, max_rows=1)
         self.photons = int(photons)
@@ -68,59 +79,83 @@ class MCMLV1(MCML):
         
         self.read_layers(file)
 
-        if skip_to_line_after(file, "RAT"):
-            self.Rsp = np.genfromtxt(file, max_rows=1, dtype=float)
-            self.Ru  = self.Rsp
-            self.Rd = np.genfromtxt(file, max_rows=1, dtype=float)
+    def read_section(self, tag, text):
+        """
+        Set the attributes stored in one section of a V1 .mco file.
+
+        Args:
+            tag (str): The section tag, e.g., 'A_rz'.
+            text (str or bytes): The lines of the section following the tag.
+        """
+        if tag == "RAT":
+            self.Rsp, self.Rd, self.absorbed, self.Td = parse_first_column(text, 4)
+            self.Ru = self.Rsp
             self.Rt = self.Rd + self.Ru
-            self.absorbed = np.genfromtxt(file, max_rows=1, dtype=float)
-            self.Td = np.genfromtxt(file, max_rows=1, dtype=float)
             self.Tt = self.Td
             self.Tu = 0
 
-        if skip_to_line_after(file, "A_z"):
-            self.Az = np.genfromtxt(file, max_rows=self.ndz).flatten()
-            self.Az = self.Az[:-1]
+        elif tag == "A_z":
+            self.Az = parse_floats(text, self.ndz)[:-1]
             self.Az /= 10 # convert from cm⁻¹ to mm⁻¹
 
-        if skip_to_line_after(file, "Rd_r"):
-            self.Rdr = np.genfromtxt(file, max_rows=self.ndr).flatten()
-            self.Rdr = self.Rdr[:-1]
+        elif tag == "Rd_r":
+            self.Rdr = parse_floats(text, self.ndr)[:-1]
             self.Rdr /= 100  # convert from cm⁻² to mm⁻²
 
-        if skip_to_line_after(file, "Rd_a"):
-            self.Rda = np.genfromtxt(file, max_rows=self.nda).flatten()
+        elif tag == "Rd_a":
+            self.Rda = parse_floats(text, self.nda)
 
-        if skip_to_line_after(file, "Tt_r"):
-            self.Ttr = np.genfromtxt(file, max_rows=self.ndr).flatten()
-            self.Ttr = self.Ttr[:-1]
+        elif tag == "Tt_r":
+            self.Ttr = parse_floats(text, self.ndr)[:-1]
             self.Ttr /= 100  # convert from cm⁻² to mm⁻²
 
-        if skip_to_line_after(file, "Tt_a"):
-            self.Tta = np.genfromtxt(file, max_rows=self.nda).flatten()
+        elif tag == "Tt_a":
+            self.Tta = parse_floats(text, self.nda)
 
-        if skip_to_line_after(file, "A_rz"):
-            Arz = read_N_floats(file, self.ndz * self.ndr)
+        elif tag == "A_rz":
+            Arz = parse_floats(text, self.ndz * self.ndr)
             self.Arz = Arz.reshape(self.ndr, self.ndz).T
             self.Arz /= 1000  # convert from cm⁻² to mm⁻²
             np.place(self.Arz, self.Arz < 1e-8, 1e-8)
 
-        if skip_to_line_after(file, "Rd_ra"):
-            Rdra = read_N_floats(file, self.nda * self.ndr)
+        elif tag == "Rd_ra":
+            Rdra = parse_floats(text, self.nda * self.ndr)
             self.Rdra = Rdra.reshape(self.ndr, self.nda).T
             self.Rdra /= 100  # convert from cm⁻² to mm⁻²
 
-        if skip_to_line_after(file, "Tt_ra"):
-            self.Ttra = read_N_floats(file, self.nda * self.ndr)
+        elif tag == "Tt_ra":
+            Ttra = parse_floats(text, self.nda * self.ndr)
+            self.Ttra = Ttra.reshape(self.ndr, self.nda).T
             self.Ttra /= 100  # convert from cm⁻² to mm⁻²
 
-    def init_from_file(self, fname):
+    def read_file(self, fname, lazy=False):
+        """
+        Read a V1 .mco file, raising an exception if that fails.
+
+        Args:
+            fname (str): The name of the output file.
+            lazy (bool): Read the large two-dimensional arrays on first access.
+        """
+        with open(fname, 'r', encoding='utf-8') as file:
+            if not self.verify_magic(file):
+                raise ValueError('unknown file format')
+            self.read_header(file)
+        self.read_sections_from_file(fname, lazy)
+
+    def init_from_file(self, fname, lazy=False, cache=None):
+        """
+        Read a V1 .mco file.
+
+        Args:
+            fname (str): The name of the output file.
+            lazy (bool): Read the large two-dimensional arrays on first access.
+            cache (Cache or bool): Use this on-disk cache (True for the default one).
+        """
         try:
-            with open(fname, 'r', encoding='utf-8') as file:
-                if self.verify_magic(file):
-                    self.init_from_v1_file(file)
-                else:
-                    print('unknown file format')
+            if cache:
+                get_cache(cache).load(self, fname, lazy)
+            else:
+                self.read_file(fname, lazy)
         except FileNotFoundError:
             print(f"Failed to open the file {fname}: File not found.")
         except PermissionError:
@@ -130,7 +165,11 @@ class MCMLV1(MCML):
         except Exception as e:  # Still catching Exception but now it's more justified
             print(f"An unexpected error occurred while initializing from file {fname}: {e}")
 
-    def add_plot_text(self, top=0.98):
+    def add_plot_text(self, top=0.98, ax=None):
+        if ax is None:
+            import matplotlib.pyplot as plt
+            ax = plt.gca()
+
         dv = 0.06
         v = top
         for i in range(self.num_layers):
@@ -139,5 +178,5 @@ class MCMLV1(MCML):
             s += r'$\mu_s$=%.2f ' % self.mu_s[i]
             s += r'g=%.2f ' % self.g[i]
             s += r'd=%.2f ' % self.d[i]
-            plt.text(0.65, v, s, ha='left', va='top', transform=plt.gca().transAxes, fontsize=8)
+            ax.text(0.65, v, s, ha='left', va='top', transform=ax.transAxes, fontsize=8)
             v = v - dv
@@ -2,17 +2,84 @@
 # pylint: disable=too-many-locals
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=consider-using-f-string
+# pylint: disable=import-outside-toplevel
 # pylint: disable=too-many-statements
 # pylint: disable=broad-exception-caught
 
+import tempfile
 import numpy as np
-import matplotlib.pyplot as plt
 
-from mcmlpy import MCML, skip_to_line_after, read_N_floats, read_next_line
+from mcmlpy.cache import get_cache
+from mcmlpy import MCML, LazySection, skip_to_line_after, read_next_line, parse_floats, parse_first_column
+from mcmlpy import read_floats_into
 
 __all__ = ['MCMLV2']
 
 class MCMLV2(MCML):
+    """
+    Output of MCML version 2 (.mco files starting with 'mcmloA2.0').
+
+    The time-resolved arrays are streamed from the file into disk-backed
+    `numpy.memmap` arrays (in `memmap_dir` or the system temporary directory)
+    the first time they are used, so files larger than memory can be opened.
+    Their last axis is time and, like `Arz` and `Rdra`, three-dimensional
+    arrays are stored with the radial axis second::
+
+        Azt[ndz, ndt]         Arzt[ndz, ndr, ndt]
+        Rdrt[ndr, ndt]        Rdat[nda, ndt]        Rdrat[nda, ndr, ndt]
+        Tdrt[ndr, ndt]        Tdat[nda, ndt]        Tdrat[nda, ndr, ndt]
+
+    The streamed arrays keep every bin in the file, so their time axis
+    includes the last (overflow) bin and has ndt entries while `t`, `At`,
+    `Rdt` and `Tdt` have ndt - 1.  Use, e.g., `Arzt[..., :len(t)]` to match `t`.
+
+    Attributes:
+        dt (float): Width of the time bins (in ps).
+        ndt (int): Number of time bins including the overflow bin.
+        t (numpy.ndarray): Start of each time bin (in ps), ndt - 1 entries.
+        At (numpy.ndarray): Absorption as a function of time (in ps⁻¹), overflow bin dropped.
+        Rdt (numpy.ndarray): Diffuse reflectance as a function of time (in ps⁻¹), overflow bin dropped.
+        Tdt (numpy.ndarray): Diffuse transmittance as a function of time (in ps⁻¹), overflow bin dropped.
+        Azt (numpy.ndarray): Absorption vs depth and time, shape (ndz, ndt) with the overflow time bin.
+        Arzt (numpy.ndarray): Absorption vs depth, radius and time, shape (ndz, ndr, ndt)
+            with the overflow time bin.
+        Rdrt (numpy.ndarray): Reflectance vs radius and time, shape (ndr, ndt) with the overflow time bin.
+        Rdat (numpy.ndarray): Reflectance vs angle and time, shape (nda, ndt) with the overflow time bin.
+        Rdrat (numpy.ndarray): Reflectance vs angle, radius and time, shape (nda, ndr, ndt)
+            with the overflow time bin.
+        Tdrt (numpy.ndarray): Transmission vs radius and time, shape (ndr, ndt) with the overflow time bin.
+        Tdat (numpy.ndarray): Transmission vs angle and time, shape (nda, ndt) with the overflow time bin.
+        Tdrat (numpy.ndarray): Transmission vs angle, radius and time, shape (nda, ndr, ndt)
+            with the overflow time bin.
+        memmap_dir (str): Directory for the time-resolved arrays (None for the default).
+    """
+    Tdra = LazySection()
+    Azt = LazySection()
+    Arzt = LazySection()
+    Rdrt = LazySection()
+    Rdat = LazySection()
+    Rdrat = LazySection()
+    Tdrt = LazySection()
+    Tdat = LazySection()
+    Tdrat = LazySection()
+
+    # attribute, order of the axes in the file and unit conversion
+    streamed_sections = {'A_zt': ('Azt', 'zt', 10),        # cm⁻¹ to mm⁻¹
+                         'A_rzt': ('Arzt', 'rzt', 1000),   # cm⁻³ to mm⁻³
+                         'Rd_rt': ('Rdrt', 'rt', 100),     # cm⁻² to mm⁻²
+                         'Rd_at': ('Rdat', 'at', 1),
+                         'Rd_rat': ('Rdrat', 'rat', 100),
+                         'Td_rt': ('Tdrt', 'rt', 100),
+                         'Td_at': ('Tdat', 'at', 1),
+                         'Td_rat': ('Tdrat', 'rat', 100)}
+
+    lazy_sections = {'A_rz': 'Arz', 'Rd_ra': 'Rdra', 'Td_ra': 'Tdra'}
+    lazy_sections.update({tag: v[0] for tag, v in streamed_sections.items()})
+
+    geometry = MCML.geometry + ('dt', 'ndt')
+    tallies = MCML.tallies + ('Tdr', 'Tda', 'Tdra', 'At', 'Rdt', 'Tdt',
+                              'Azt', 'Arzt', 'Rdrt', 'Rdat', 'Rdrat', 'Tdrt', 'Tdat', 'Tdrat')
+
     def __init__(self):
         super().__init__()
         self.magic = 'mcmloA2.0'
@@ -27,6 +94,20 @@ class MCMLV2(MCML):
         self.Tda = np.array([], dtype=float)
         self.Tdra = np.array([], dtype=float)
 
+        self.t = np.array([], dtype=float)
+        self.At = np.array([], dtype=float)
+        self.Rdt = np.array([], dtype=float)
+        self.Tdt = np.array([], dtype=float)
+        self.Azt = np.array([], dtype=float)
+        self.Arzt = np.array([], dtype=float)
+        self.Rdrt = np.array([], dtype=float)
+        self.Rdat = np.array([], dtype=float)
+        self.Rdrat = np.array([], dtype=float)
+        self.Tdrt = np.array([], dtype=float)
+        self.Tdat = np.array([], dtype=float)
+        self.Tdrat = np.array([], dtype=float)
+        self.memmap_dir = None
+
     def __str__(self):
         s = super().__str__()
         s += 't_bins = %4d, ' % self.ndt
@@ -45,6 +126,10 @@ class MCMLV2(MCML):
                 s += 'd=%.2fmm\n' % self.d[i]
         return s
 
+    def ballistic_reflectance(self):
+        """Return the unscattered reflectance excluding the specular reflection."""
+        return self.Ru
+
     def read_layers(self, file):
         """Read the layer information from the V2 .mco file."""
         #initialize layers
@@ -85,6 +170,14 @@ class MCMLV2(MCML):
             s = read_next_line(file)
 
     def init_from_v2_file(self, file):
+        """Read everything in an open V2 .mco file."""
+        self.read_header(file)
+        file.seek(0)
+        self.filename = None
+        self.read_sections(file.read())
+
+    def read_header(self, file):
+        """Read the input parameters at the start of an open V2 .mco file."""
         skip_to_line_after(file, 'mcmli2.0')
 
         self.read_layers(file)
@@ -106,68 +199,148 @@ class MCMLV2(MCML):
         self.ndt = int(ndt)
         self.nda = int(nda)
 
-        # create radii and depth arrays
+        # skip the list of scored categories
+        s = read_next_line(file)
+        while not s[0].isdigit():
+            s = read_next_line(file)
+        self.photons = int(s.split()[0])
+
+        # create radii, depth and time arrays
         self.r = np.linspace(0, self.ndr - 2, int(self.ndr - 1)) * self.dr
         self.z = np.linspace(0, self.ndz - 1, int(self.ndz)) * self.dz
+        self.t = np.linspace(0, self.ndt - 2, int(self.ndt - 1)) * self.dt
 
-# left to do
-#   Rd_ra   Rd_t    Rd_rt   Rd_at   Rd_rat
-#   Td_ra   Td_t    Td_rt   Td_at   Td_rat
-#   A_zt    A_rzt
+    def read_time_section(self, tag, source, start=0, stop=None):
+        """
+        Stream a time-resolved section into a disk-backed array.
 
-        if skip_to_line_after(file, "RAT"):
-            self.Rsp        = float(read_next_line(file).split()[0])
-            self.Ru         = float(read_next_line(file).split()[0])
-            self.Rd         = float(read_next_line(file).split()[0])
+        Args:
+            tag (str): The section tag, e.g., 'Rd_rt'.
+            source (file object, str or bytes): Binary file or text holding the section.
+            start (int): Offset of the first number.
+            stop (int, optional): Offset just past the last number.
+        """
+        name, axes, scale = self.streamed_sections[tag]
+        sizes = {'z': self.ndz, 'r': self.ndr, 'a': self.nda, 't': self.ndt}
+        shape = tuple(sizes[axis] for axis in axes)
+        if np.prod(shape) == 0:
+            setattr(self, name, np.zeros(shape))
+            return
+
+        with tempfile.TemporaryFile(dir=self.memmap_dir) as file:
+            values = np.memmap(file, dtype=float, mode='w+', shape=shape)
+        read_floats_into(source, values, start, stop, scale)
+        if len(shape) == 3:
+            values = values.transpose(1, 0, 2)  # radial axis second
+        setattr(self, name, values)
+
+    def load_section(self, tag):
+        """
+        Read a single section from `filename`, streaming the time-resolved ones.
+
+        Args:
+            tag (str): The section tag, e.g., 'A_rzt'.
+        """
+        if tag not in self.streamed_sections:
+            super().load_section(tag)
+            return
+        section = self.sections[tag]
+        with open(self.filename, 'rb') as file:
+            self.read_time_section(tag, file, section.start, section.stop)
+
+    def read_section(self, tag, text):
+        """
+        Set the attributes stored in one section of a V2 .mco file.
+
+        Args:
+            tag (str): The section tag, e.g., 'A_rz'.
+            text (str or bytes): The lines of the section following the tag.
+        """
+        if tag == "RAT":
+            values = parse_first_column(text, 6)
+            self.Rsp        = float(values[0])
+            self.Ru         = float(values[1])
+            self.Rd         = float(values[2])
             self.Rt         = self.Ru + self.Rd
-            self.absorbed   = float(read_next_line(file).split()[0])
-            self.Tu         = float(read_next_line(file).split()[0])
-            self.Td         = float(read_next_line(file).split()[0])
+            self.absorbed   = float(values[3])
+            self.Tu         = float(values[4])
+            self.Td         = float(values[5])
             self.Tt         = self.Tu + self.Td
 
-        if skip_to_line_after(file, "A_z", occurrence=2):
-            self.Az = read_N_floats(file, self.ndz)
-            self.Az = self.Az[:-1]
+        elif tag == "A_z":
+            self.Az = parse_floats(text, self.ndz)[:-1]
             self.Az /= 10 # convert from cm⁻¹ to mm⁻¹
 
-        if skip_to_line_after(file, "Rd_r", occurrence=2):
-            self.Rdr = read_N_floats(file, self.ndr)
-            self.Rdr = self.Rdr[:-1]
+        elif tag == "Rd_r":
+            self.Rdr = parse_floats(text, self.ndr)[:-1]
             self.Rdr /= 100  # convert from cm⁻² to mm⁻²
 
-        if skip_to_line_after(file, "Rd_a", occurrence=2):
-            self.Rda = np.genfromtxt(file, max_rows=self.nda, dtype=float).flatten()
+        elif tag == "Rd_a":
+            self.Rda = parse_floats(text, self.nda)
 
-        if skip_to_line_after(file, "Td_r", occurrence=2):
-            self.Tdr = read_N_floats(file, self.ndr)
-            self.Tdr = self.Tdr[:-1]
+        elif tag == "Td_r":
+            self.Tdr = parse_floats(text, self.ndr)[:-1]
             self.Tdr /= 100  # convert from cm⁻² to mm⁻²
 
-        if skip_to_line_after(file, "Td_a", occurrence=2):
-            self.Tda = np.genfromtxt(file, max_rows=self.nda, dtype=float).flatten()
+        elif tag == "Td_a":
+            self.Tda = parse_floats(text, self.nda)
 
-        if skip_to_line_after(file, "A_rz", occurrence=2):
-            Arz = read_N_floats(file, self.ndz * self.ndr)
+        elif tag == "A_rz":
+            Arz = parse_floats(text, self.ndz * self.ndr)
             self.Arz = Arz.reshape(self.ndr, self.ndz).T
             self.Arz /= 1000  # convert from cm⁻² to mm⁻²
             np.place(self.Arz, self.Arz < 1e-8, 1e-8)
 
-        if skip_to_line_after(file, "Rd_ra", occurrence=2):
-            Rdra = read_N_floats(file, self.nda * self.ndr)
+        elif tag == "Rd_ra":
+            Rdra = parse_floats(text, self.nda * self.ndr)
             self.Rdra = Rdra.reshape(self.ndr, self.nda).T
             self.Rdra /= 100  # convert from cm⁻² to mm⁻²
 
-        if skip_to_line_after(file, "Td_ra", occurrence=2):
-            self.Tdra = read_N_floats(file, self.nda * self.ndr)
+        elif tag == "Td_ra":
+            Tdra = parse_floats(text, self.nda * self.ndr)
+            self.Tdra = Tdra.reshape(self.ndr, self.nda).T
             self.Tdra /= 100  # convert from cm⁻² to mm⁻²
 
-    def init_from_file(self, fname):
+        elif tag == "A_t":
+            self.At = parse_floats(text, self.ndt)[:-1]
+
+        elif tag == "Rd_t":
+            self.Rdt = parse_floats(text, self.ndt)[:-1]
+
+        elif tag == "Td_t":
+            self.Tdt = parse_floats(text, self.ndt)[:-1]
+
+        elif tag in self.streamed_sections:
+            self.read_time_section(tag, text)
+
+    def read_file(self, fname, lazy=False):
+        """
+        Read a V2 .mco file, raising an exception if that fails.
+
+        Args:
+            fname (str): The name of the output file.
+            lazy (bool): Read the large two-dimensional arrays on first access.
+        """
+        with open(fname, 'r', encoding='utf-8') as file:
+            if not self.verify_magic(file):
+                raise ValueError('unknown file format')
+            self.read_header(file)
+        self.read_sections_from_file(fname, lazy)
+
+    def init_from_file(self, fname, lazy=False, cache=None):
+        """
+        Read a V2 .mco file.
+
+        Args:
+            fname (str): The name of the output file.
+            lazy (bool): Read the large two-dimensional arrays on first access.
+            cache (Cache or bool): Use this on-disk cache (True for the default one).
+        """
         try:
-            with open(fname, 'r', encoding='utf-8') as file:
-                if self.verify_magic(file):
-                    self.init_from_v2_file(file)
-                else:
-                    print('unknown file format')
+            if cache:
+                get_cache(cache).load(self, fname, lazy)
+            else:
+                self.read_file(fname, lazy)
         except FileNotFoundError:
             print(f"Failed to open the file {fname}: File not found.")
         except PermissionError:
@@ -177,7 +350,11 @@ class MCMLV2(MCML):
         except Exception as e:  # Still catching Exception but now it's more justified
             print(f"An unexpected error occurred while initializing from file {fname}: {e}")
 
-    def add_plot_text(self, top=0.98):
+    def add_plot_text(self, top=0.98, ax=None):
+        if ax is None:
+            import matplotlib.pyplot as plt
+            ax = plt.gca()
+
         dv = 0.06
         v = top
         for i in range(self.num_layers):
@@ -186,5 +363,5 @@ class MCMLV2(MCML):
             s += r'$\mu_s$=%.2f ' % self.mu_s[i]
             s += r'g=%.2f ' % self.g[i]
             s += r'd=%.2f ' % self.d[i]
-            plt.text(0.65, v, s, ha='left', va='top', transform=plt.gca().transAxes, fontsize=8)
+            ax.text(0.65, v, s, ha='left', va='top', transform=ax.transAxes, fontsize=8)
             v = v - dv
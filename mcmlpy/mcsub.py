@@ -1,18 +1,24 @@
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=consider-using-f-string
+# pylint: disable=import-outside-toplevel
 # pylint: disable=too-many-statements
 # pylint: disable=broad-exception-caught
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-locals
 
+import io
 import numpy as np
-import matplotlib.pyplot as plt
 
-from mcmlpy import MCML
+from mcmlpy.cache import get_cache
+from mcmlpy.mcml import MCML, CHUNK_SIZE, parse_floats
+from mcmlpy.derived import Derived
 
 __all__ = ['MCSub']
 
+
 class MCSub(MCML):
+    geometry = MCML.geometry + ('mcflag', 'beam_radius', 'beam_waist',
+                                'x_source', 'y_source', 'z_source')
 
     def __init__(self, mu_a=0, mu_s=0, g=0, n_tissue=1, n_above=1, mcflag=0,
                  beam_radius=0, beam_waist=0, x_source=0, y_source=0, z_source=0,
@@ -49,9 +55,35 @@ class MCSub(MCML):
         self.z = z
         self.r = r
 
+    def _fluence(self):
+        """Fluence rate (W/mm²); mcsub stores it in place of Arz."""
+        if np.ndim(self.Arz) != 2:
+            return np.array([])
+        return self.Arz
+
+    def _layer_absorption(self):
+        """Fraction of the light absorbed in the medium within the grid."""
+        if np.ndim(self.Arz) != 2:
+            return np.array([])
+        Az = (self.Arz @ self.ring_areas) * self.mu_a_z
+        return np.array([np.sum(Az) * self.dz])
+
+    fluence = Derived(_fluence, ('Arz',))
+    layer_absorption = Derived(_layer_absorption, ('Arz', 'ring_areas', 'mu_a_z', 'dz'))
+
     def init_from_mcsub_file(self, file):
-        params = np.genfromtxt(file, comments='\t', max_rows=19)
-        
+        """
+        Read the header, reflectance and fluence of an mcsub output file.
+
+        The file is read once from the start.  The fluence table is read in
+        chunks of about a megabyte straight into the preallocated `Arz`, so
+        that little more than the final arrays is held in memory.
+
+        Args:
+            file (file object): The output file opened in binary or text mode.
+        """
+        params = [float(file.readline().split()[0]) for _ in range(19)]
+
         self.mu_a[0] = params[0]
         self.mu_s[0] = params[1]
         self.g[0] = params[2]
@@ -73,19 +105,30 @@ class MCSub(MCML):
         self.Rd = params[18]
         self.Rt = self.Rd + self.Ru
 
-        # read reflectance as a function of radius, discard first and last entries
-        self.r = np.genfromtxt(file, delimiter='\t', max_rows=1)[:-2]
-        self.r -= self.r[0]  # set to the left edge of each pixel
-        self.Rdr = np.genfromtxt(file, delimiter='\t', max_rows=1)[1:-1]
-
+        # radii are not needed, reflectance loses first (r) and last (overflow) entries
+        file.readline()
+        self.Rdr = parse_floats(file.readline())[1:-1]
         self.r = np.linspace(0, self.ndr - 2, int(self.ndr - 1)) * self.dr
 
-        # read fluence and extract z values
-        fluence = np.genfromtxt(file)
-        np.place(fluence, fluence == 0, 1e-10)
-        self.z = fluence[:-1, 0]
+        # each row of fluence is z followed by ndr values, the last row and column overflow
+        self.z = np.empty(self.ndz - 1)
+        self.Arz = np.empty((self.ndz - 1, self.ndr - 1))
+        row = 0
+        while row < self.ndz - 1:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunk += file.readline()
+            rows = parse_floats(chunk).reshape(-1, self.ndr + 1)[:self.ndz - 1 - row]
+            fluence = self.Arz[row:row + len(rows)]
+            fluence[:] = rows[:, 1:-1]
+            fluence[fluence == 0] = 1e-10
+            fluence /= 100      # W/mm²
+            self.z[row:row + len(rows)] = rows[:, 0]
+            row += len(rows)
+        if row < self.ndz - 1:
+            raise ValueError('expected %d rows of fluence but found %d' % (self.ndz - 1, row))
         self.z -= self.dz / 2  # set to top of bin
-        self.Arz = fluence[:-1, 1:-1]
 
         # convert to mm
         self.mu_a[0] /= 10         # mm⁻¹
@@ -100,12 +143,40 @@ class MCSub(MCML):
         self.z *= 10            # mm
         self.r *= 10            # mm
         self.Rdr /= 100         # W/mm²
-        self.Arz /= 100         # W/mm²
 
-    def init_from_file(self, fname):
+    def read_buffer(self, buffer):
+        """
+        Read everything from the contents of an mcsub output file.
+
+        Args:
+            buffer (bytes or mmap): The contents of the output file.
+        """
+        self.init_from_mcsub_file(io.BytesIO(buffer))
+
+    def read_file(self, fname, lazy=False):
+        """
+        Read an mcsub output file, raising an exception if that fails.
+
+        Args:
+            fname (str): The name of the output file.
+            lazy (bool): Ignored, mcsub files have no sections.
+        """
+        with open(fname, 'rb') as file:
+            self.init_from_mcsub_file(file)
+
+    def init_from_file(self, fname, cache=None):
+        """
+        Read an mcsub output file.
+
+        Args:
+            fname (str): The name of the output file.
+            cache (Cache or bool): Use this on-disk cache (True for the default one).
+        """
         try:
-            with open(fname, 'r', encoding='utf8') as file:
-                self.init_from_mcsub_file(file)
+            if cache:
+                get_cache(cache).load(self, fname)
+            else:
+                self.read_file(fname)
 
         except Exception as e:
             print(f"Failed to initialize from file {fname} with error: {e}")
@@ -135,16 +206,20 @@ class MCSub(MCML):
                  (self.x_source, self.y_source, self.z_source)
         return s
 
-    def add_plot_text(self, top=0.95):
+    def add_plot_text(self, top=0.95, ax=None):
+        if ax is None:
+            import matplotlib.pyplot as plt
+            ax = plt.gca()
+
         dv = 0.06
         v = top
         s = r'$\mu_s$ = %.2f mm⁻¹' % self.mu_s[0]
-        plt.text(0.95, v, s, ha='right', va='top', transform=plt.gca().transAxes)
+        ax.text(0.95, v, s, ha='right', va='top', transform=ax.transAxes)
         s = r'$\mu_a$ = %.2f mm⁻¹' % self.mu_a[0]
-        plt.text(0.95, v - dv, s, ha='right', va='top', transform=plt.gca().transAxes)
+        ax.text(0.95, v - dv, s, ha='right', va='top', transform=ax.transAxes)
         s = r'g = %.3f' % self.g[0]
-        plt.text(0.95, v - 2 * dv, s, ha='right', va='top', transform=plt.gca().transAxes)
+        ax.text(0.95, v - 2 * dv, s, ha='right', va='top', transform=ax.transAxes)
         s = r'n$_{tissue}$ = %.3f' % self.n[0]
-        plt.text(0.95, v - 3 * dv, s, ha='right', va='top', transform=plt.gca().transAxes)
+        ax.text(0.95, v - 3 * dv, s, ha='right', va='top', transform=ax.transAxes)
         s = r'n$_{env}$ = %.3f' % self.n_above
-        plt.text(0.95, v - 4 * dv, s, ha='right', va='top', transform=plt.gca().transAxes)
+        ax.text(0.95, v - 4 * dv, s, ha='right', va='top', transform=ax.transAxes)
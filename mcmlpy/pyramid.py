@@ -0,0 +1,173 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+"""
+Multi-resolution pyramids of large grids for plotting.
+
+A grid with millions of bins (Arz, Rdra or a time resolved tally) has far
+more bins than a plot has pixels.  A `Pyramid` holds log10 of the grid and
+copies reduced by 2, 4, 8, ... along each axis by taking the maximum (so
+that peaks stay visible) or the mean of the logarithms of each block.  The
+levels are built on first use, and a plot asks for the coarsest level that
+still has at least one bin per pixel over the part of the grid it shows, so
+the cost of drawing depends on the number of pixels rather than bins::
+
+    mcml = mcmlpy.load('big.mco')
+    pyramid = mcml.pyramid('Arz')
+    level = pyramid.view((400, 600))               # whole grid on 400 x 600 pixels
+    level = pyramid.view((400, 600), ((0, 100), (0, 2000)))   # zoomed in
+    print(level.factor, level.values.shape)
+"""
+
+from collections import namedtuple
+import numpy as np
+
+__all__ = ['Pyramid',
+           'Level',
+           'pool',
+           'POOL_METHODS'
+          ]
+
+POOL_METHODS = ('max', 'mean')
+
+Level = namedtuple('Level', ['values', 'factor', 'start', 'stop'])
+Level.__doc__ = """
+Part of one level of a `Pyramid`.
+
+Attributes:
+    values (numpy.ndarray): log10 of the grid, reduced by factor along the pooled axes.
+    factor (int): Number of original bins along each pooled axis in each value.
+    start (tuple): First original bin covered along each pooled axis.
+    stop (tuple): One past the last original bin covered along each pooled axis.
+"""
+
+
+def pool(values, axes=None, method='max'):
+    """
+    Halve the size of the given axes by combining blocks of two bins.
+
+    An odd bin at the end of an axis forms a block by itself.  Values that
+    are not finite (e.g., log10 of zero) are ignored by 'mean' and a block
+    with no finite values is -inf.
+
+    Args:
+        values (numpy.ndarray): The grid.
+        axes (tuple): Axes to reduce; all axes by default.
+        method (str): 'max' or 'mean'.
+
+    Returns:
+        numpy.ndarray with the reduced axes of size ceil(n / 2).
+    """
+    if method not in POOL_METHODS:
+        raise ValueError('method must be one of %s' % ', '.join(POOL_METHODS))
+    values = np.asarray(values, dtype=float)
+    axes = tuple(range(values.ndim)) if axes is None else tuple(a % values.ndim for a in axes)
+
+    pad = [(0, values.shape[a] % 2 if a in axes else 0) for a in range(values.ndim)]
+    padded = np.pad(values, pad, constant_values=-np.inf)
+    shape = []
+    for a, n in enumerate(padded.shape):
+        shape += [n // 2, 2] if a in axes else [n]
+    blocks = padded.reshape(shape)
+    block_axes = tuple(a + 1 + sum(1 for b in axes if b < a) for a in axes)
+
+    if method == 'max':
+        return np.max(blocks, axis=block_axes)
+    finite = np.isfinite(blocks)
+    count = np.sum(finite, axis=block_axes)
+    total = np.sum(np.where(finite, blocks, 0), axis=block_axes)
+    out = np.full(total.shape, -np.inf)
+    return np.divide(total, count, out=out, where=count > 0)
+
+
+class Pyramid:
+    """
+    log10 of a grid at full resolution and reduced by powers of two.
+
+    Args:
+        values (array_like): The grid, e.g., Arz or Rdra.
+        method (str): 'max' or 'mean' pooling of the logarithms.
+        axes (tuple): Axes that are reduced; all axes by default.
+    """
+    def __init__(self, values, method='max', axes=None):
+        if method not in POOL_METHODS:
+            raise ValueError('method must be one of %s' % ', '.join(POOL_METHODS))
+        self.values = np.asarray(values)
+        self.method = method
+        ndim = self.values.ndim
+        self.axes = tuple(range(ndim)) if axes is None else tuple(a % ndim for a in axes)
+        self.shape = tuple(self.values.shape[a] for a in self.axes)
+        self.levels = []
+
+    def __len__(self):
+        """Number of levels down to a single bin along every pooled axis."""
+        return 1 + int(np.ceil(np.log2(max(self.shape + (1,)))))
+
+    def level(self, k):
+        """
+        Return level k, reduced by a factor 2**k along each pooled axis.
+
+        Args:
+            k (int): Level, 0 is the full grid.
+
+        Returns:
+            Read-only numpy.ndarray of log10 values.
+        """
+        k = min(max(int(k), 0), len(self) - 1)
+        if not self.levels:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                base = np.log10(self.values.astype(float))
+            base.flags.writeable = False
+            self.levels.append(base)
+        while len(self.levels) <= k:
+            reduced = pool(self.levels[-1], self.axes, self.method)
+            reduced.flags.writeable = False
+            self.levels.append(reduced)
+        return self.levels[k]
+
+    def select(self, bins):
+        """
+        Return the coarsest level with at least the given number of bins.
+
+        Args:
+            bins (tuple): Bins wanted along each pooled axis, e.g., pixels.
+
+        Returns:
+            The level k (0 when even the full grid has fewer bins).
+        """
+        k = 0
+        while k + 1 < len(self) and all(
+                -(-n // 2**(k + 1)) >= b for n, b in zip(self.shape, bins)):
+            k += 1
+        return k
+
+    def view(self, pixels, window=None):
+        """
+        Return the part of the level that matches a plot.
+
+        Args:
+            pixels (tuple): Size of the plot in pixels along each pooled axis.
+            window (tuple, optional): (start, stop) original bins shown along
+                each pooled axis; the whole grid by default.
+
+        Returns:
+            `Level` with the values covering the window.
+        """
+        if window is None:
+            window = tuple((0, n) for n in self.shape)
+        clipped = []
+        for (lo, hi), n in zip(window, self.shape):
+            lo = int(np.clip(lo, 0, n - 1))
+            clipped.append((lo, int(np.clip(np.ceil(hi), lo + 1, n))))
+        window = clipped
+        bins = tuple(p * n / (hi - lo) for p, n, (lo, hi) in zip(pixels, self.shape, window))
+        k = self.select(bins)
+        factor = 2**k
+
+        index = [slice(None)] * self.values.ndim
+        start, stop = [], []
+        for a, (lo, hi), n in zip(self.axes, window, self.shape):
+            first, last = lo // factor, -(-hi // factor)
+            index[a] = slice(first, last)
+            start.append(first * factor)
+            stop.append(min(last * factor, n))
+        return Level(self.level(k)[tuple(index)], factor, tuple(start), tuple(stop))
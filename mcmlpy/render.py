@@ -0,0 +1,201 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+# pylint: disable=broad-exception-caught
+"""
+Render previews of many MCML results to image files without a display.
+
+Figures are drawn with the Agg canvas and never registered with pyplot, so
+nothing is left open after a file is written.  Each process keeps one figure
+per kind of plot and updates its artists (the image, colour limits, lines,
+labels) for every result instead of building a new figure, and the files
+are shared out over a pool of processes::
+
+    stats = mcmlpy.render_many(glob.glob('sweep/*.mco'), 'previews', kind='fluence')
+    print('%d figures at %.1f figures/s' % (len(stats.files), stats.figures_per_second))
+    for failure in stats.failures:
+        print(failure.path, failure.error)
+"""
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from mcmlpy.batch import LoadFailure
+from mcmlpy.loader import load
+
+__all__ = ['render_many',
+           'Renderer',
+           'RenderStats',
+           'RENDER_KINDS'
+          ]
+
+RENDER_KINDS = ('fluence', 'reflectance', 'transmittance')
+
+RenderStats = namedtuple('RenderStats', ['files', 'failures', 'seconds', 'figures_per_second'])
+RenderStats.__doc__ = """
+Summary of a call to `render_many`.
+
+Attributes:
+    files (list): Names of the files written, in the order of the sources.
+    failures (list): A `LoadFailure` for every source that was not rendered.
+    seconds (float): Wall clock time taken.
+    figures_per_second (float): Files written per second.
+"""
+
+
+def _exponent(x, pos):  # used to label colorbar
+    return r'$10^{%g}$' % x
+
+
+class Renderer:
+    """
+    One figure that is redrawn for each result and saved to a file.
+
+    Args:
+        kind (str): 'fluence', 'reflectance' or 'transmittance'.
+        figsize (tuple): Size of the figure in inches.
+        dpi (int): Resolution of raster files.
+        min_val (float): Smallest fluence shown (see `MCML.plot_fluence`).
+    """
+    def __init__(self, kind='fluence', figsize=(8, 4.5), dpi=100, min_val=1e-8):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.ticker import FuncFormatter
+        from matplotlib import colors, colormaps
+
+        if kind not in RENDER_KINDS:
+            raise ValueError('kind must be one of %s' % ', '.join(RENDER_KINDS))
+        self.kind = kind
+        self.dpi = dpi
+        self.min_val = min_val
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.labels = []
+
+        if kind == 'fluence':
+            cmap = colormaps['gist_ncar'].with_extremes(bad='black')
+            self.image = self.ax.imshow(np.zeros((1, 1)), aspect='auto', cmap=cmap,
+                                        interpolation='none', norm=colors.Normalize())
+            colorbar = self.figure.colorbar(self.image, ax=self.ax, fraction=0.03, pad=0.02)
+            colorbar.formatter = FuncFormatter(_exponent)
+            self.ax.set_title('Fluence Rate [W/mm²]')
+            self.ax.set_xlabel('r (mm)')
+            self.ax.set_ylabel('z (mm)')
+        else:
+            self.line, = self.ax.plot([], [], 'ob', markersize=2)
+            self.ax.set_title('1W incident beam')
+            self.ax.set_xlabel('Radius (mm)')
+            which = 'Reflected' if kind == 'reflectance' else 'Transmitted'
+            self.ax.set_ylabel('%s Excitance (W/mm²)' % which)
+
+    def update(self, mcml):
+        """
+        Show the results of one run.
+
+        Args:
+            mcml (MCML): The results to draw.
+        """
+        if self.kind == 'fluence':
+            if np.ndim(mcml.Arz) != 2 or min(np.shape(mcml.Arz)) < 2:
+                raise ValueError('No valid Arz absorption matrix')
+            bbox = self.ax.get_window_extent()
+            masked, extent, zmin, zmax = mcml.fluence_image(self.min_val, (bbox.height, bbox.width))
+            self.image.set_data(masked)
+            self.image.set_extent(extent)
+            self.image.set_clim(zmin, max(zmax, zmin + 1))
+            self.ax.set_ylim(mcml.z.max(), -0.1 * mcml.z.max())
+            top = 0.9
+        else:
+            values = mcml.Rdr if self.kind == 'reflectance' else mcml.Ttr
+            if values is None or len(values) == 0:
+                raise ValueError('No valid %s array' % self.kind)
+            self.line.set_data(*mcml.mirrored(values))
+            self.ax.relim()
+            self.ax.autoscale_view()
+            top = 0.98
+
+        for label in self.labels:
+            label.remove()
+        before = len(self.ax.texts)
+        mcml.add_plot_text(top, ax=self.ax)
+        self.labels = list(self.ax.texts[before:])
+
+    def save(self, fname):
+        """Write the figure; the format follows the extension, e.g., .png or .svg."""
+        self.figure.savefig(fname, dpi=self.dpi)
+
+    def render(self, mcml, fname):
+        """Draw the results of one run and write them to fname."""
+        self.update(mcml)
+        self.save(fname)
+
+
+# one renderer for each setup used in this process
+_RENDERERS = {}
+
+
+def _render_one(args):
+    """Load (if needed) and render one result in a worker."""
+    source, fname, setup = args
+    path = os.fspath(source) if isinstance(source, (str, os.PathLike)) else fname
+    try:
+        if setup not in _RENDERERS:
+            _RENDERERS[setup] = Renderer(*setup)
+        mcml = load(source) if isinstance(source, (str, os.PathLike)) else source
+        _RENDERERS[setup].render(mcml, fname)
+        return fname, None
+    except Exception as e:
+        return None, LoadFailure(path, type(e).__name__, str(e))
+
+
+def render_many(sources, directory='.', kind='fluence', fmt='png', workers=None,
+                figsize=(8, 4.5), dpi=100, min_val=1e-8, chunksize=4):
+    """
+    Write a preview of each result to an image file using a pool of processes.
+
+    Args:
+        sources (list): File names (any format known to `load`) or MCML objects.
+        directory (str): Where the images are written.
+        kind (str): 'fluence', 'reflectance' or 'transmittance'.
+        fmt (str): Image format, e.g., 'png' or 'svg'.
+        workers (int): Number of processes (1 renders in this process).
+        figsize (tuple): Size of the figures in inches.
+        dpi (int): Resolution of raster images.
+        min_val (float): Smallest fluence shown.
+        chunksize (int): Number of results sent to a worker at a time.
+
+    Returns:
+        `RenderStats` with the files written, failures and figures per second.
+    """
+    if kind not in RENDER_KINDS:
+        raise ValueError('kind must be one of %s' % ', '.join(RENDER_KINDS))
+    os.makedirs(directory, exist_ok=True)
+    setup = (kind, tuple(figsize), dpi, min_val)
+    jobs = []
+    for i, source in enumerate(sources):
+        if isinstance(source, (str, os.PathLike)):
+            stem = os.path.splitext(os.path.basename(os.fspath(source)))[0]
+        else:
+            stem = 'figure-%05d' % i
+        fname = os.path.join(directory, '%s-%s.%s' % (stem, kind, fmt))
+        jobs.append((source, fname, setup))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1 or len(jobs) < 2:
+        results = list(map(_render_one, jobs))
+    else:
+        # figures copied from this process by fork must not be reused
+        with ProcessPoolExecutor(max_workers=workers, initializer=_RENDERERS.clear) as pool:
+            results = list(pool.map(_render_one, jobs, chunksize=chunksize))
+    seconds = time.perf_counter() - start
+
+    files = [fname for fname, _ in results if fname is not None]
+    failures = [failure for _, failure in results if failure is not None]
+    rate = len(files) / seconds if seconds > 0 else 0.0
+    return RenderStats(files, failures, seconds, rate)
@@ -0,0 +1,118 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-arguments
+# pylint: disable=consider-using-f-string
+"""
+Resample cylindrical (r, z) grids onto Cartesian voxels.
+
+Values such as `Arz` or the fluence are given at the centres of the radial
+and depth bins.  Each voxel centre is found by bilinear interpolation in
+(r, z), where r is its distance from the beam axis.  The interpolation is
+separable, so only two depth indices and weights per output depth and two
+radial indices and weights per output column (x or (x, y)) are needed.
+These are computed once for each combination of input and output grids and
+cached, so that many runs with the same geometry are resampled with a pair
+of gathers each, or all at once when they are stacked::
+
+    mcml = mcmlpy.load('sample.mco')
+    xz = mcml.cartesian(0.05)                    # slice through the axis
+    xyz = mcml.cartesian(0.1, volume=True, fluence=True)
+    print(xyz.values.shape, xyz.x[0], xyz.z[-1])
+
+    batch = mcmlpy.load_many(paths)
+    xz = mcmlpy.to_cartesian(batch['Arz'][..., :ndr - 1], dr, dz, 0.05)
+"""
+
+import functools
+from collections import namedtuple
+import numpy as np
+
+__all__ = ['to_cartesian',
+           'cartesian_weights',
+           'Cartesian'
+          ]
+
+Cartesian = namedtuple('Cartesian', ['values', 'x', 'y', 'z'])
+Cartesian.__doc__ = """
+Values resampled onto a Cartesian grid.
+
+Attributes:
+    values (numpy.ndarray): Shape (..., nz, nx) for a slice through the axis
+        or (..., nz, ny, nx) for a volume.
+    x (numpy.ndarray): Centre of each column (mm), symmetric about the axis.
+    y (numpy.ndarray): Centre of each row of a volume (empty for a slice).
+    z (numpy.ndarray): Depth of the centre of each layer of voxels (mm).
+"""
+
+
+def _axis_weights(position, size, n):
+    """Return (i0, i1, w0, w1) interpolating between the centres of n bins."""
+    f = np.clip(position / size - 0.5, 0, n - 1)
+    i0 = np.minimum(np.floor(f).astype(np.intp), max(n - 2, 0))
+    i1 = np.minimum(i0 + 1, n - 1)
+    w1 = f - i0
+    w0 = 1 - w1
+    outside = position >= n * size
+    w0[outside] = 0
+    w1[outside] = 0
+    for a in (i0, i1, w0, w1):
+        a.flags.writeable = False
+    return i0, i1, w0, w1
+
+
+@functools.lru_cache(maxsize=64)
+def cartesian_weights(dr, dz, nr, nz, dx, nx, dz_out, nz_out, volume=False):
+    """
+    Return the cached indices and weights that map an (r, z) grid to voxels.
+
+    Args:
+        dr, dz (float): Size of the radial and depth bins of the input.
+        nr, nz (int): Number of radial and depth bins of the input.
+        dx (float): Width of the voxels in x (and y).
+        nx (int): Number of voxels across in x (and y).
+        dz_out (float): Height of the voxels.
+        nz_out (int): Number of voxels in depth.
+        volume (bool): Columns over (y, x) instead of x alone.
+
+    Returns:
+        ((z0, z1, wz0, wz1), (r0, r1, wr0, wr1), x, z) with read-only arrays.
+        Points beyond the input grid get zero weights.
+    """
+    x = (np.arange(nx) - (nx - 1) / 2) * dx
+    z = (np.arange(nz_out) + 0.5) * dz_out
+    rho = np.hypot(x[:, None], x[None, :]) if volume else np.abs(x)
+    for a in (x, z):
+        a.flags.writeable = False
+    return _axis_weights(z, dz, nz), _axis_weights(rho, dr, nr), x, z
+
+
+def to_cartesian(values, dr, dz, voxel, half_width=None, depth=None, volume=False):
+    """
+    Resample values on an (r, z) grid onto a Cartesian slice or volume.
+
+    Args:
+        values (array_like): Values at bin centres, shape (..., nz, nr); any
+            leading axes (e.g., stacked runs) are kept.
+        dr, dz (float): Size of the radial and depth bins (mm).
+        voxel (float or tuple): Voxel size (mm), or (width, height).
+        half_width (float, optional): Extent from the axis in x and y;
+            defaults to the radial extent of the grid.
+        depth (float, optional): Depth of the output; defaults to that of the grid.
+        volume (bool): Return an x-y-z volume instead of the x-z slice through the axis.
+
+    Returns:
+        `Cartesian` with the values and voxel centres.
+    """
+    values = np.asarray(values, dtype=float)
+    nz, nr = values.shape[-2:]
+    dx, dz_out = (voxel, voxel) if np.ndim(voxel) == 0 else voxel
+    half_width = nr * dr if half_width is None else half_width
+    depth = nz * dz if depth is None else depth
+    nx = max(int(round(2 * half_width / dx)), 1)
+    nz_out = max(int(round(depth / dz_out)), 1)
+
+    (z0, z1, wz0, wz1), (r0, r1, wr0, wr1), x, z = cartesian_weights(
+        float(dr), float(dz), nr, nz, float(dx), nx, float(dz_out), nz_out, bool(volume))
+
+    rows = values[..., z0, :] * wz0[:, None] + values[..., z1, :] * wz1[:, None]
+    resampled = rows[..., r0] * wr0 + rows[..., r1] * wr1
+    return Cartesian(resampled, x, x if volume else np.array([]), z)
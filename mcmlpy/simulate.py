@@ -0,0 +1,661 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-locals
+# pylint: disable=too-many-instance-attributes
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-statements
+# pylint: disable=consider-using-f-string
+"""
+Monte Carlo simulation of light transport in layered media.
+
+This follows the algorithm of MCML (hop, drop, spin, Fresnel reflection at
+boundaries and Russian roulette) but moves a whole batch of photon packets
+at once with NumPy array operations.  When a packet dies a new one is
+launched in its place so the batch stays full until the photon budget is
+used up.  The result is an `MCMLV1` object with the same tallies and units
+as one read from a V1 .mco file.
+
+Example::
+
+    sim = mcmlpy.Simulation(n=[1.4], mu_a=[0.1], mu_s=[10], g=[0.9], d=[1],
+                            dz=0.01, dr=0.01, ndz=100, ndr=100, nda=30)
+    mcml = sim.run(100000, seed=1)
+    print(mcml.Rd, mcml.Tt)
+    mcml.plot_fluence()
+
+    mcml = sim.run_until(0.001, max_time=60)
+    print(mcml.Rd, mcml.Rd_err, mcml.photons)
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from mcmlpy.mcmlv1 import MCMLV1
+
+__all__ = ['Simulation',
+           'Tally',
+           'WhiteRun',
+           'fresnel_reflection'
+          ]
+
+_FLUSH_SIZE = 1 << 20
+ESTIMATES = ('Rd', 'Td', 'Tt', 'absorbed', 'Az', 'Rdr', 'Rda', 'Ttr', 'Tta', 'Arz', 'Rdra', 'Ttra')
+
+
+def fresnel_reflection(n_i, n_t, cos_i):
+    """
+    Return the unpolarized Fresnel reflection at a boundary.
+
+    Args:
+        n_i (float or numpy.ndarray): Index of refraction of the incident medium.
+        n_t (float or numpy.ndarray): Index of refraction of the transmitting medium.
+        cos_i (float or numpy.ndarray): Cosine of the angle of incidence.
+
+    Returns:
+        tuple of arrays with the reflection and the cosine of the transmitted angle.
+    """
+    n_i, n_t, cos_i = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (n_i, n_t, cos_i)))
+    sin_i = np.sqrt(np.maximum(0, 1 - cos_i**2))
+    sin_t = n_i / n_t * sin_i
+    cos_t = np.sqrt(np.maximum(0, 1 - sin_t**2))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cap = cos_i * cos_t - sin_i * sin_t    # cos(a + b)
+        cam = cos_i * cos_t + sin_i * sin_t    # cos(a - b)
+        sap = sin_i * cos_t + cos_i * sin_t    # sin(a + b)
+        sam = sin_i * cos_t - cos_i * sin_t    # sin(a - b)
+        r = 0.5 * sam**2 * (cam**2 + cap**2) / (sap**2 * cam**2)
+
+    normal = cos_i > 1 - 1e-12
+    r = np.where(normal, ((n_t - n_i) / (n_t + n_i))**2, r)
+    r = np.where((sin_t >= 1) | (cos_i < 1e-6), 1.0, r)
+    r = np.where(n_i == n_t, 0.0, r)
+    cos_t = np.where(n_i == n_t, cos_i, cos_t)
+    return r, cos_t
+
+
+class Tally:
+    """
+    Unnormalized weights scored during a simulation.
+
+    The arrays are indexed like the sections of an .mco file, i.e., the
+    radial index comes first.  Packets outside the grid are scored in the
+    last radial, depth or angle bin.
+
+    Attributes:
+        photons (int): Number of photon packets launched.
+        Al (numpy.ndarray): Weight absorbed in each layer.
+        Arz (numpy.ndarray): Weight absorbed in each (r, z) bin.
+        Rdra (numpy.ndarray): Weight escaping the top in each (r, angle) bin.
+        Ttra (numpy.ndarray): Weight escaping the bottom in each (r, angle) bin.
+    """
+    def __init__(self, num_layers, ndz, ndr, nda):
+        self.photons = 0
+        self.Al = np.zeros(num_layers)
+        self.Arz = np.zeros((ndr, ndz))
+        self.Rdra = np.zeros((ndr, nda))
+        self.Ttra = np.zeros((ndr, nda))
+
+    def add(self, other):
+        """Add the weights (and photons) of another tally to this one."""
+        self.photons += other.photons
+        self.Al += other.Al
+        self.Arz += other.Arz
+        self.Rdra += other.Rdra
+        self.Ttra += other.Ttra
+        return self
+
+
+class _Scores:
+    """Buffers (bin, weight) pairs and adds them to an array with bincount."""
+    def __init__(self, array):
+        self.array = array
+        self.bins = []
+        self.weights = []
+        self.count = 0
+
+    def add(self, bins, weights):
+        self.bins.append(bins)
+        self.weights.append(weights)
+        self.count += len(bins)
+        if self.count > _FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.count:
+            flat = self.array.reshape(-1)
+            flat += np.bincount(np.concatenate(self.bins), np.concatenate(self.weights),
+                                minlength=flat.size)
+        self.bins, self.weights, self.count = [], [], 0
+
+
+class WhiteRun:
+    """
+    Path lengths of the escaping packets of a simulation without absorption.
+
+    Because absorption does not change where packets go, the result for any
+    absorption coefficients follows from weighting each escaping packet by
+    exp(-sum(mu_a * path)) (Beer-Lambert).  Every escaping packet is stored
+    as one row of a few flat arrays.
+
+    Attributes:
+        simulation (Simulation): The simulation that was run.
+        photons (int): Number of packets launched.
+        max_path (float): Packets travelling farther than this (mm) were dropped.
+        paths (numpy.ndarray): Path length in each layer, shape (packets, num_layers).
+        weight (numpy.ndarray): Weight of each packet when it escaped.
+        bins (numpy.ndarray): (side * ndr + ir) * nda + ia where side is 0 for
+            reflection and 1 for transmission.
+    """
+    def __init__(self, simulation, max_path=None):
+        self.simulation = simulation
+        self.photons = 0
+        self.max_path = max_path
+        self.paths = np.zeros((0, simulation.num_layers), dtype=np.float32)
+        self.weight = np.zeros(0, dtype=np.float32)
+        self.bins = np.zeros(0, dtype=np.int32)
+        self._parts = []
+
+    def add(self, paths, weight, bins):
+        """Record escaping packets (used by `Simulation.transport`)."""
+        self._parts.append((paths.astype(np.float32), weight.astype(np.float32),
+                            bins.astype(np.int32)))
+
+    def finish(self):
+        """Move the recorded packets into the arrays, sorted by bin."""
+        if self._parts:
+            parts = [self.paths, self.weight, self.bins]
+            for i in range(3):
+                parts[i] = np.concatenate([parts[i]] + [p[i] for p in self._parts])
+            order = np.argsort(parts[2], kind='stable')
+            self.paths, self.weight, self.bins = (a[order] for a in parts)
+            self._parts = []
+        return self
+
+    def rescale(self, mu_a):
+        """
+        Return the results for other absorption coefficients.
+
+        Args:
+            mu_a (array_like): Absorption coefficient (mm⁻¹) of each layer, or a
+                two-dimensional array with one set of coefficients per row.
+
+        Returns:
+            `MCMLV1` (or a list of them for two-dimensional mu_a) with Rd, Tt,
+            absorbed, Rdr, Rda, Rdra, Ttr, Tta and Ttra.  Az and Arz are empty.
+        """
+        self.finish()
+        sim = self.simulation
+        mu = np.asarray(mu_a, dtype=float)
+        single = mu.ndim == 1
+        mu = np.atleast_2d(mu)
+        if mu.shape[1] != sim.num_layers:
+            raise ValueError('mu_a must have one value for each of the %d layers' % sim.num_layers)
+
+        size = sim.ndr * sim.nda
+        scores = np.zeros((2 * size, len(mu)))
+        if len(self.bins):
+            weights = np.exp(-(self.paths @ mu.T)) * self.weight[:, None]
+            first = np.flatnonzero(np.diff(self.bins, prepend=-1))
+            scores[self.bins[first]] = np.add.reduceat(weights, first, axis=0)
+
+        results = []
+        for k, row in enumerate(mu):
+            tally = sim.new_tally()
+            tally.photons = self.photons
+            tally.Rdra = scores[:size, k].reshape(sim.ndr, sim.nda)
+            tally.Ttra = scores[size:, k].reshape(sim.ndr, sim.nda)
+            mcml = sim.result(tally)
+            mcml.mu_a = row.copy()
+            mcml.absorbed = 1 - mcml.Rsp - mcml.Rd - mcml.Tt
+            mcml.Az = np.array([])
+            mcml.Arz = np.array([])
+            results.append(mcml)
+        return results[0] if single else results
+
+
+def _transport_part(args):
+    """Simulate one worker's share of the packets and return its tally."""
+    sim, photons, seed = args
+    return sim.transport(photons, np.random.default_rng(seed), sim.new_tally())
+
+
+class Simulation:
+    """
+    Monte Carlo simulation of a pencil beam normally incident on layered tissue.
+
+    Lengths are in mm and coefficients in mm⁻¹ (the units of the attributes of
+    `MCML` objects).  The last layer may be infinitely thick.
+
+    Attributes:
+        n, mu_a, mu_s, g, d (numpy.ndarray): Properties of each layer.
+        n_above (float): Refractive index of the medium above the tissue.
+        n_below (float): Refractive index of the medium below the tissue.
+        dz, dr (float): Size of the depth and radial bins.
+        ndz, ndr, nda (int): Number of depth, radial and angle bins.
+        batch (int): Number of photon packets moved together.
+        threshold (float): Packets below this weight play Russian roulette.
+        chance (float): Probability that a packet survives the roulette.
+    """
+    def __init__(self, n, mu_a, mu_s, g, d, n_above=1, n_below=1,
+                 dz=0.1, dr=0.1, ndz=100, ndr=100, nda=30, batch=10000):
+        self.n = np.atleast_1d(np.asarray(n, dtype=float))
+        self.mu_a = np.atleast_1d(np.asarray(mu_a, dtype=float))
+        self.mu_s = np.atleast_1d(np.asarray(mu_s, dtype=float))
+        self.g = np.atleast_1d(np.asarray(g, dtype=float))
+        self.d = np.atleast_1d(np.asarray(d, dtype=float))
+        self.num_layers = len(self.n)
+        for name in ('mu_a', 'mu_s', 'g', 'd'):
+            if len(getattr(self, name)) != self.num_layers:
+                raise ValueError('%s must have one value for each of the %d layers' %
+                                 (name, self.num_layers))
+        if np.any(np.isinf(self.d[:-1])):
+            raise ValueError('only the last layer may be infinitely thick')
+        self.n_above = float(n_above)
+        self.n_below = float(n_below)
+        self.dz = float(dz)
+        self.dr = float(dr)
+        self.ndz = int(ndz)
+        self.ndr = int(ndr)
+        self.nda = int(nda)
+        self.batch = int(batch)
+        self.threshold = 1e-4
+        self.chance = 0.1
+
+    @classmethod
+    def from_mcml(cls, mcml, **kwargs):
+        """
+        Create a simulation with the layers and grid of an MCML object.
+
+        The layer description of a V2 file includes the media above and below
+        the sample as infinitely thick first and last layers; these become
+        `n_above` and `n_below`.
+
+        Args:
+            mcml (MCML): Object read from an .mco file.
+            **kwargs: Attributes to change, e.g., batch=100000.
+
+        Returns:
+            `Simulation`
+        """
+        n, mu_a, mu_s, g, d = (np.asarray(getattr(mcml, a), dtype=float)
+                               for a in ('n', 'mu_a', 'mu_s', 'g', 'd'))
+        n_above, n_below = mcml.n_above, mcml.n_below
+        if len(d) > 2 and np.isinf(d[0]) and np.isinf(d[-1]):
+            n_above, n_below = n[0], n[-1]
+            n, mu_a, mu_s, g, d = (a[1:-1] for a in (n, mu_a, mu_s, g, d))
+        args = dict(n_above=n_above, n_below=n_below, dz=mcml.dz, dr=mcml.dr,
+                    ndz=mcml.ndz, ndr=mcml.ndr, nda=max(int(mcml.nda), 1))
+        args.update(kwargs)
+        return cls(n, mu_a, mu_s, g, d, **args)
+
+    def clear_top(self):
+        """Return True if the first layer neither absorbs nor scatters (e.g., glass)."""
+        return self.num_layers > 1 and self.mu_a[0] == 0 and self.mu_s[0] == 0
+
+    def specular(self):
+        """
+        Return the specular reflection at the top surface.
+
+        As in MCML, when the first layer is clear the reflections from both of
+        its surfaces are included and packets are launched into the second layer.
+        """
+        r1 = float(fresnel_reflection(self.n_above, self.n[0], 1.0)[0])
+        if not self.clear_top():
+            return r1
+        r2 = float(fresnel_reflection(self.n[0], self.n[1], 1.0)[0])
+        return r1 + (1 - r1)**2 * r2 / (1 - r1 * r2)
+
+    def new_tally(self):
+        """Return an empty `Tally` for this geometry."""
+        return Tally(self.num_layers, self.ndz, self.ndr, self.nda)
+
+    def transport(self, photons, rng, tally, record=None):
+        """
+        Launch photon packets and follow them until they escape or die.
+
+        When `record` is given absorption is ignored (white Monte Carlo) and
+        the path length in each layer of every escaping packet is recorded.
+
+        Args:
+            photons (int): Number of packets to launch.
+            rng (numpy.random.Generator): Source of random numbers.
+            tally (Tally): Scores are added to this.
+            record (WhiteRun, optional): Escaping packets are added to this.
+
+        Returns:
+            tally
+        """
+        last = self.num_layers - 1
+        n = np.concatenate(([self.n_above], self.n, [self.n_below]))
+        mu_a = self.mu_a if record is None else np.zeros(self.num_layers)
+        mu_t = mu_a + self.mu_s
+        with np.errstate(divide='ignore', invalid='ignore'):
+            absorb = np.where(mu_t > 0, mu_a / mu_t, 0)
+        edges = np.concatenate(([0], np.cumsum(self.d)))
+        z_top, z_bot = edges[:-1], edges[1:]
+        da = np.pi / 2 / self.nda
+        w0 = 1 - self.specular()
+        start = 1 if self.clear_top() else 0
+
+        A = _Scores(tally.Arz)
+        R = _Scores(tally.Rdra)
+        T = _Scores(tally.Ttra)
+
+        empty = np.zeros(0)
+        x, y, z, ux, uy, uz, w, s = (empty,) * 8
+        layer = np.zeros(0, dtype=int)
+        paths = np.zeros((0, self.num_layers))
+        launched = 0
+
+        while True:
+            new = min(self.batch - len(w), photons - launched)
+            if new > 0:
+                zeros = np.zeros(new)
+                x, y, ux, uy, s = (np.concatenate((a, zeros)) for a in (x, y, ux, uy, s))
+                z = np.concatenate((z, np.full(new, z_top[start])))
+                uz = np.concatenate((uz, np.ones(new)))
+                w = np.concatenate((w, np.full(new, w0)))
+                layer = np.concatenate((layer, np.full(new, start)))
+                if record is not None:
+                    paths = np.concatenate((paths, np.zeros((new, self.num_layers))))
+                launched += new
+            if len(w) == 0:
+                break
+
+            # hop: a new dimensionless step for packets that have used theirs
+            need = s == 0
+            s[need] = -np.log(1 - rng.random(np.count_nonzero(need)))
+            mt = mu_t[layer]
+            step = np.full(len(w), np.inf)
+            np.divide(s, mt, out=step, where=mt > 0)
+
+            dist = np.full(len(w), np.inf)
+            down = uz > 0
+            up = uz < 0
+            dist[down] = (z_bot[layer[down]] - z[down]) / uz[down]
+            dist[up] = (z_top[layer[up]] - z[up]) / uz[up]
+            hit = dist <= step
+            step = np.minimum(step, dist)
+            x += step * ux
+            y += step * uy
+            z += step * uz
+            s = np.where(hit, np.maximum(s - step * mt, 0), 0)
+            if record is not None:
+                paths[np.arange(len(w)), layer] += step
+                if record.max_path is not None:
+                    w[paths.sum(axis=1) > record.max_path] = 0
+
+            # drop and spin at interaction sites
+            i = np.flatnonzero(~hit)
+            if len(i):
+                li = layer[i]
+                if record is None:
+                    dw = w[i] * absorb[li]
+                    w[i] -= dw
+                    ir = np.minimum(np.hypot(x[i], y[i]) / self.dr, self.ndr - 1).astype(int)
+                    iz = np.minimum(z[i] / self.dz, self.ndz - 1).astype(int)
+                    A.add(ir * self.ndz + iz, dw)
+                    tally.Al += np.bincount(li, dw, minlength=self.num_layers)
+                ux[i], uy[i], uz[i] = self._spin(ux[i], uy[i], uz[i], self.g[li], rng)
+
+            # reflect or cross at boundaries
+            j = np.flatnonzero(hit)
+            if len(j):
+                lj = layer[j]
+                going_down = uz[j] > 0
+                z[j] = np.where(going_down, z_bot[lj], z_top[lj])
+                n_i = n[lj + 1]
+                n_t = np.where(going_down, n[lj + 2], n[lj])
+                r, cos_t = fresnel_reflection(n_i, n_t, np.abs(uz[j]))
+                reflect = rng.random(len(j)) < r
+
+                k = j[reflect]
+                uz[k] = -uz[k]
+
+                cross = ~reflect
+                top = cross & ~going_down & (lj == 0)
+                bottom = cross & going_down & (lj == last)
+                for side, escape, scores in ((0, top, R), (1, bottom, T)):
+                    e = j[escape]
+                    if len(e):
+                        ir = np.minimum(np.hypot(x[e], y[e]) / self.dr, self.ndr - 1).astype(int)
+                        ia = np.minimum(np.arccos(cos_t[escape]) / da, self.nda - 1).astype(int)
+                        scores.add(ir * self.nda + ia, w[e])
+                        if record is not None:
+                            record.add(paths[e], w[e], (side * self.ndr + ir) * self.nda + ia)
+                        w[e] = 0
+
+                inside = cross & ~top & ~bottom
+                k = j[inside]
+                ratio = n_i[inside] / n_t[inside]
+                ux[k] *= ratio
+                uy[k] *= ratio
+                uz[k] = np.where(going_down[inside], cos_t[inside], -cos_t[inside])
+                layer[k] += np.where(going_down[inside], 1, -1)
+
+            # Russian roulette
+            low = np.flatnonzero((w < self.threshold) & (w > 0))
+            if len(low):
+                survive = rng.random(len(low)) < self.chance
+                w[low] = np.where(survive, w[low] / self.chance, 0)
+
+            alive = w > 0
+            if not alive.all():
+                x, y, z, ux, uy, uz, w, s, layer = (a[alive] for a in
+                                                    (x, y, z, ux, uy, uz, w, s, layer))
+                if record is not None:
+                    paths = paths[alive]
+
+        for scores in (A, R, T):
+            scores.flush()
+        tally.photons += photons
+        return tally
+
+    @staticmethod
+    def _spin(ux, uy, uz, g, rng):
+        """Return new directions after Henyey-Greenstein scattering."""
+        xi = rng.random(len(ux))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            temp = (1 - g * g) / (1 - g + 2 * g * xi)
+            cos_theta = np.where(g == 0, 2 * xi - 1, (1 + g * g - temp * temp) / (2 * g))
+        cos_theta = np.clip(cos_theta, -1, 1)
+        sin_theta = np.sqrt(1 - cos_theta**2)
+        psi = 2 * np.pi * rng.random(len(ux))
+        cos_psi = np.cos(psi)
+        sin_psi = np.sin(psi)
+
+        normal = np.abs(uz) > 0.99999
+        temp = np.sqrt(np.where(normal, 1, 1 - uz * uz))
+        new_ux = np.where(normal, sin_theta * cos_psi,
+                          sin_theta * (ux * uz * cos_psi - uy * sin_psi) / temp + ux * cos_theta)
+        new_uy = np.where(normal, sin_theta * sin_psi,
+                          sin_theta * (uy * uz * cos_psi + ux * sin_psi) / temp + uy * cos_theta)
+        new_uz = np.where(normal, np.sign(uz) * cos_theta,
+                          -sin_theta * cos_psi * temp + uz * cos_theta)
+        return new_ux, new_uy, new_uz
+
+    def result(self, tally):
+        """
+        Normalize a tally the way MCML does and return it as an MCMLV1 object.
+
+        Args:
+            tally (Tally): Weights scored by `transport()`.
+
+        Returns:
+            `MCMLV1` with the same attributes as one read from a V1 .mco file.
+        """
+        mcml = MCMLV1()
+        N = max(tally.photons, 1)
+        mcml.photons = tally.photons
+        mcml.dz, mcml.dr = self.dz, self.dr
+        mcml.ndz, mcml.ndr, mcml.nda = self.ndz, self.ndr, self.nda
+        mcml.r = np.linspace(0, self.ndr - 2, int(self.ndr - 1)) * self.dr
+        mcml.z = np.linspace(0, self.ndz - 1, int(self.ndz)) * self.dz
+        mcml.num_layers = self.num_layers
+        mcml.n_above, mcml.n_below = self.n_above, self.n_below
+        mcml.n, mcml.mu_a, mcml.mu_s = self.n.copy(), self.mu_a.copy(), self.mu_s.copy()
+        mcml.g, mcml.d = self.g.copy(), self.d.copy()
+
+        mcml.Rsp = self.specular()
+        mcml.Rd = tally.Rdra.sum() / N
+        mcml.absorbed = tally.Al.sum() / N
+        mcml.Td = tally.Ttra.sum() / N
+        mcml.Ru = mcml.Rsp
+        mcml.Rt = mcml.Rd + mcml.Ru
+        mcml.Tt = mcml.Td
+        mcml.Tu = 0
+
+        da = np.pi / 2 / self.nda
+        a = (np.arange(self.nda) + 0.5) * da
+        area = 2 * np.pi * (np.arange(self.ndr) + 0.5) * self.dr**2
+        solid = 2 * np.pi * np.sin(a) * da
+        projected = 4 * np.pi * np.sin(da / 2) * np.sin(a) * np.cos(a)
+
+        mcml.Az = (tally.Arz.sum(axis=0) / (N * self.dz))[:-1]
+        mcml.Arz = tally.Arz.T / (N * self.dz * area)
+        mcml.Rdr = (tally.Rdra.sum(axis=1) / (N * area))[:-1]
+        mcml.Rda = tally.Rdra.sum(axis=0) / (N * solid)
+        mcml.Rdra = tally.Rdra.T / (N * np.outer(projected, area))
+        mcml.Ttr = (tally.Ttra.sum(axis=1) / (N * area))[:-1]
+        mcml.Tta = tally.Ttra.sum(axis=0) / (N * solid)
+        mcml.Ttra = tally.Ttra.T / (N * np.outer(projected, area))
+        return mcml
+
+    def run(self, photons, seed=None, workers=1):
+        """
+        Simulate photon packets and return the normalized result.
+
+        With more than one worker the packets are split evenly over a pool of
+        processes.  Each worker draws from its own child of
+        `numpy.random.SeedSequence(seed)` and the tallies are added in worker
+        order, so the result is the same every time for a given seed and
+        number of workers.
+
+        Args:
+            photons (int): Number of packets to launch.
+            seed (int, optional): Seed for the random number generator(s).
+            workers (int): Number of processes (None for one per CPU).
+
+        Returns:
+            `MCMLV1` with the reflection, transmission and absorption tallies.
+        """
+        photons = int(photons)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers == 1:
+            rng = np.random.default_rng(seed)
+            return self.result(self.transport(photons, rng, self.new_tally()))
+
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        shares = [photons // workers + (i < photons % workers) for i in range(workers)]
+        tally = self.new_tally()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_transport_part, [(self, n, s) for n, s in zip(shares, seeds)]):
+                tally.add(part)
+        return self.result(tally)
+
+    def run_white(self, photons, seed=None, max_path=None):
+        """
+        Simulate without absorption and record the path lengths of escaping packets.
+
+        The absorption coefficients of the layers are ignored.  Use
+        `WhiteRun.rescale()` to get the results for any set of them.  Packets
+        that travel farther than `max_path` are dropped, so the results are
+        accurate only when exp(-mu_a * max_path) is negligible.  A limit is
+        required if the last layer is infinitely thick.
+
+        Args:
+            photons (int): Number of packets to launch.
+            seed (int, optional): Seed for `numpy.random.default_rng`.
+            max_path (float, optional): Longest path (mm) that is followed.
+
+        Returns:
+            `WhiteRun`
+        """
+        if max_path is None and np.isinf(self.d[-1]):
+            raise ValueError('max_path is needed when the last layer is infinitely thick')
+        record = WhiteRun(self, max_path)
+        self.transport(int(photons), np.random.default_rng(seed), self.new_tally(), record)
+        record.photons = int(photons)
+        return record.finish()
+
+    def run_until(self, rel_error=0.01, photons_per_batch=10000, max_photons=10**7,
+                  max_time=None, bins=None, seed=None, min_batches=5):
+        """
+        Simulate batches of packets until the estimates have converged.
+
+        The spread of the results of the individual batches (batch means) gives
+        the standard error of Rd, Tt, absorbed and of every bin of the arrays.
+        Batches are added until the relative standard error of Rd, Tt,
+        absorbed and of the chosen bins is below `rel_error`, or until the
+        photon or time budget is used up.
+
+        The result has an attribute `X_err` with the standard error of each
+        estimate `X` (e.g., `Rd_err` or `Arz_err`, which has the shape of
+        `Arz`), `batches` with the number of batches simulated and
+        `converged` which is False if a budget ran out first.
+
+        Args:
+            rel_error (float): Target relative standard error.
+            photons_per_batch (int): Number of packets in each batch.
+            max_photons (int): Stop after this many packets.
+            max_time (float, optional): Stop after this many seconds.
+            bins (dict, optional): Indices of array bins that must also converge,
+                e.g., {'Rdr': [0, 10], 'Arz': [(0, 0)]}.
+            seed (int, optional): Seed for `numpy.random.default_rng`.
+            min_batches (int): Never stop before this many batches.
+
+        Returns:
+            `MCMLV1` with the tallies and their standard errors.
+        """
+        rng = np.random.default_rng(seed)
+        bins = bins or {}
+        start = time.perf_counter()
+        total = self.new_tally()
+        sums = {}
+        squares = {}
+        k = 0
+        converged = False
+        while True:
+            tally = self.transport(int(photons_per_batch), rng, self.new_tally())
+            total.add(tally)
+            part = self.result(tally)
+            for name in ESTIMATES:
+                value = np.asarray(getattr(part, name), dtype=float)
+                sums[name] = sums.get(name, 0) + value
+                squares[name] = squares.get(name, 0) + value * value
+            k += 1
+
+            if k >= min_batches:
+                errors = self._batch_errors(sums, squares, k)
+                checks = [(sums[name] / k, errors[name]) for name in ('Rd', 'Tt', 'absorbed')]
+                for name, index in bins.items():
+                    for i in index:
+                        checks.append((sums[name][i] / k, errors[name][i]))
+                converged = all(se <= rel_error * abs(mean) for mean, se in checks
+                                if mean != 0 or se != 0)
+            if converged or total.photons + photons_per_batch > max_photons:
+                break
+            if max_time is not None and time.perf_counter() - start > max_time:
+                break
+
+        mcml = self.result(total)
+        for name, error in self._batch_errors(sums, squares, k).items():
+            setattr(mcml, name + '_err', error)
+        mcml.batches = k
+        mcml.converged = converged
+        return mcml
+
+    @staticmethod
+    def _batch_errors(sums, squares, k):
+        """Return the standard error of the mean of k batch estimates."""
+        errors = {}
+        for name, total in sums.items():
+            if k < 2:
+                errors[name] = np.full(np.shape(total), np.inf)
+                continue
+            variance = np.maximum(squares[name] / k - (total / k)**2, 0) * k / (k - 1)
+            errors[name] = np.sqrt(variance / k)
+        return errors
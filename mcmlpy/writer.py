@@ -0,0 +1,326 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-locals
+# pylint: disable=consider-using-f-string
+"""
+Write MCML objects as V1 or V2 .mco files.
+
+The readers convert lengths to mm; the writers convert back to the cm
+units of the C programs.  One-dimensional arrays lose their last (overflow)
+bin when read, so a zero is written in its place.  Large arrays are
+formatted in bulk, a chunk of lines with one `%` operation, five values per
+line like MCML, and written to the file chunk by chunk.
+
+Example::
+
+    mcml = mcmlpy.MCMLV2()
+    mcml.init_from_file('sample.mco')
+    mcml.write_mco('copy.mco', version=1)
+"""
+
+import io
+import os
+import numpy as np
+
+from mcmlpy.derived import layer_absorption
+
+__all__ = ['write_floats',
+           'write_mco_file',
+           'mco_text'
+          ]
+
+_LINES_PER_CHUNK = 100000
+
+V1_HEADER = """A1 \t# Version number of the file format.
+
+####
+# Data categories include:
+# InParm, RAT,
+# A_l, A_z, Rd_r, Rd_a, Tt_r, Tt_a,
+# A_rz, Rd_ra, Tt_ra
+####
+
+# User time:        0 sec =     0.00 hr.   Simulation time of this run.
+
+InParm \t\t\t# Input parameters. cm is used.
+%(name)s \tA\t\t# output file name, ASCII.
+%(photons)d \t\t\t# No. of photons
+%(dz).10g\t%(dr).10g\t\t# dz, dr [cm]
+%(ndz)d\t%(ndr)d\t%(nda)d\t# No. of dz, dr, da.
+
+%(num_layers)d\t\t\t\t\t# Number of layers
+#n\tmua\tmus\tg\td\t# One line for each layer
+%(n_above).10g\t\t\t\t\t# n for medium above
+%(layers)s%(n_below).10g\t\t\t\t\t# n for medium below
+
+"""
+
+V2_HEADER = """mcmloA2.0 \t# Version number of the file format.
+
+####
+# Data categories include:
+# InParam, RAT,
+# Rd_r\tRd_a\tRd_ra\tRd_t\tRd_rt\tRd_at\tRd_rat
+# Td_r\tTd_a\tTd_ra\tTd_t\tTd_rt\tTd_at\tTd_rat
+# A_z\tA_rz\tA_t\tA_zt\tA_rzt
+####
+
+mcmli2.0 \t\t\t# file version
+
+# Specify media
+#\tname\t\tn\tmua\tmus\tg
+%(media)send #of media
+
+# Specify data for run 1
+%(name)s \tA\t\t\t# output file name, format.
+
+# \tmedium \t\tthickness
+%(layers)send #of layers
+
+%(source_type)s \t\t\t\t\t# src type: pencil/isotropic.
+%(source_depth).10g\t\t\t\t\t# starting position of source.
+
+%(dz).10g\t%(dr).10g\t%(dt).10g\t\t\t# dz, dr, dt.
+%(ndz)d\t%(ndr)d\t%(ndt)d\t%(nda)d\t\t# nz, nr, nt, na.
+
+# This simulation will score the following categories:
+%(scored)s
+
+%(photons)d  \t0:00\t\t\t\t# no. of photons | time
+0.0001\t\t\t\t\t# threshold weight.
+1\t\t\t\t\t# random number seed.
+end #of runs
+
+"""
+
+# tag, attribute (or attributes tried in order), unit conversion and comment
+V1_SECTIONS = (('A_z', ('Az',), 10, ' #A[0], [1],..A[nz-1]. [1/cm]'),
+               ('Rd_r', ('Rdr',), 100, ' #Rd[0], [1],..Rd[nr-1]. [1/cm2]'),
+               ('Rd_a', ('Rda',), 1, ' #Rd[0], [1],..Rd[na-1]. [sr-1]'),
+               ('Tt_r', ('Ttr', 'Tdr'), 100, ' #Tt[0], [1],..Tt[nr-1]. [1/cm2]'),
+               ('Tt_a', ('Tta', 'Tda'), 1, ' #Tt[0], [1],..Tt[na-1]. [sr-1]'),
+               ('A_rz', ('Arz',), 1000, ''),
+               ('Rd_ra', ('Rdra',), 100, ''),
+               ('Tt_ra', ('Ttra', 'Tdra'), 100, ''))
+
+V2_SECTIONS = (('A_z', ('Az',), 10, ' #A[0], [1],..A[nz-1]. [1/cm]'),
+               ('A_rz', ('Arz',), 1000, ''),
+               ('A_t', ('At',), 1, ' #A[0], [1],..A[nt-1]. [1/ps]'),
+               ('A_zt', ('Azt',), 10, ' #A[0][0], [0][1],..A[nz-1][nt-1]. [1/(cm ps)]'),
+               ('A_rzt', ('Arzt',), 1000, ' #A[0][0][0], ..A[nr-1][nz-1][nt-1]. [1/(cm3 ps)]'),
+               ('Rd_r', ('Rdr',), 100, ' #Rd[0], [1],..Rd[nr-1]. [1/cm2]'),
+               ('Rd_a', ('Rda',), 1, ' #Rd[0], [1],..Rd[na-1]. [sr-1]'),
+               ('Rd_ra', ('Rdra',), 100, ''),
+               ('Rd_t', ('Rdt',), 1, ' #Rd[0], [1],..Rd[nt-1]. [1/ps]'),
+               ('Rd_rt', ('Rdrt',), 100, ' #Rd[0][0], [0][1],..Rd[nr-1][nt-1]. [1/(cm2 ps)]'),
+               ('Rd_at', ('Rdat',), 1, ' #Rd[0][0], [0][1],..Rd[na-1][nt-1]. [1/(sr ps)]'),
+               ('Rd_rat', ('Rdrat',), 100, ' #Rd[0][0][0], ..Rd[nr-1][na-1][nt-1]. [1/(cm2 sr ps)]'),
+               ('Td_r', ('Tdr', 'Ttr'), 100, ' #Td[0], [1],..Td[nr-1]. [1/cm2]'),
+               ('Td_a', ('Tda', 'Tta'), 1, ' #Td[0], [1],..Td[na-1]. [sr-1]'),
+               ('Td_ra', ('Tdra', 'Ttra'), 100, ''),
+               ('Td_t', ('Tdt',), 1, ' #Td[0], [1],..Td[nt-1]. [1/ps]'),
+               ('Td_rt', ('Tdrt',), 100, ' #Td[0][0], [0][1],..Td[nr-1][nt-1]. [1/(cm2 ps)]'),
+               ('Td_at', ('Tdat',), 1, ' #Td[0][0], [0][1],..Td[na-1][nt-1]. [1/(sr ps)]'),
+               ('Td_rat', ('Tdrat',), 100, ' #Td[0][0][0], ..Td[nr-1][na-1][nt-1]. [1/(cm2 sr ps)]'))
+
+ARRAY_COMMENTS = {'A_rz': '# A[r][z]. [1/cm3]\n'
+                          '# A[0][0], [0][1],..[0][nz-1]\n'
+                          '# ...\n'
+                          '# A[nr-1][0], [nr-1][1],..[nr-1][nz-1]\n',
+                  'Rd_ra': '# Rd[r][angle]. [1/(cm2sr)].\n'
+                           '# Rd[0][0], [0][1],..[0][na-1]\n'
+                           '# ...\n'
+                           '# Rd[nr-1][0], [nr-1][1],..[nr-1][na-1]\n'}
+ARRAY_COMMENTS['Tt_ra'] = ARRAY_COMMENTS['Rd_ra'].replace('Rd', 'Tt')
+ARRAY_COMMENTS['Td_ra'] = ARRAY_COMMENTS['Rd_ra'].replace('Rd', 'Td')
+
+
+def write_floats(out, values, fmt='%12.4E', per_line=5, scale=1):
+    """
+    Write values to a text stream `per_line` at a time.
+
+    Like MCML, every value is followed by a space.  The values are taken a
+    block of rows at a time, so a disk-backed array (e.g., Arzt) is never
+    held in memory as a whole.
+
+    Args:
+        out (file object): Text stream, e.g., an open file or io.StringIO().
+        values (array_like): Values written in C order.
+        fmt (str): printf-style format of each value.
+        per_line (int): Number of values on each line.
+        scale (float): Every value is multiplied by this.
+    """
+    values = np.atleast_1d(np.asarray(values, dtype=float))
+    line = (fmt + ' ') * per_line + '\n'
+    rows = max(1, _LINES_PER_CHUNK * per_line // max(1, values[:1].size))
+    pending = np.array([])
+    for start in range(0, len(values), rows):
+        chunk = np.concatenate((pending, np.ravel(values[start:start + rows]) * scale))
+        full = len(chunk) // per_line * per_line
+        out.write((line * (full // per_line)) % tuple(chunk[:full].tolist()))
+        pending = chunk[full:]
+    if len(pending):
+        out.write(''.join(fmt % v + ' ' for v in pending) + '\n')
+
+
+def _file_order(mcml, tag, value):
+    """Return the values of a section in the order written in the file."""
+    sizes = {'z': mcml.ndz, 'r': mcml.ndr, 'a': mcml.nda, 't': getattr(mcml, 'ndt', 1)}
+    axes = tag.split('_')[1]
+    shape = tuple(sizes[axis] for axis in axes)
+    value = np.asarray(value, dtype=float)     # a view of a disk-backed array
+    if value.size == 0:
+        return np.zeros(shape)
+    if len(axes) == 1 and value.size == shape[0] - 1:
+        return np.append(value, 0)                 # the overflow bin is dropped when read
+    if tag in ('A_rz', 'Rd_ra', 'Tt_ra', 'Td_ra') and value.ndim == 2:
+        return value.T                             # stored with the radial axis last
+    if len(axes) == 3:
+        return value.transpose(1, 0, 2)            # stored with the radial axis second
+    return value
+
+
+def _array(mcml, names):
+    """Return the first non-empty attribute in names (or an empty array)."""
+    for name in names:
+        value = getattr(mcml, name, None)
+        if value is not None and np.size(value) > 0:
+            return value
+    return np.array([])
+
+
+def _layers(mcml):
+    """Return (names, n, mu_a, mu_s, g, d) of the sample with the ambient media first and last."""
+    n, mu_a, mu_s, g, d = (np.asarray(getattr(mcml, a), dtype=float)
+                           for a in ('n', 'mu_a', 'mu_s', 'g', 'd'))
+    names = list(getattr(mcml, 'layer_name', []))
+    if len(d) > 2 and np.isinf(d[0]) and np.isinf(d[-1]):
+        return names, n, mu_a, mu_s, g, d
+    names = ['above'] + ['layer_%d' % (i + 1) for i in range(len(d))] + ['below']
+    n = np.concatenate(([mcml.n_above], n, [mcml.n_below]))
+    zero = np.zeros(1)
+    mu_a, mu_s, g = (np.concatenate((zero, a, zero)) for a in (mu_a, mu_s, g))
+    d = np.concatenate(([np.inf], d, [np.inf]))
+    return names, n, mu_a, mu_s, g, d
+
+
+def _write_v1(mcml, out, name, fmt):
+    """Write the contents of a V1 file."""
+    _, n, mu_a, mu_s, g, d = _layers(mcml)
+    layers = ''.join('%.10g\t%.10g\t%.10g\t%.10g\t%.10g\t# layer %d\n' %
+                     (n[i], mu_a[i] * 10, mu_s[i] * 10, g[i], d[i] / 10, i)
+                     for i in range(1, len(d) - 1))
+    out.write(V1_HEADER % {'name': name, 'photons': mcml.photons,
+                           'dz': mcml.dz / 10, 'dr': mcml.dr / 10,
+                           'ndz': mcml.ndz, 'ndr': mcml.ndr, 'nda': mcml.nda,
+                           'num_layers': len(d) - 2, 'layers': layers,
+                           'n_above': float(n[0]), 'n_below': float(n[-1])})
+
+    out.write('RAT #Reflectance, absorption, transmission. \n')
+    out.write('%-15.10g\t#Specular reflectance [-]\n' % float(mcml.Rsp))
+    out.write('%-15.10g\t#Diffuse reflectance [-]\n' % float(mcml.Rd))
+    out.write('%-15.10g\t#Absorbed fraction [-]\n' % float(mcml.absorbed))
+    out.write('%-15.10g\t#Transmittance [-]\n\n' % float(mcml.Tt))
+
+    out.write('A_l #Absorption as a function of layer. [-]\n')
+    Az = np.asarray(mcml.Az, dtype=float)
+    absorbed = layer_absorption(Az, d[1:-1], mcml.dz) if Az.size else np.zeros(len(d) - 2)
+    write_floats(out, absorbed, fmt, 1)
+    out.write('\n')
+
+    for tag, names, scale, comment in V1_SECTIONS:
+        values = _file_order(mcml, tag, _array(mcml, names))
+        out.write(ARRAY_COMMENTS.get(tag, ''))
+        out.write('%s%s\n' % (tag, comment))
+        write_floats(out, values, fmt, 1 if len(tag.split('_')[1]) == 1 else 5, scale)
+        out.write('\n')
+
+
+def _write_v2(mcml, out, name, fmt):
+    """Write the contents of a V2 file."""
+    names, n, mu_a, mu_s, g, d = _layers(mcml)
+    media = {}
+    for i, medium in enumerate(names):
+        media.setdefault(medium, (float(n[i]), mu_a[i] * 10, mu_s[i] * 10, float(g[i])))
+    layers = ''.join('\t%s\n' % medium if np.isinf(d[i]) else '\t%s \t%.10g\n' % (medium, d[i] / 10)
+                     for i, medium in enumerate(names))
+
+    sections = [(tag, _array(mcml, names), scale, comment)
+                for tag, names, scale, comment in V2_SECTIONS]
+    sections = [s for s in sections if np.size(s[1]) > 0]
+    dt = getattr(mcml, 'dt', 0)
+    out.write(V2_HEADER % {'name': name, 'photons': mcml.photons,
+                           'media': ''.join('\t%s \t\t%.10g\t%.10g\t%.10g\t%.10g\n' % ((medium,) + p)
+                                            for medium, p in media.items()),
+                           'layers': layers,
+                           'source_type': getattr(mcml, 'source_type', 'pencil'),
+                           'source_depth': float(getattr(mcml, 'source_depth', 0)),
+                           'dz': mcml.dz / 10, 'dr': mcml.dr / 10,
+                           'dt': float(dt) if np.size(dt) == 1 else 0.0,
+                           'ndz': mcml.ndz, 'ndr': mcml.ndr,
+                           'ndt': getattr(mcml, 'ndt', 1), 'nda': mcml.nda,
+                           'scored': ''.join('%s \t' % s[0] for s in sections)})
+
+    Rb = mcml.ballistic_reflectance()
+    Tb = float(mcml.Tu)
+    out.write('RAT #Reflectance, absorption, transmittance.\n')
+    out.write('# Average \tStandard Err \tRel Err\n')
+    out.write('%-15.10g\t\t\t\t#Rsp: Specular reflectance.\n' % float(mcml.Rsp))
+    for value, comment in ((Rb, 'Rb: Ballistic reflectance.'), (mcml.Rd, 'Rd: Diffuse reflectance.'),
+                           (mcml.absorbed, 'A:  Absorbed fraction.'),
+                           (Tb, 'Tb: Ballistic transmittance.'),
+                           (mcml.Tt - Tb, 'Td: Diffuse transmittance.')):
+        out.write('%-15.10g\t0\t\t0.00%%\t#%s\n' % (float(value), comment))
+    out.write('\n')
+
+    for tag, value, scale, comment in sections:
+        values = _file_order(mcml, tag, value)
+        out.write(ARRAY_COMMENTS.get(tag, ''))
+        out.write('%s%s\n' % (tag, comment))
+        write_floats(out, values, fmt, 1 if len(tag.split('_')[1]) == 1 else 5, scale)
+        out.write('\n')
+
+
+def _writer(version):
+    """Return the function that writes the contents of a file of this version."""
+    if version == 1:
+        return _write_v1
+    if version == 2:
+        return _write_v2
+    raise ValueError('version must be 1 or 2')
+
+
+def write_mco_file(mcml, fname, version=1, fmt='%12.4E'):
+    """
+    Write a V1 or V2 .mco file holding the results in mcml.
+
+    Each section is written to the file as it is formatted, so the file is
+    never held in memory as a whole.
+
+    Args:
+        mcml (MCML): The results to write.
+        fname (str): The name of the output file, also recorded in the header.
+        version (int): 1 or 2.
+        fmt (str): printf-style format of the array values.
+    """
+    write = _writer(version)
+    with open(fname, 'w', encoding='utf-8') as file:
+        write(mcml, file, os.path.basename(fname), fmt)
+
+
+def mco_text(mcml, version=1, name='mcml.mco', fmt='%12.4E'):
+    """
+    Return the contents of a V1 or V2 .mco file holding the results in mcml.
+
+    Args:
+        mcml (MCML): The results to write.
+        version (int): 1 or 2.
+        name (str): Output file name recorded in the header.
+        fmt (str): printf-style format of the array values.
+
+    Returns:
+        str with the file contents.
+    """
+    write = _writer(version)
+    out = io.StringIO()
+    write(mcml, out, name, fmt)
+    return out.getvalue()
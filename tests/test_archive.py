@@ -0,0 +1,109 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import os
+import shutil
+import pytest
+import numpy as np
+from mcmlpy import Archive, MCMLV1, MCMLV2
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path / 'runs.mcar')
+    with Archive(path, 'w') as archive:
+        assert archive.append_files(['mc-lost-v1-3.mco', 'sample2.mco']) == [0, 1]
+
+    archive = Archive(path)
+    assert len(archive) == 2
+    assert archive.table['photons'].dtype == np.int64
+    assert archive.table['mu_a'].shape == (2, 3)
+    assert archive.table['Rd'][1] == 0.238608
+
+    v2 = MCMLV2()
+    v2.read_file('sample2.mco')
+    run = archive[1]
+    assert isinstance(run, MCMLV2)
+    for name in MCMLV2.geometry + MCMLV2.tallies:
+        assert np.array_equal(getattr(run, name), getattr(v2, name)), name
+    assert not run.Arz.flags.owndata
+
+    v1 = MCMLV1()
+    v1.read_file('mc-lost-v1-3.mco')
+    run = archive[0]
+    assert np.array_equal(run.d[1:-1], v1.d)
+    assert run.n[0] == v1.n_above
+    assert run.Rd == v1.Rd and run.Tt == v1.Tt
+    assert np.array_equal(run.Arz, v1.Arz)
+    with pytest.raises(IndexError):
+        archive[2]
+    with pytest.raises(ValueError):
+        archive.append(v1)
+
+def test_append(tmp_path):
+    path = str(tmp_path / 'runs.mcar')
+    v2 = MCMLV2()
+    v2.read_file('sample2.mco')
+    with Archive(path, 'a') as archive:
+        archive.append(v2)
+    with open(path, 'rb') as file:
+        before = file.read()
+
+    with Archive(path, 'a') as archive:
+        assert archive.append(v2) == 1
+    with open(path, 'rb') as file:
+        assert file.read(len(before)) == before
+
+    archive = Archive(path)
+    assert len(archive) == 2
+    assert list(archive.find(mu_a=0.1, layer=1)) == [0, 1]
+    assert len(archive.find(mu_a=0.2, layer=1)) == 0
+    assert np.array_equal(archive[1].Arz, v2.Arz)
+
+def test_interrupted_append(tmp_path):
+    path = str(tmp_path / 'runs.mcar')
+    v2 = MCMLV2()
+    v2.read_file('sample2.mco')
+    with Archive(path, 'w') as archive:
+        archive.append(v2)
+    committed = os.path.getsize(path)
+
+    # crash after the run is written but before its index
+    archive = Archive(path, 'a')
+    archive.append(v2)
+    archive._file.flush()
+    shutil.copy(path, str(tmp_path / 'crash.mcar'))
+    archive.close()
+
+    # crash part way through writing the index
+    with open(path, 'rb') as file:
+        data = file.read()
+    with open(str(tmp_path / 'partial.mcar'), 'wb') as file:
+        file.write(data[:-10])
+
+    for name in ('crash.mcar', 'partial.mcar'):
+        copy = str(tmp_path / name)
+        archive = Archive(copy)
+        assert len(archive) == 1
+        assert np.array_equal(archive[0].Arz, v2.Arz)
+        with Archive(copy, 'a') as archive:
+            assert archive.append(v2) == 1
+        archive = Archive(copy)
+        assert len(archive) == 2
+        assert np.array_equal(archive[1].Rdr, v2.Rdr)
+        with open(copy, 'rb') as file:
+            assert file.read(committed) == data[:committed]
+
+def test_iterate_while_appending(tmp_path):
+    path = str(tmp_path / 'runs.mcar')
+    v2 = MCMLV2()
+    v2.read_file('sample2.mco')
+    with Archive(path, 'w') as archive:
+        archive.append(v2)
+    with Archive(path, 'a') as archive:
+        archive.append(v2)
+        assert len(archive) == 2
+        assert len(list(archive)) == 2
+        assert np.array_equal(archive[-1].Arz, v2.Arz)
+        archive.append(v2)
+        assert archive[2].Rd == v2.Rd
+        assert len(Archive(path)) == 1 and len(archive.table['photons']) == 1
+    assert len(Archive(path)) == 3
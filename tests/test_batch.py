@@ -0,0 +1,52 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-locals
+# pylint: disable=too-many-instance-attributes
+# pylint: disable=consider-using-f-string
+
+import pytest
+import numpy as np
+from mcmlpy import MCMLV1, MCMLV2, load_many, merge_files, reader_for
+
+v1_files = ['mc-lost-v1-0.mco', 'mc-lost-v1-1.mco', 'mc-lost-v1-2.mco']
+
+def test_load_many():
+    batch = load_many(v1_files, workers=1)
+    assert len(batch) == 3
+    assert batch.failures == []
+    assert batch['Rdr'].shape == (3, 1000)
+    assert batch['Arz'].shape == (3, 1, 1001)
+    for i, fname in enumerate(v1_files):
+        mcml = MCMLV1()
+        mcml.init_from_file(fname)
+        assert batch['Rd'][i] == mcml.Rd
+        assert np.array_equal(batch['Rdr'][i], mcml.Rdr)
+        assert np.array_equal(batch.params['mu_a'][i], mcml.mu_a)
+
+def test_failures():
+    paths = v1_files + ['mc-lost-v1-3.mco', 'missing.mco', 'mcOUT1.dat']
+    batch = load_many(paths, workers=2, fields=('Rd', 'Tt', 'Rdr'))
+    assert batch.paths == v1_files
+    assert sorted(batch.data) == ['Rd', 'Rdr', 'Tt']
+    errors = {f.path: f.error for f in batch.failures}
+    assert errors == {'mc-lost-v1-3.mco': 'ValueError',
+                      'missing.mco': 'FileNotFoundError',
+                      'mcOUT1.dat': 'ValueError'}
+
+def test_reader_for():
+    assert type(reader_for('sample2.mco')) is MCMLV2
+    assert type(reader_for('mc-lost-v1-3.mco')) is MCMLV1
+    with pytest.raises(ValueError):
+        reader_for('mcOUT1.dat')
+
+def test_merge_files():
+    mcml = merge_files(iter(['mc-lost-v1-1.mco'] * 3))
+    one = MCMLV1()
+    one.init_from_file('mc-lost-v1-1.mco')
+    assert mcml.photons == 3 * one.photons
+    assert mcml.Rd == pytest.approx(one.Rd)
+    assert np.allclose(mcml.Rdr, one.Rdr)
+    with pytest.raises(ValueError):
+        merge_files(v1_files)
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,71 @@
+# pylint: disable=invalid-name
+# pylint: disable=too-many-locals
+# pylint: disable=too-many-instance-attributes
+# pylint: disable=consider-using-f-string
+
+import os
+import shutil
+import pytest
+import numpy as np
+from mcmlpy import MCMLV1, MCMLV2, MCSub, Cache
+
+def test_round_trip(tmp_path):
+    cache = Cache(str(tmp_path / 'cache'))
+    for cls, fname in ((MCMLV1, 'mc-lost-v1-3.mco'), (MCMLV2, 'sample2.mco'), (MCSub, 'mcOUT1.dat')):
+        mcml = cls()
+        mcml.init_from_file(fname)
+        cold = cls()
+        cold.init_from_file(fname, cache=cache)
+        warm = cls()
+        assert cache.restore(warm, fname)
+        assert isinstance(warm.Arz, np.memmap)
+        assert np.array_equal(warm.Arz, mcml.Arz)
+        assert np.array_equal(warm.Rdr, mcml.Rdr)
+        assert warm.Rd == mcml.Rd
+        assert str(warm) == str(mcml)
+    assert len(cache.entries()) == 3
+
+def test_invalidation(tmp_path):
+    fname = str(tmp_path / 'sample2.mco')
+    shutil.copy('sample2.mco', fname)
+    cache = Cache(str(tmp_path / 'cache'), check='hash')
+    mcml = MCMLV2()
+    cache.load(mcml, fname)
+    assert cache.restore(MCMLV2(), fname)
+
+    with open(fname, 'r+', encoding='utf-8') as file:
+        file.seek(0, os.SEEK_END)
+        file.write('\n')
+    assert not cache.restore(MCMLV2(), fname)
+
+def test_eviction(tmp_path):
+    cache = Cache(str(tmp_path / 'cache'))
+    cache.load(MCMLV2(), 'sample2.mco')
+    cache.load(MCMLV1(), 'mc-lost-v1-3.mco')
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    assert len(cache.entries()) == 1
+    assert not cache.restore(MCMLV2(), 'sample2.mco')
+    assert cache.restore(MCMLV1(), 'mc-lost-v1-3.mco')
+
+def test_damaged_entry(tmp_path):
+    cache = Cache(str(tmp_path / 'cache'))
+    expected = MCMLV2()
+    expected.read_file('sample2.mco')
+    for damage in ('remove', 'truncate'):
+        cache.load(MCMLV2(), 'sample2.mco')
+        arz = os.path.join(cache.entry(expected, 'sample2.mco'), 'Arz.npy')
+        if damage == 'remove':
+            os.remove(arz)
+        else:
+            with open(arz, 'r+b') as file:
+                file.truncate(200)
+        assert not cache.restore(MCMLV2(), 'sample2.mco')
+        mcml = MCMLV2()
+        mcml.init_from_file('sample2.mco', cache=cache)
+        assert np.array_equal(mcml.Arz, expected.Arz)
+        assert cache.restore(MCMLV2(), 'sample2.mco')
+    assert os.listdir(cache.directory) == [os.path.basename(cache.entry(expected, 'sample2.mco'))]
+
+if __name__ == "__main__":
+    pytest.main()
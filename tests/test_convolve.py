@@ -0,0 +1,50 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import pytest
+import numpy as np
+import mcmlpy
+
+def test_constant():
+    for shape in mcmlpy.BEAM_SHAPES:
+        flat = mcmlpy.convolve(np.ones(400), 0.01, shape, 0.5)
+        assert np.allclose(flat[:200], 1, atol=1e-3)
+
+def test_power():
+    dr, nr = 0.02, 500
+    areas = mcmlpy.ring_areas(dr, nr)
+    pencil = np.exp(-np.arange(nr) * dr)
+    for shape in mcmlpy.BEAM_SHAPES:
+        beam = mcmlpy.convolve(pencil, dr, shape, 0.5)
+        assert np.isclose(np.sum(beam * areas), np.sum(pencil * areas), rtol=1e-3)
+
+def test_kernel():
+    K = mcmlpy.beam_kernel(0.01, 100, 'flat', 0.2)
+    assert K is mcmlpy.beam_kernel(0.01, 100, 'flat', 0.2)
+    assert not K.flags.writeable
+    with pytest.raises(ValueError):
+        mcmlpy.beam_kernel(0.01, 100, 'square', 0.2)
+    with pytest.raises(ValueError):
+        mcmlpy.beam_kernel(0.01, 100, 'flat', 0)
+
+def test_mcml():
+    mcml = mcmlpy.load('sample2.mco')
+    beam = mcml.convolve('gaussian', 0.5)
+    nr = len(mcml.r)
+    assert type(beam) is type(mcml)
+    assert np.allclose(beam.Rdr, mcmlpy.convolve(mcml.Rdr, mcml.dr, 'gaussian', 0.5))
+    assert np.allclose(beam.Arz[:, :nr], mcmlpy.convolve(mcml.Arz[:, :nr], mcml.dr, 'gaussian', 0.5))
+    assert np.array_equal(beam.Arz[:, nr:], mcml.Arz[:, nr:])
+    assert beam.Rdr[0] < mcml.Rdr[0]
+    assert np.array_equal(mcml.Rdr, mcmlpy.load('sample2.mco').Rdr)
+
+def test_batch():
+    batch = mcmlpy.load_many(['sample2.mco', 'sample2.mco'], workers=1)
+    mcml = mcmlpy.load('sample2.mco')
+    nr = len(mcml.r)
+    Arz = mcmlpy.convolve(batch['Arz'][..., :nr], mcml.dr, 'flat', 0.3)
+    assert Arz.shape == (2,) + mcml.Arz[:, :nr].shape
+    assert np.allclose(Arz[1], mcml.convolve('flat', 0.3).Arz[:, :nr])
+
+if __name__ == "__main__":
+    pytest.main()
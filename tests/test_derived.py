@@ -0,0 +1,64 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import copy
+import pytest
+import numpy as np
+import mcmlpy
+
+def test_layer_index():
+    d = [1.0, 2.0, np.inf]
+    assert np.array_equal(mcmlpy.layer_index(d, 0.5, 8), [0, 0, 1, 1, 1, 1, 2, 2])
+    index = mcmlpy.layer_index([[1.0, np.inf], [2.0, np.inf]], 0.5, 4)
+    assert np.array_equal(index, [[0, 0, 1, 1], [0, 0, 0, 0]])
+    mu_a, d = mcmlpy.sample_layers([0, 0.1, 0.2, 0], [np.inf, 1, 2, np.inf])
+    assert np.array_equal(mu_a, [0.1, 0.2]) and np.array_equal(d, [1, 2])
+
+def test_areas_and_angles():
+    areas = mcmlpy.ring_areas(0.1, 10)
+    assert np.isclose(np.sum(areas), np.pi * 1.0**2)
+    angles = mcmlpy.solid_angles(30)
+    assert np.isclose(np.sum(angles), 2 * np.pi)
+
+def test_mcml():
+    mcml = mcmlpy.load('sample2.mco')
+    assert np.array_equal(mcml.mu_a_z, np.repeat([0.1, 0.1, 0.2], [10, 10, 20]))
+    assert np.allclose(mcml.fluence, mcml.Arz / mcml.mu_a_z[:, None])
+    assert mcml.fluence is mcml.fluence
+    assert np.sum(mcml.layer_absorption) < mcml.absorbed
+    assert np.isclose(np.sum(mcml.Rdr * mcml.ring_areas), mcml.Rd, rtol=0.1)
+
+    F = mcml.fluence
+    mcml.Arz = mcml.Arz * 2
+    assert np.allclose(mcml.fluence, 2 * F)
+    mcml.mu_a = mcml.mu_a * 2
+    assert np.allclose(mcml.fluence, F)
+    mcml.Arz[:] = 0
+    assert np.allclose(mcml.fluence, F)
+    mcml.clear_derived()
+    assert np.all(mcml.fluence == 0)
+
+def test_copies_do_not_share():
+    a = mcmlpy.load('sample2.mco')
+    b = mcmlpy.load('sample2.mco')
+    b.Arz = b.Arz * 3
+    F = a.fluence
+    merged = mcmlpy.merge([a, b])
+    assert np.allclose(merged.fluence, 2 * F)
+    assert np.allclose(a.fluence, F)
+    assert copy.copy(a).fluence is not F
+
+def test_mcsub():
+    mcsub = mcmlpy.load('mcOUT1.dat')
+    assert mcsub.fluence is mcsub.Arz
+    assert np.isclose(mcsub.layer_absorption[0], mcsub.absorbed, rtol=1e-5)
+
+def test_batch():
+    batch = mcmlpy.load_many(['sample2.mco', 'sample2.mco'], workers=1)
+    mcml = mcmlpy.load('sample2.mco')
+    assert batch.fluence.shape == (2,) + mcml.Arz.shape
+    assert np.allclose(batch.fluence[1], mcml.fluence)
+    assert np.allclose(batch.layer_absorption[0], mcml.layer_absorption)
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,50 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import pytest
+import numpy as np
+import mcmlpy
+
+def test_bessel():
+    x = np.array([0, 1, 2.5, 3, 5, 10, 50])
+    J0 = [1, 0.7651976866, -0.0483837764, -0.2600519549, -0.1775967713, -0.2459357645, 0.0558123277]
+    J1 = [0, 0.4400505857, 0.4970941025, 0.3390589585, -0.3275791376, 0.0434727462, -0.0975118281]
+    assert np.allclose(mcmlpy.j0(x), J0, atol=1e-7)
+    assert np.allclose(mcmlpy.j1(x), J1, atol=1e-7)
+    assert np.allclose(mcmlpy.j1(-x), -mcmlpy.j1(x))
+
+def test_matrix():
+    dr, nr = 0.05, 40
+    fx = (0, 0.3, 1.0)
+    H = mcmlpy.hankel_matrix(dr, nr, fx)
+    assert H is mcmlpy.hankel_matrix(dr, nr, fx)
+    assert not H.flags.writeable
+    assert np.allclose(H[0], mcmlpy.ring_areas(dr, nr))
+    # midpoint rule on a fine grid within each bin
+    steps = 200
+    r = (np.arange(nr * steps) + 0.5) * dr / steps
+    for i, f in enumerate(fx):
+        fine = mcmlpy.j0(2 * np.pi * f * r) * 2 * np.pi * r * dr / steps
+        assert np.allclose(H[i], fine.reshape(nr, steps).sum(axis=1), atol=1e-7)
+
+def test_mcml():
+    mcml = mcmlpy.load('sample2.mco')
+    fx = np.linspace(0, 0.5, 11)
+    sfd = mcml.spatial_frequency(fx)
+    assert np.isclose(sfd.Rd[0], np.sum(mcml.Rdr * mcml.ring_areas))
+    assert np.isclose(sfd.Td[0], np.sum(mcml.Tdr * mcml.ring_areas))
+    assert np.all(np.diff(sfd.Rd) < 0)
+    v1 = mcmlpy.load('mc-lost-v1-3.mco')
+    sfd = v1.spatial_frequency(0.1)
+    assert sfd.Rd.shape == (1,) and sfd.Td.shape == (1,)
+
+def test_batch():
+    batch = mcmlpy.load_many(['sample2.mco', 'sample2.mco'], workers=1)
+    mcml = mcmlpy.load('sample2.mco')
+    fx = np.linspace(0, 0.5, 11)
+    Rd = mcmlpy.spatial_frequency(batch['Rdr'][..., :len(mcml.r)], mcml.dr, fx)
+    assert Rd.shape == (2, 11)
+    assert np.allclose(Rd[1], mcml.spatial_frequency(fx).Rd)
+
+if __name__ == "__main__":
+    pytest.main()
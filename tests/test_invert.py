@@ -0,0 +1,64 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import pytest
+import numpy as np
+from mcmlpy import LUT, invert, farrell_rdr, farrell_rd
+
+r = np.linspace(0.05, 5, 50)
+
+def test_farrell():
+    rng = np.random.default_rng(1)
+    mu_a = 10**rng.uniform(-3, -0.5, 2000)
+    mu_s_prime = rng.uniform(0.5, 3, 2000)
+    Rdr = farrell_rdr(r, mu_a[:, None], mu_s_prime[:, None])
+    fit = invert(Rdr, r=r)
+    assert fit.names == ('mu_a', 'mu_s_prime')
+    assert fit.params.shape == (2000, 2)
+    assert np.all(fit.converged)
+    assert np.allclose(fit.params[:, 0], mu_a, rtol=1e-6)
+    assert np.allclose(fit.params[:, 1], mu_s_prime, rtol=1e-6)
+    assert fit.residual.shape == (2000, 50)
+    assert fit.seconds > 0
+
+def test_noise_and_total():
+    rng = np.random.default_rng(2)
+    Rdr = farrell_rdr(r, 0.02, 1.5) * (1 + 0.01 * rng.standard_normal((200, len(r))))
+    fit = invert(Rdr, r=r, Rd=farrell_rd(0.02, 1.5), guess=(0.1, 0.5))
+    assert fit.residual.shape == (200, 51)
+    assert np.median(fit.params[:, 0]) == pytest.approx(0.02, rel=0.01)
+    assert np.median(fit.params[:, 1]) == pytest.approx(1.5, rel=0.01)
+    assert np.mean(fit.rms) == pytest.approx(0.01, rel=0.2)
+    with pytest.raises(ValueError):
+        invert(Rdr, r=r, Tt=0.1)
+
+def test_lut():
+    axes = {'mu_a': np.geomspace(0.005, 0.5, 60), 'mu_s': np.linspace(5, 30, 40),
+            'g': [0.9], 'n': [1.4]}
+    mu_a, mu_s = np.meshgrid(axes['mu_a'], axes['mu_s'], indexing='ij')
+    mu_s_prime = mu_s * 0.1
+    Rdr = farrell_rdr(r, mu_a[..., None], mu_s_prime[..., None])
+    Rd = farrell_rd(mu_a, mu_s_prime)
+    values = {'Rd': Rd[..., None, None], 'Tt': 0 * Rd[..., None, None],
+              'absorbed': 1 - Rd[..., None, None], 'Rdr': Rdr[:, :, None, None]}
+    lut = LUT(axes, values, r=r)
+    fit = invert(farrell_rdr(r, 0.03, 1.2), model=lut, Rd=farrell_rd(0.03, 1.2), g=0.9)
+    assert fit.names == ('mu_a', 'mu_s')
+    assert fit.params[0, 0] == pytest.approx(0.03, rel=0.02)
+    assert fit.params[0, 1] == pytest.approx(12, rel=0.02)
+    assert invert(farrell_rdr(r, 0.03, 1.2), r=r, model=lut, g=0.9).names == ('mu_a', 'mu_s')
+    with pytest.raises(ValueError):
+        invert(farrell_rdr(r[:-1], 0.03, 1.2), model=lut, g=0.9)
+    with pytest.raises(ValueError):
+        invert(farrell_rdr(r, 0.03, 1.2), r=2 * r, model=lut, g=0.9)
+
+def test_function_model():
+    def two_layer(p):
+        return {'Rdr': 0.5 * farrell_rdr(r, p[:, :1], 1.0) + 0.5 * farrell_rdr(r, p[:, 1:], 1.0)}
+    p = np.array([[0.01, 0.1], [0.05, 0.2]])
+    fit = invert(two_layer(p)['Rdr'], model=two_layer, guess=[[0.005, 0.2], [0.02, 0.3]],
+                 names=('mu_a1', 'mu_a2'))
+    assert fit.names == ('mu_a1', 'mu_a2')
+    assert np.allclose(fit.params, p, rtol=1e-5)
+    with pytest.raises(ValueError):
+        invert(two_layer(p)['Rdr'], model=two_layer)
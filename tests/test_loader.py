@@ -0,0 +1,49 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import pytest
+import numpy as np
+import mcmlpy
+from mcmlpy import MCMLV1, MCMLV2, MCSub
+
+def same(a, b):
+    for name in type(b).geometry + type(b).tallies + ('r', 'z'):
+        assert np.array_equal(getattr(a, name), getattr(b, name)), name
+
+def test_detect():
+    for fname, cls in (('mc-lost-v1-3.mco', MCMLV1), ('sample2.mco', MCMLV2),
+                       ('mc-lost-v2-1.mco', MCMLV2), ('mcOUT1.dat', MCSub)):
+        expected = cls()
+        expected.read_file(fname)
+        mcml = mcmlpy.load(fname)
+        assert type(mcml) is cls
+        same(mcml, expected)
+
+def test_buffer():
+    with open('sample2.mco', 'rb') as file:
+        data = file.read()
+    same(mcmlpy.load(data), mcmlpy.load('sample2.mco'))
+    with open('mcOUT1.dat', 'rb') as file:
+        same(mcmlpy.load(file), mcmlpy.load('mcOUT1.dat'))
+
+def test_errors():
+    with pytest.raises(mcmlpy.UnknownFormatError):
+        mcmlpy.load(b'not an output file\n')
+    with open('mc-lost-v1-3.mco', 'rb') as file:
+        data = file.read()
+    with pytest.raises(mcmlpy.ParseError):
+        mcmlpy.load(data[:data.find(b'\nA_z') + 1] + b'A_z\n1 2\n')
+    with pytest.raises(FileNotFoundError):
+        mcmlpy.load('missing.mco')
+
+def test_register():
+    mcmlpy.register_format('test', lambda head: head.startswith(b'TEST'),
+                           lambda buffer: buffer.split()[1:])
+    try:
+        assert mcmlpy.load(b'TEST 1 2') == [b'1', b'2']
+        assert mcmlpy.detect_format(b'A1 ').name == 'v1'
+    finally:
+        mcmlpy.FORMATS[:] = [fmt for fmt in mcmlpy.FORMATS if fmt.name != 'test']
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,67 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import pytest
+import numpy as np
+from mcmlpy import LUT, MCMLV1, Simulation
+
+def linear_table():
+    axes = {'mu_a': [0.01, 0.1, 1], 'mu_s': [1, 2], 'g': [0.5, 0.7, 0.9], 'n': [1.4]}
+    grid = np.meshgrid(*(np.array(v) for v in axes.values()), indexing='ij')
+    Rd = 0.5 - 0.2 * grid[0] + 0.05 * grid[1] + 0.1 * grid[2]
+    Rdr = np.stack([Rd, 2 * Rd], axis=-1)
+    return LUT(axes, {'Rd': Rd, 'Tt': 1 - Rd, 'absorbed': 0 * Rd, 'Rdr': Rdr})
+
+def test_interpolation():
+    lut = linear_table()
+    rng = np.random.default_rng(1)
+    mu_a = rng.uniform(0.01, 1, 1000)
+    mu_s = rng.uniform(1, 2, 1000)
+    g = rng.uniform(0.5, 0.9, 1000)
+    expected = 0.5 - 0.2 * mu_a + 0.05 * mu_s + 0.1 * g
+    assert np.allclose(lut(mu_a, mu_s, g, 1.4), expected)
+    Rdr = lut(mu_a, mu_s, g, 1.4, quantity='Rdr')
+    assert Rdr.shape == (1000, 2)
+    assert np.allclose(Rdr[:, 1], 2 * expected)
+    assert lut(0.1, 2, 0.7, 1.4) == pytest.approx(0.5 - 0.02 + 0.1 + 0.07)
+
+def test_save_load(tmp_path):
+    lut = linear_table()
+    lut.save(str(tmp_path / 'table'))
+    loaded = LUT.load(str(tmp_path / 'table'))
+    assert isinstance(loaded.values['Rd'], np.memmap)
+    assert np.array_equal(loaded.axes['g'], [0.5, 0.7, 0.9])
+    x = np.array([0.05, 0.5])
+    assert np.array_equal(loaded(x, 1.5, 0.8, 1.4), lut(x, 1.5, 0.8, 1.4))
+
+def test_simulate_and_validate():
+    sim = Simulation(n=[1.4], mu_a=[0], mu_s=[1], g=[0.9], d=[2], dz=2, dr=0.5, ndz=1, ndr=4, nda=1)
+    lut = LUT.simulate(sim, mu_a=[0.01, 0.1], mu_s=[2, 4], g=[0.9], n=[1.4], photons=500, seed=1)
+    assert lut.values['Rdr'].shape == (2, 2, 1, 1, 3)
+    sim.mu_a[0], sim.mu_s[0] = 0.1, 4
+    mcml = sim.run(500, seed=2)
+    report = lut.validate([mcml])
+    assert report['Rd']['max'] < 0.1
+    assert set(report['Tt']) == {'rms', 'max', 'max_relative'}
+
+def test_from_runs():
+    runs = []
+    for mu_a in (0.01, 0.1):
+        for mu_s in (1, 2):
+            mcml = MCMLV1()
+            mcml.mu_a, mcml.mu_s = np.array([mu_a]), np.array([mu_s])
+            mcml.g, mcml.n, mcml.d = np.array([0.9]), np.array([1.4]), np.array([1.0])
+            mcml.Rd, mcml.Tt, mcml.absorbed = mu_s - mu_a, 0, 0
+            mcml.Rdr = np.array([mu_s, mu_a])
+            runs.append(mcml)
+    lut = LUT.from_runs(runs)
+    assert lut.shape == (2, 2, 1, 1)
+    assert lut(0.1, 2, 0.9, 1.4) == pytest.approx(1.9)
+    with pytest.raises(ValueError):
+        LUT.from_runs(runs[:3])
+    lut = LUT.from_files(['mc-lost-v1-1.mco'])
+    assert lut.shape == (1, 1, 1, 1)
+    assert lut(0.01, 0.99, 0, 1)[()] == pytest.approx(0.740542)
+
+if __name__ == "__main__":
+    pytest.main()
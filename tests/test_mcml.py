@@ -3,10 +3,14 @@
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=consider-using-f-string
 
-from io import StringIO
+import sys
+import subprocess
+from io import StringIO, BytesIO
 import pytest
 import numpy as np
-from mcmlpy import MCMLV2
+from mcmlpy import MCMLV2, read_N_floats, parse_floats, read_floats_into
+from mcmlpy import mcml as mcml_module
+from mcmlpy.mcml import read_float
 
 layers_text = """# Specify media
 #	name		n	mua	mus	g
@@ -49,5 +53,60 @@ def test_read_file():
     mcml = MCMLV2()
     mcml.init_from_file('mc-lost-v2-1.mco')
     
+block_text = """A_rz
+  0.0000E+00   7.1225E+03  -5.8468E-03   4.7801E+13   3.9105E+03 
+  2.6285E+03   2.1563E+03   1.7604E+03 
+  3.5414E+02
+
+Rd_ra
+  1.0265E+00   1.0781E+00
+"""
+
+def test_parse_floats():
+    values = parse_floats('1 2.5 # comment\n -3e2\n')
+    assert np.array_equal(values, [1, 2.5, -300])
+    assert np.array_equal(parse_floats(b' 1.0000E+00  2.0000E-01\n', 1), [1])
+    with pytest.raises(ValueError):
+        parse_floats('1 2', 3)
+
+def test_parse_floats_exponential():
+    x = np.array([0, 1.2345e-12, 6.5432e-10, -1.0001, 9.9999e+17, 3.1416])
+    text = ''.join('%12.4E ' % v + '\n' * (i % 3 == 2) for i, v in enumerate(x))
+    expected = np.array([float(s) for s in text.split()])
+    assert np.array_equal(parse_floats(text), expected)
+    assert np.array_equal(parse_floats(text.replace('\n', '\n\n')), expected)
+    assert parse_floats('  1.2345E-30\n')[0] == 1.2345e-30
+
+def test_read_N_floats():
+    fp = StringIO(block_text)
+    fp.readline()
+    values = read_N_floats(fp, 9)
+    fp = StringIO(block_text)
+    fp.readline()
+    legacy = [read_float(fp) for _ in range(9)]
+    assert np.array_equal(values, legacy)
+    fp = StringIO(block_text)
+    fp.readline()
+    with pytest.raises(ValueError):
+        read_N_floats(fp, 10)
+
+def test_read_floats_into(monkeypatch):
+    x = np.arange(24) * 1.5e-3
+    text = 'Tag\n' + ''.join('%12.4E ' % v + '\n' * (i % 5 == 4) for i, v in enumerate(x)) + '\nNext\n'
+    start = text.index('\n') + 1
+    stop = text.index('Next')
+    monkeypatch.setattr(mcml_module, 'CHUNK_SIZE', 20)
+    for source in (text, text.encode('ascii'), BytesIO(text.encode('ascii'))):
+        out = np.zeros((4, 6))
+        read_floats_into(source, out, start, stop, scale=10)
+        assert np.allclose(out.ravel(), x / 10)
+    with pytest.raises(ValueError):
+        read_floats_into(text, np.zeros(25), start, stop)
+
+def test_import_without_matplotlib():
+    code = "import sys, mcmlpy; print('matplotlib' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+    assert out.stdout.strip() == 'False'
+
 if __name__ == "__main__":
     pytest.main()
@@ -6,7 +6,7 @@
 from io import StringIO
 import pytest
 import numpy as np
-from mcmlpy import MCMLV1
+from mcmlpy import MCMLV1, MCMLV2
 
 layers_text = """
 3                        # Number of layers
@@ -39,7 +39,50 @@ def test_read_layers():
 def test_read_file():
     mcml = MCMLV1()
     mcml.init_from_file('mc-lost-v1-1.mco')
-    
+    assert mcml.Rd == 0.740542
+    assert mcml.absorbed == 0.174276
+
+def test_sections():
+    mcml = MCMLV1()
+    mcml.init_from_file('mc-lost-v1-3.mco')
+    assert list(mcml.sections) == ['InParm', 'RAT', 'A_l', 'A_z', 'Rd_r', 'Rd_a',
+                                   'Tt_r', 'Tt_a', 'A_rz', 'Rd_ra', 'Tt_ra']
+    assert mcml.sections['RAT'].line == 26
+    assert mcml.Arz.shape == (25, 1001)
+    assert mcml.Rdra.shape == (1, 1001)
+
+def test_lazy():
+    mcml = MCMLV1()
+    mcml.init_from_file('mc-lost-v1-3.mco')
+    lazy = MCMLV1()
+    lazy.init_from_file('mc-lost-v1-3.mco', lazy=True)
+    assert lazy.Rd == mcml.Rd
+    assert np.array_equal(lazy.Rdr, mcml.Rdr)
+    assert vars(lazy)['Arz'].size == 0
+    assert np.array_equal(lazy.Arz, mcml.Arz)
+    assert np.array_equal(lazy.Rdra, mcml.Rdra)
+    assert np.array_equal(lazy.Ttra, mcml.Ttra)
+
+def test_write_mco(tmp_path):
+    mcml = MCMLV1()
+    mcml.init_from_file('mc-lost-v1-3.mco')
+    fname = str(tmp_path / 'copy.mco')
+    mcml.write_mco(fname)
+    copy = MCMLV1()
+    copy.read_file(fname)
+    for name in MCMLV1.geometry + MCMLV1.tallies + ('photons',):
+        assert np.array_equal(getattr(copy, name), getattr(mcml, name)), name
+
+    mcml.write_mco(fname, version=2)
+    v2 = MCMLV2()
+    v2.read_file(fname)
+    assert np.array_equal(v2.d[1:-1], mcml.d)
+    assert np.array_equal(v2.mu_s[1:-1], mcml.mu_s)
+    assert v2.n[0] == mcml.n_above
+    assert v2.Rd == mcml.Rd and v2.Tt == mcml.Tt
+    assert np.array_equal(v2.Arz, mcml.Arz)
+    assert np.array_equal(v2.Tdr, mcml.Ttr)
+
 def test_string():
     mcml = MCMLV1()
     mcml.__str__()
@@ -3,10 +3,13 @@
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=consider-using-f-string
 
+import os
+import shutil
 from io import StringIO
 import pytest
 import numpy as np
-from mcmlpy import MCMLV2
+from mcmlpy import MCMLV1, MCMLV2
+from mcmlpy.writer import mco_text
 
 layers_text = """# Specify media
 #	name		n	mua	mus	g
@@ -48,6 +51,155 @@ def test_read_layers():
 def test_read_file():
     mcml = MCMLV2()
     mcml.init_from_file('mc-lost-v2-1.mco')
-    
+    assert mcml.Rd == 0.740382
+    assert mcml.Tt == 4.52E-05 + 0.0853471
+
+def test_sections():
+    mcml = MCMLV2()
+    sections = mcml.index_file('sample2.mco')
+    assert list(sections) == ['RAT', 'Ab_z', 'A_rz', 'A_t', 'Rd_r', 'Rd_t', 'Td_r', 'Td_t']
+    assert sections['A_rz'].line == 117
+    assert sections['A_rz'].lines == 400
+    assert mcml.Arz.size == 0
+
+    mcml.init_from_file('sample2.mco')
+    assert mcml.sections == sections
+    assert mcml.Arz.shape == (40, 50)
+    assert mcml.Arz[0, 0] == 1.335
+
+def test_lazy():
+    mcml = MCMLV2()
+    mcml.init_from_file('sample2.mco')
+    lazy = MCMLV2()
+    lazy.init_from_file('sample2.mco', lazy=True)
+    assert lazy.Rd == mcml.Rd
+    assert np.array_equal(lazy.Rdr, mcml.Rdr)
+    assert vars(lazy)['Arz'].size == 0
+    assert np.array_equal(lazy.Arz, mcml.Arz)
+    assert str(lazy) == str(mcml)
+
+def test_lazy_missing_file(tmp_path):
+    path = str(tmp_path / 'moved.mco')
+    shutil.copy('sample2.mco', path)
+    lazy = MCMLV2()
+    lazy.init_from_file(path, lazy=True)
+    os.rename(path, path + '.old')
+    for _ in range(2):
+        with pytest.raises(FileNotFoundError):
+            lazy.Arz
+    os.rename(path + '.old', path)
+    assert lazy.Arz.shape == (40, 50)
+
+def write_time_resolved(path):
+    """Copy sample2.mco adding A_zt, A_rzt and Rd_rat sections (nz=40, nr=50, na=1, nt=10)."""
+    with open('sample2.mco', encoding='utf-8') as file:
+        text = file.read()
+    for tag, size in (('A_zt', 40 * 10), ('A_rzt', 50 * 40 * 10), ('Rd_rat', 50 * 10)):
+        values = np.arange(size) + 1.0
+        text += '\n%s #[1/(cm ps)]\n' % tag
+        text += ''.join('%12.4E ' % v + '\n' * (i % 5 == 4) for i, v in enumerate(values))
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+def test_time_resolved(tmp_path, monkeypatch):
+    fname = write_time_resolved(tmp_path / 'time.mco')
+    monkeypatch.setattr('mcmlpy.mcml.CHUNK_SIZE', 1000)
+    mcml = MCMLV2()
+    mcml.memmap_dir = str(tmp_path)
+    mcml.init_from_file(fname)
+    assert mcml.ndt == 10 and mcml.dt == 0.1
+    assert np.allclose(mcml.t, np.arange(9) * 0.1)
+    assert mcml.At.shape == (9,)
+    assert mcml.Rdt[0] == 4.5393E-03
+    assert vars(mcml)['Arzt'].size == 0
+
+    assert isinstance(mcml.Arzt, np.memmap)
+    assert mcml.Arzt.shape == (40, 50, 10)
+    assert mcml.Arzt[..., :len(mcml.t)].shape[-1] == len(mcml.At) == 9
+    assert mcml.Arzt[3, 2, 1] == ((2 * 40 + 3) * 10 + 1 + 1) / 1000
+    assert mcml.Azt.shape == (40, 10)
+    assert mcml.Azt[3, 1] == (3 * 10 + 1 + 1) / 10
+    assert mcml.Rdrat.shape == (1, 50, 10)
+    assert mcml.Rdrat[0, 2, 1] == (2 * 10 + 1 + 1) / 100
+    assert mcml.Rdrt.size == 0
+
+    with open(fname, encoding='utf-8') as file:
+        memory = MCMLV2()
+        memory.init_from_v2_file(file)
+    assert np.array_equal(memory.Arzt, mcml.Arzt)
+    assert np.array_equal(memory.Rdt, mcml.Rdt)
+
+def test_write_mco(tmp_path):
+    fname = write_time_resolved(tmp_path / 'time.mco')
+    mcml = MCMLV2()
+    mcml.init_from_file(fname)
+    copy_name = str(tmp_path / 'copy.mco')
+    mcml.write_mco(copy_name, version=2)
+    copy = MCMLV2()
+    copy.read_file(copy_name)
+    assert list(copy.sections) == ['RAT', 'A_rz', 'A_t', 'A_zt', 'A_rzt', 'Rd_r',
+                                   'Rd_t', 'Rd_rat', 'Td_r', 'Td_t']
+    for name in MCMLV2.geometry + MCMLV2.tallies + ('photons', 'layer_name'):
+        assert np.array_equal(getattr(copy, name), getattr(mcml, name)), name
+
+    mcml.write_mco(copy_name, version=1)
+    v1 = MCMLV1()
+    v1.read_file(copy_name)
+    assert v1.num_layers == 3
+    assert v1.n_above == 1 and v1.n_below == 1
+    assert np.array_equal(v1.mu_a, mcml.mu_a[1:-1])
+    assert v1.Rd == mcml.Rd
+    assert np.array_equal(v1.Arz, mcml.Arz)
+
+def test_write_in_chunks(tmp_path, monkeypatch):
+    fname = write_time_resolved(tmp_path / 'time.mco')
+    mcml = MCMLV2()
+    mcml.init_from_file(fname)
+    expected = mco_text(mcml, version=2, name='copy.mco')
+    monkeypatch.setattr('mcmlpy.writer._LINES_PER_CHUNK', 3)
+    copy_name = str(tmp_path / 'copy.mco')
+    mcml.write_mco(copy_name, version=2)
+    with open(copy_name, encoding='utf-8') as file:
+        assert file.read() == expected
+    with pytest.raises(ValueError):
+        mcml.write_mco(str(tmp_path / 'v3.mco'), version=3)
+    assert not os.path.exists(tmp_path / 'v3.mco')
+
+def test_merge():
+    a = MCMLV2()
+    a.init_from_file('sample2.mco')
+    assert a.photons == 533670
+    b = MCMLV2()
+    b.init_from_file('sample2.mco', lazy=True)
+    b.photons = 3 * a.photons
+    b.Rd = 0.5
+    c = a + b
+    assert c.photons == 4 * a.photons
+    assert c.Rd == pytest.approx((a.Rd + 3 * 0.5) / 4)
+    assert np.allclose(c.Arz, a.Arz)
+    assert np.allclose(c.Rdt, a.Rdt)
+    assert sum([a, a, a]).photons == 3 * a.photons
+    b.dr = 2 * a.dr
+    with pytest.raises(ValueError):
+        a + b
+
+def test_merge_time_resolved(tmp_path, monkeypatch):
+    fname = write_time_resolved(tmp_path / 'time.mco')
+    monkeypatch.setattr('mcmlpy.mcml.CHUNK_SIZE', 1000)
+    a = MCMLV2()
+    a.memmap_dir = str(tmp_path)
+    a.init_from_file(fname)
+    b = MCMLV2()
+    b.init_from_file(fname)
+    b.photons = 3 * a.photons
+    c = a + b
+    assert isinstance(c.Arzt, np.memmap)
+    assert c.Arzt is not a.Arzt and c.Arzt.shape == (40, 50, 10)
+    assert np.allclose(c.Arzt, a.Arzt)
+    assert np.allclose(c.Rdrat, b.Rdrat)
+    assert c.mu_a is not a.mu_a and c.layer_name is not a.layer_name
+    c.mu_a[0] = -1
+    assert a.mu_a[0] != -1
+
 if __name__ == "__main__":
     pytest.main()
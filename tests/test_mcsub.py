@@ -3,7 +3,9 @@
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=consider-using-f-string
 
+from io import StringIO
 import pytest
+import numpy as np
 from mcmlpy import MCSub
 
 def TestInitialization():
@@ -12,6 +14,34 @@ def TestInitialization():
 def test_read_file():
     mcsub = MCSub()
     mcsub.init_from_file('mcOUT1.dat')
-    
+
+def test_read_values():
+    mcsub = MCSub()
+    mcsub.read_file('mcOUT1.dat')
+    assert mcsub.Arz.shape == (100, 20)
+    assert mcsub.Rdr.shape == (20,)
+    assert np.allclose(mcsub.z[:3], [0, 0.05, 0.1])
+    assert np.allclose(mcsub.Arz[0, :3], [0.06817514, 0.06893137, 0.06751802])
+    assert np.allclose(mcsub.Rdr[:3], [8.31161989e-08, 8.08351859e-08, 8.46810764e-08])
+    assert np.all(mcsub.Arz[-1] == 1e-12)    # zeros are replaced
+
+def test_irregular_rows():
+    with open('mcOUT1.dat', 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    lines[30] = lines[30].replace('\t ', '\t')   # not fixed width
+    mcsub = MCSub()
+    mcsub.init_from_mcsub_file(StringIO(''.join(lines)))
+    expected = MCSub()
+    expected.read_file('mcOUT1.dat')
+    assert np.array_equal(mcsub.Arz, expected.Arz)
+    assert np.array_equal(mcsub.z, expected.z)
+
+def test_missing_rows():
+    with open('mcOUT1.dat', 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    mcsub = MCSub()
+    with pytest.raises(ValueError, match='expected 100 rows'):
+        mcsub.init_from_mcsub_file(StringIO(''.join(lines[:-10])))
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,55 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import pytest
+import numpy as np
+import mcmlpy
+
+def test_pool():
+    a = np.log10(np.arange(1, 31.0).reshape(5, 6))
+    assert np.allclose(10**mcmlpy.pool(a), [[8, 10, 12], [20, 22, 24], [26, 28, 30]])
+    mean = mcmlpy.pool(a, axes=(1,), method='mean')
+    assert mean.shape == (5, 3)
+    assert np.isclose(10**mean[0, 0], np.sqrt(2))
+    assert np.isclose(mcmlpy.pool([0.0, -np.inf], method='mean')[0], 0)
+    assert mcmlpy.pool([-np.inf, -np.inf], method='mean')[0] == -np.inf
+    with pytest.raises(ValueError):
+        mcmlpy.pool(a, method='median')
+
+def test_levels():
+    values = np.random.default_rng(1).random((100, 300))
+    pyramid = mcmlpy.Pyramid(values)
+    assert len(pyramid) == 10 and not pyramid.levels
+    assert pyramid.level(2).shape == (25, 75)
+    assert len(pyramid.levels) == 3
+    assert np.isclose(np.max(pyramid.level(9)), np.log10(values.max()))
+    assert pyramid.select((30, 30)) == 1
+    assert pyramid.select((200, 10)) == 0
+
+def test_view():
+    pyramid = mcmlpy.Pyramid(np.ones((64, 256)))
+    level = pyramid.view((16, 32))
+    assert level.factor == 4 and level.values.shape == (16, 64)
+    level = pyramid.view((16, 32), ((0, 16), (64, 128)))
+    assert level.factor == 1 and level.values.shape == (16, 64)
+    assert level.start == (0, 64) and level.stop == (16, 128)
+
+def test_mcml():
+    mcml = mcmlpy.load('sample2.mco')
+    pyramid = mcml.pyramid()
+    assert pyramid is mcml.pyramid('Arz')
+    assert pyramid.shape == (mcml.Arz.shape[0] - 1, mcml.Arz.shape[1] - 1)
+    full = mcml.fluence_image()[0]
+    small, extent, _, zmax = mcml.fluence_image(pixels=(10, 20))
+    assert small.shape == (10, 25)
+    assert np.isclose(zmax, np.max(full))
+    assert np.isclose(extent[0], mcml.fluence_image()[1][0])
+    zoom, extent, _, _ = mcml.fluence_image(pixels=(100, 100), window=(-1, 1, 2, 0))
+    assert zoom.shape == (20, 21) and extent[2] == pytest.approx(mcml.z[-1] * 20 / 39)
+    mcml.Arz = mcml.Arz * 2
+    assert mcml.pyramid() is not pyramid
+    v1 = mcmlpy.load('mc-lost-v1-3.mco')
+    assert v1.pyramid('Rdra', 'mean').level(1).shape == (1, 501)
+
+if __name__ == "__main__":
+    pytest.main()
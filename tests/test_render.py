@@ -0,0 +1,61 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import os
+import pytest
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import mcmlpy
+
+def test_mirrored():
+    mcml = mcmlpy.load('sample2.mco')
+    x, Rdr = mcml.mirrored(mcml.Rdr)
+    assert np.array_equal(x, -x[::-1])
+    assert np.array_equal(Rdr, Rdr[::-1])
+    masked, extent, zmin, _ = mcml.fluence_image(1e-7)
+    assert masked.shape == (mcml.Arz.shape[0] - 1, 2 * mcml.Arz.shape[1] - 3)
+    assert zmin == -7 and extent[0] == -extent[1]
+
+def test_no_figures_left():
+    plt.close('all')
+    mcml = mcmlpy.load('sample2.mco')
+    _, ax = plt.subplots()
+    mcml.plot_fluence(ax=ax)
+    mcml.plot_reflectance(ax=ax)
+    assert plt.get_fignums() == [1]
+    plt.close('all')
+
+def test_plot_fluence_shows(monkeypatch):
+    shown = []
+    monkeypatch.setattr(plt, 'show', lambda: shown.append(True))
+    mcml = mcmlpy.load('sample2.mco')
+    mcml.plot_fluence()
+    assert shown == [True]
+    _, ax = plt.subplots()
+    mcml.plot_fluence(ax=ax)
+    assert shown == [True]
+    plt.close('all')
+
+def test_renderer(tmp_path):
+    renderer = mcmlpy.Renderer('fluence')
+    image = renderer.image
+    for fname in ('sample2.mco', 'mc-lost-v1-3.mco', 'mcOUT1.dat'):
+        renderer.render(mcmlpy.load(fname), tmp_path / (fname + '.png'))
+        assert renderer.image is image
+        assert len(renderer.ax.texts) == len(renderer.labels)
+    assert len(os.listdir(tmp_path)) == 3
+    with pytest.raises(ValueError):
+        mcmlpy.Renderer('polar')
+
+def test_render_many(tmp_path):
+    sources = ['sample2.mco', 'mc-lost-v1-3.mco', 'missing.mco', mcmlpy.load('mcOUT1.dat')]
+    stats = mcmlpy.render_many(sources, tmp_path, kind='reflectance', fmt='svg', workers=2)
+    assert len(stats.files) == 3 and stats.figures_per_second > 0
+    assert [failure.path for failure in stats.failures] == ['missing.mco']
+    assert all(os.path.getsize(fname) > 0 for fname in stats.files)
+    assert stats.files[0].endswith('sample2-reflectance.svg')
+
+if __name__ == "__main__":
+    pytest.main()
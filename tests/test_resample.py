@@ -0,0 +1,48 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import pytest
+import numpy as np
+import mcmlpy
+
+def test_slice():
+    mcml = mcmlpy.load('sample2.mco')
+    nr = len(mcml.r)
+    xz = mcml.cartesian(mcml.dr)
+    assert xz.values.shape == (len(mcml.z), 2 * nr)
+    assert np.allclose(xz.x[nr:], mcml.r + mcml.dr / 2)
+    assert np.allclose(xz.values[:, nr:], mcml.Arz[:, :nr])
+    assert np.allclose(xz.values[:, :nr], mcml.Arz[:, nr - 1::-1])
+
+def test_volume():
+    mcml = mcmlpy.load('sample2.mco')
+    xyz = mcml.cartesian((0.2, 0.1), half_width=2.1, volume=True, fluence=True)
+    assert xyz.values.shape == (len(mcml.z), 21, 21)
+    assert xyz.y[10] == 0
+    assert np.allclose(xyz.values, xyz.values.transpose(0, 2, 1))
+    xz = mcml.cartesian((0.2, 0.1), half_width=2.1, fluence=True)
+    assert np.allclose(xyz.values[:, 10, :], xz.values)
+
+def test_linear_and_outside():
+    dr, dz = 0.1, 0.2
+    r = (np.arange(10) + 0.5) * dr
+    z = (np.arange(5) + 0.5) * dz
+    values = 3 * z[:, None] + 2 * r
+    xz = mcmlpy.to_cartesian(values, dr, dz, 0.05, half_width=1.5, depth=1.0)
+    inside = (np.abs(xz.x) >= dr / 2) & (np.abs(xz.x) <= r[-1])
+    deep = (xz.z >= dz / 2) & (xz.z <= z[-1])
+    expected = 3 * xz.z[:, None] + 2 * np.abs(xz.x)
+    assert np.allclose(xz.values[deep][:, inside], expected[deep][:, inside])
+    assert np.all(xz.values[:, np.abs(xz.x) > 1.0] == 0)
+
+def test_batch_and_cache():
+    mcml = mcmlpy.load('sample2.mco')
+    stacked = np.stack([mcml.Arz, 2 * mcml.Arz])[..., :len(mcml.r)]
+    mcmlpy.cartesian_weights.cache_clear()
+    xz = mcmlpy.to_cartesian(stacked, mcml.dr, mcml.dz, 0.1)
+    assert np.allclose(xz.values[1], 2 * xz.values[0])
+    assert np.allclose(xz.values[0], mcml.cartesian(0.1).values)
+    assert mcmlpy.cartesian_weights.cache_info().hits == 1
+
+if __name__ == "__main__":
+    pytest.main()
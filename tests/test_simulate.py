@@ -0,0 +1,116 @@
+# pylint: disable=invalid-name
+# pylint: disable=consider-using-f-string
+
+import pytest
+import numpy as np
+from mcmlpy import MCMLV1, MCMLV2, Simulation, fresnel_reflection, merge
+
+def test_fresnel_reflection():
+    r, cos_t = fresnel_reflection(1.0, 1.5, 1.0)
+    assert r == pytest.approx(0.04)
+    assert cos_t == 1
+    r, cos_t = fresnel_reflection(1.5, 1.0, [0.5, 0.9])
+    assert r[0] == 1
+    assert 0 < r[1] < 1
+    r, cos_t = fresnel_reflection(1.4, 1.4, 0.3)
+    assert r == 0 and cos_t == 0.3
+
+def test_absorber():
+    sim = Simulation(n=[1], mu_a=[0.1], mu_s=[0], g=[0], d=[10], dz=1, dr=1, ndz=10, ndr=5, nda=3)
+    mcml = sim.run(20000, seed=1)
+    assert mcml.Tt == pytest.approx(np.exp(-1), abs=0.01)
+    assert mcml.Rd == 0
+    assert mcml.Rsp + mcml.Rd + mcml.absorbed + mcml.Tt == pytest.approx(1)
+    assert mcml.Arz.shape == (10, 5)
+    assert mcml.Rdra.shape == (3, 5)
+    assert len(mcml.Az) == 9
+
+def test_reference():
+    ref = MCMLV1()
+    ref.init_from_file('mc-lost-v1-2.mco')
+    mcml = Simulation.from_mcml(ref).run(10000, seed=1)
+    assert mcml.Rsp == pytest.approx(ref.Rsp, rel=1e-4)
+    assert mcml.Rd == pytest.approx(ref.Rd, abs=0.02)
+    assert mcml.absorbed == pytest.approx(ref.absorbed, abs=0.02)
+    assert mcml.Tt == pytest.approx(ref.Tt, abs=0.01)
+    assert np.sum(mcml.Rdr * 2 * np.pi * (mcml.r + mcml.dr / 2) * mcml.dr) <= mcml.Rd
+
+def test_merge_with_file():
+    ref = MCMLV1()
+    ref.init_from_file('mc-lost-v1-2.mco')
+    mcml = Simulation.from_mcml(ref).run(2000, seed=1)
+    assert mcml.Ttra.shape == ref.Ttra.shape == (ref.nda, ref.ndr)
+    both = merge([ref, mcml])
+    assert both.photons == ref.photons + 2000
+    assert both.Ttra.shape == ref.Ttra.shape
+
+def test_from_v2():
+    ref = MCMLV2()
+    ref.init_from_file('sample2.mco')
+    sim = Simulation.from_mcml(ref, batch=500)
+    assert sim.num_layers == 3
+    assert sim.n_above == 1 and sim.n_below == 1
+    assert np.array_equal(sim.d, [1, 1, 2])
+    a = sim.run(1000, seed=3)
+    b = sim.run(1000, seed=3)
+    assert np.array_equal(a.Arz, b.Arz)
+    assert a.Rd == b.Rd
+
+def test_clear_layer():
+    sim = Simulation(n=[1.5, 1.4], mu_a=[0, 0.1], mu_s=[0, 10], g=[0, 0], d=[1, 1])
+    r1 = 0.04
+    r2 = (0.1 / 2.9)**2
+    assert sim.specular() == pytest.approx(r1 + (1 - r1)**2 * r2 / (1 - r1 * r2))
+
+def test_workers():
+    sim = Simulation(n=[1.4], mu_a=[0.1], mu_s=[5], g=[0.8], d=[2], dz=0.1, dr=0.1,
+                     ndz=20, ndr=20, nda=5, batch=200)
+    a = sim.run(1001, seed=7, workers=2)
+    b = sim.run(1001, seed=7, workers=2)
+    assert a.photons == 1001
+    assert np.array_equal(a.Arz, b.Arz)
+    assert np.array_equal(a.Rdra, b.Rdra)
+    assert a.Rd == b.Rd
+    c = sim.run(1001, seed=8, workers=2)
+    assert not np.array_equal(a.Arz, c.Arz)
+
+def test_run_until():
+    sim = Simulation(n=[1], mu_a=[0.1], mu_s=[1], g=[0.5], d=[3], dz=0.5, dr=0.5,
+                     ndz=6, ndr=4, nda=3, batch=500)
+    mcml = sim.run_until(0.05, photons_per_batch=500, seed=1, bins={'Rdr': [0]})
+    assert mcml.converged
+    assert mcml.photons == 500 * mcml.batches
+    assert mcml.Rd_err <= 0.05 * mcml.Rd
+    assert mcml.Rdr_err[0] <= 0.05 * mcml.Rdr[0]
+    assert mcml.Arz_err.shape == mcml.Arz.shape
+    mcml = sim.run_until(1e-6, photons_per_batch=500, max_photons=3000, seed=1)
+    assert not mcml.converged
+    assert mcml.photons == 3000
+
+def test_white():
+    sim = Simulation(n=[1.4, 1.4], mu_a=[0, 0], mu_s=[5, 2], g=[0.8, 0.5], d=[1, 1],
+                     dz=0.1, dr=0.1, ndz=20, ndr=20, nda=5)
+    white = sim.run_white(5000, seed=1)
+    assert white.paths.shape == (len(white.weight), 2)
+    clear = white.rescale([0, 0])
+    assert clear.Rsp + clear.Rd + clear.Tt == pytest.approx(1)
+    assert clear.absorbed == pytest.approx(0, abs=1e-6)
+
+    mu_a = np.array([[0.1, 0.2], [0.5, 0.0], [0.0, 0.0]])
+    results = white.rescale(mu_a)
+    assert len(results) == 3
+    assert results[2].Rd == pytest.approx(clear.Rd)
+    assert np.allclose(results[2].Rdr, clear.Rdr)
+    assert results[0].Rd < clear.Rd
+    assert np.array_equal(results[1].mu_a, [0.5, 0])
+
+    sim.mu_a = np.array([0.1, 0.2])
+    direct = sim.run(5000, seed=2)
+    assert results[0].Rd == pytest.approx(direct.Rd, abs=0.02)
+    assert results[0].Tt == pytest.approx(direct.Tt, abs=0.02)
+
+    with pytest.raises(ValueError):
+        Simulation(n=[1], mu_a=[0], mu_s=[1], g=[0], d=[np.inf]).run_white(10)
+
+if __name__ == "__main__":
+    pytest.main()